@@ -1,16 +1,43 @@
+import argparse
+import io
+import logging
 import math
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-import random
+import time
+from typing import NamedTuple, Optional
 import matplotlib.image as mpimg
-from data.vote_calculations import calculate_vote_totals, determine_winner, calculate_lead_margin,update_running_tally,finalize_riding_votes
-from data.party_utils import get_leading_party
-from data.MapMaker import mapmaker_main
-from data.listMaker import listcreation
-from matplotlib.text import TextPath
-from matplotlib.transforms import Affine2D
+from data.vote_calculations import generate_vote_progressions, select_steps, select_story_steps, calculate_lead_margin
+from data.timeline import ElectionTimeline
+from data.seat_allocation import MMPSeatAllocator
+from data.MapMaker import mapmaker_main, map_output_paths
+from data.projection import BLEND
+from data.national_map import build_national_map, national_output_paths
+from data.listMaker import listcreation, party_listcandidates
+from data.text_fit import text_width, fit_font_size
+from data.asset_cache import asset_cache
+from data.image_writer import AsyncImageWriter, combine_writer_stats
+from data.animation import AnimationWriter, ANIMATION_FORMATS, ANIMATION_EXTENSIONS
 import matplotlib.patches as patches
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from data.profiler import profiler, artist_profiler
+from data.build_manifest import BuildManifest, hash_inputs, file_digest
+from data.checkpoint import RunCheckpoint
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+STEP_SELECTIONS = ('random', 'story')
+
+
+# One allocator per party list and seat count, so repeated calls only adjust the last allocation
+_mmp_allocators = {}
 
 
 def MMP_calculation(all_parties, seatsToProcess, seatsprocessed):
@@ -26,45 +53,23 @@ def MMP_calculation(all_parties, seatsToProcess, seatsprocessed):
     dict: A dictionary with the number of seats allocated to each party.
     """
 
-    # Calculate total votes excluding Independent
-    noindytotal_temp_vote = sum(party['temp_vote'] for party in all_parties if party['name'] != 'Independent')
-
-    # Initialize seat allocations and store initial vote totals
-    seats_allocated = {party['name']: 0 for party in all_parties if party['name'] != 'Independent'}
-    original_party_votes = {party['name']: party['temp_vote'] for party in all_parties if party['name'] != 'Independent'}
-    party_votes = original_party_votes.copy()  # Copy the original votes for modification
-
-    total_seats_to_allocate = seatsToProcess
+    party_names = [party['name'] for party in all_parties]
+    allocator = _mmp_allocators.get((tuple(party_names), seatsToProcess))
+    if allocator is None:
+        allocator = _mmp_allocators[(tuple(party_names), seatsToProcess)] = MMPSeatAllocator(party_names, seatsToProcess)
 
     # Get the seat count for Independent parties
     independent_seats = sum(party['seats'] for party in all_parties if party['name'] == 'Independent')
-    print(f"Independent seats: {independent_seats}")
-    fptp_seats = {party['name']: party['seats'] for party in all_parties}
-    print(f"party fptp seats: {fptp_seats}")
-
-    # Loop for the remaining rounds (excluding already processed independent seats)
-    for round in range(total_seats_to_allocate - independent_seats):
-        # Determine the leading party based on remaining votes
-        leading_party = max(party_votes, key=party_votes.get)
-
-        # Allocate a seat to the leading party
-        seats_allocated[leading_party] += 1
-
-        # Calculate the current seats won by the leading party
-        seats_won = seats_allocated[leading_party]
-
-        # Reset the party_votes to the original value divided by the number of seats won
-        party_votes[leading_party] = original_party_votes[leading_party] / (seats_won + 1)  # +1 to avoid division by zero
+    logger.debug(f"Independent seats: {independent_seats}")
+    fptp_seats = [party['seats'] for party in all_parties]
+    logger.debug(f"party fptp seats: {dict(zip(party_names, fptp_seats))}")
 
-        # Optional: Print round info (for debugging)
-        print(f"Round {round + 1}: {leading_party} gets a seat. Remaining votes: {party_votes}")
+    # D'Hondt over every party except Independent, with the riding seats taken off afterwards
+    list_seats = allocator.update([party['temp_vote'] for party in all_parties], fptp_seats)
+    final_seat_allocation = {name: int(seats) for name, seats, eligible in zip(party_names, list_seats, allocator.eligible)
+                             if eligible}
 
-    # Final seat allocation
-    print(f"Final seat allocation: {seats_allocated}")
-    # Final seat allocation after removing FPTP seats
-    final_seat_allocation = {party: seats_allocated[party] - fptp_seats.get(party, 0) for party in seats_allocated}
-
-    print(f"Final seat allocation (excluding FPTP seats): {final_seat_allocation}")
+    logger.debug(f"Final seat allocation (excluding FPTP seats): {final_seat_allocation}")
 
     return final_seat_allocation
 
@@ -73,10 +78,8 @@ def MMP_calculation(all_parties, seatsToProcess, seatsprocessed):
 
 
 def get_text_width(text, font_size, scale_factor=0.001):
-    # Estimate the width of the text using TextPath and scale it
-    text_path = TextPath((0, 0), text, size=font_size)
-    bounds = text_path.get_extents(Affine2D())
-    return bounds.width * scale_factor  # Scale the width to match plot dimensions
+    # Estimate the width of the text using TextPath and scale it; each text is only laid out once
+    return text_width(text, font_size, scale_factor)
 
 def draw_progress_bar(ax, step, num_graphics,riding):
     """
@@ -86,6 +89,10 @@ def draw_progress_bar(ax, step, num_graphics,riding):
     ax (matplotlib axis): The axis on which to draw the progress bar.
     step (int): The current step in the progress.
     num_graphics (int): The total number of graphics to determine progress.
+
+    Returns:
+    tuple: The bar's background, the progress bar rectangle and its percentage text, so they can be
+    updated later.
     """
 
     # Define progress bar properties
@@ -108,12 +115,14 @@ def draw_progress_bar(ax, step, num_graphics,riding):
     ax.add_patch(progress_bar)
 
     # Add text showing the progress percentage
-    ax.text(progress_bar_x + progress_bar_width / 2, progress_bar_y + progress_bar_height / 2,
-            f'{progress:.1f}%', fontsize=12, ha='center', va='center', weight='bold')
+    progress_text = ax.text(progress_bar_x + progress_bar_width / 2, progress_bar_y + progress_bar_height / 2,
+                            f'{progress:.1f}%', fontsize=12, ha='center', va='center', weight='bold')
     # Add the riding name as a title above the progress bar
     ax.text(0.5, progress_bar_y + progress_bar_height + 0.01, f'{riding["name"]}',
             fontsize=36, ha='center', va='bottom', weight='bold')
 
+    return bar_background, progress_bar, progress_text
+
 
 def add_party_box(ax, x_pos, picture_y_pos, picture_height, width, sorted_short_parties, j,sorted_Colours):
     """
@@ -127,6 +136,9 @@ def add_party_box(ax, x_pos, picture_y_pos, picture_height, width, sorted_short_
     width (float): The total width of the main box.
     sorted_short_parties (list): The list containing short party names.
     j (int): The index for selecting the party name from the sorted_short_parties list.
+
+    Returns:
+    tuple: The box and its text, so they can be updated later.
     """
 
     # Calculate the middle of the picture's height
@@ -148,669 +160,1215 @@ def add_party_box(ax, x_pos, picture_y_pos, picture_height, width, sorted_short_
     text_x_pos = x_pos + new_box_width / 2  # Center the text horizontally in the box
     text_y_pos = box_y_pos + partybox_height / 2  # Center the text vertically in the box
 
-    ax.text(text_x_pos + 0.005, text_y_pos, f'{sorted_short_parties[j]}',
-            fontsize=18, ha='center', va='center', color='black')
-
-
-def generate_individual_graphics(ridings, all_parties, num_graphics, num_selected_steps,seatsToProcess,byelection):
-    # Sort ridings alphabetically by name
-
-    global seats_allocated
-    sorted_ridings = ridings  # Keep the original order from the spreadsheet
-    winning_candidate_indices = [-1] * len(sorted_ridings)  # -1 indicates no winner yet
-    winner_determined_steps = [None] * len(sorted_ridings)  # Initialize with None for each riding
-    # Initialize party colors
-    party_colors = {party['name']: party['color'] for party in all_parties}
-    party_seat_counts = {party['name']: party['seats'] for party in all_parties}
-    party_listseat_counts = {party['name']: party['seats_list'] for party in all_parties}
-    party_total_seats = {party['name']: party['seats'] + party['seats_list'] for party in all_parties}
-    # Initialize vote totals matrix for each riding
-    vote_totals_by_riding = [np.zeros((num_graphics, len(riding['final_results']))) for riding in sorted_ridings]
-    # Generate random vote totals for each candidate in each riding
-    seatsprocessed = 0
-
-    for r, riding in enumerate(sorted_ridings):
-
-        num_parties = len(riding['final_results'])
-        for j in range(num_parties):
-            total_votes = riding['final_results'][j]
-            vote_totals_by_riding[r][:, j] = calculate_vote_totals(total_votes, num_graphics)
-
-        # Ensure final step has exact totals
-        vote_totals_by_riding[r][-1] = riding['final_results']
-
-        # Include step 0 where everyone has 0 votes
-        vote_totals_by_riding[r][0] = np.zeros(num_parties)
-
-    # Include steps at increments of 2.5%
-    increments = np.linspace(0, num_graphics, num=num_graphics)
-
-    # Always include step 0 and step 40
-
-    all_steps = list(range(1, num_graphics - 1))
-    selected_steps = sorted(random.sample(all_steps, num_selected_steps - 2) + [0, num_graphics - 1])
-    selected_steps.sort()
-
-    # Check if output directory exists; if not, create it
-    output_dir = 'output_images'
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    # Load the background image
-    background_img = mpimg.imread('Required_Images/background.jpg')
-
-    # Generate a separate image for each selected step for each riding
-    for r, riding in enumerate(sorted_ridings):
-        print(f'Starting processing for riding {riding["name"]}')
-        # Track if seat counts have been updated for this riding
-        previous_leading_party=None
-        name_font_size = 22
-
-
-        # Then loop through all steps for that specific riding
-        for step in selected_steps:
-            print(f'Starting graphics for step {step} for riding {riding["name"]}')
-            try:
-                # Calculate remaining votes for current step
-                total_votes = np.sum(vote_totals_by_riding[r][step])
-                remaining_votes = np.sum(riding['final_results']) - total_votes
-
-                # Determine if winner is decided
-                is_winner_determined = determine_winner(vote_totals_by_riding[r][step], remaining_votes)
-
-                # Update the winning candidate index if a winner is determined and not already set
-                if is_winner_determined and winning_candidate_indices[r] == -1:
-                    winning_candidate_indices[r] = np.argmax(vote_totals_by_riding[r][step])
-                    winner_determined_steps[r] = step  # Store the step where the winner was determined
-
-                fig, ax = plt.subplots(figsize=(12, 8))
-
-                # Ensure this line is added before saving each figure
-                plt.subplots_adjust(left=0, right=1, top=1, bottom=0)  # Remove any margins around the plot
-
-                ax.imshow(background_img, aspect='auto', extent=[0, 1, 0, 1],
-                          alpha=0.2)  # Make sure it covers the full area
-
-                ax.axis('off')
-                ax.set_xlim(0, 1)
-                ax.set_ylim(0, 1)
-
-                # Sort candidates by vote count for the current step
-                sorted_indices = np.argsort(-vote_totals_by_riding[r][step])
-                sorted_votes = vote_totals_by_riding[r][step][sorted_indices]
-                sorted_names = np.array(riding['candidate_names'])[sorted_indices]
-                sorted_parties = np.array(riding['party_names'])[sorted_indices]
-                sorted_short_parties = np.array(riding['short_name'])[sorted_indices]
-                sorted_colors = np.array([party_colors[party] for party in sorted_parties])
-
-                total_votes_step = sorted_votes.sum()
-                num_candidates = min(len(riding['candidate_names']), 4)
-                width = 0.8 / 4
-                padding = 0.1 / 4
-
-                # Dimensions for the picture placeholder
-                picture_width = width * 0.5
-                picture_height = 0.2  # Height of the picture placeholder
-
-                # Adjust y_pos for the picture box so it ends before the candidate information box
-
-
-                # Limit to first 4 candidates
-                max_displayed_candidates = 4
-                num_candidates_to_display = min(len(sorted_votes), max_displayed_candidates)
-
-                # Calculate the number of columns and rows needed
-                num_displayed_columns = min(num_candidates_to_display, 4)  # Number of columns, up to a max of 4
-                num_displayed_rows = (num_candidates_to_display - 1) // num_displayed_columns + 1  # Number of rows
-
-                # Calculate the total width and height needed for the displayed candidate boxes
-                total_width = num_displayed_columns * (width + padding) - padding  # Total width required for boxes
-                total_height = num_displayed_rows * (
-                            0.35 + picture_height)  # Total height required for boxes, including picture space
+    party_text = ax.text(text_x_pos + 0.005, text_y_pos, f'{sorted_short_parties[j]}',
+                         fontsize=18, ha='center', va='center', color='black')
 
-                # Calculate starting position to center the candidate block within the screen
-                start_x = (1 - total_width) / 2  # Horizontal centering
-                start_y = (1 - total_height) / 2  # Vertical centering
-                # Set the initial font size
+    return new_box, party_text
 
 
+def build_seat_panel(frame, parties):
+    """
+    Works out the seat counter boxes shown under the candidates.
 
+    Parties are ordered by total seats (riding seats plus list seats, or just riding seats for
+    Independents) and only the first six are shown.
 
-                for j in range(num_candidates_to_display):
-                    col = j % num_displayed_columns
-                    row = j // num_displayed_columns
-
-                    # Calculate position for each candidate box
-                    x_pos = start_x + col * (width + padding) + width / 2
-                    y_pos = start_y + row * (0.45 + picture_height)  # Position adjusted for picture and info space
-                    picture_y_pos = y_pos + 0.35  # Position it such that it starts at y_pos + 0.35 and ends before the information box
-                    # Draw candidate's information box
-                    # Create the rectangle with a transparent fill
-                    rect = plt.Rectangle((x_pos - width / 2, y_pos), width, 0.35 + picture_height,
-                                         color=sorted_colors[j], alpha=0.25)  # Fill color with transparency
-                    # Add the rectangle to the axis
-                    ax.add_patch(rect)
-
-
-                    # Calculate the x-coordinate for the vertical line (center of the rectangle)
-                    center_x = x_pos  # The rectangle is centered at x_pos, so this is the midpoint
-
-                    # Draw a vertical line through the center of the rectangle
-                    ax.vlines(x=center_x, ymin=y_pos+0.05, ymax=y_pos + 0.18, color='black', linewidth=1.5)
-
-                    # Set the edge color, linewidth, and edge alpha
-                    edge_color = 'black'
-                    edge_alpha = 0.7  # Set your desired alpha for the edge color
-                    rect.set_edgecolor(edge_color)
-
-                    # Create a new edge line with the specified alpha
-                    edge_line = plt.Line2D([0], [0], color=edge_color, alpha=edge_alpha, linewidth=3)
-                    ax.add_line(edge_line)
+    Args:
+    frame (FrameState): The state of the count for this frame.
+    parties (PartyTable): Names, short names and colours of all parties.
 
-                    # Determine image path
-                    candidate_image_path = f'facesteals/{sorted_names[j]}.jpg'
-                    if not os.path.exists(candidate_image_path):
-                        candidate_image_path = 'Required_Images/nopic.jpg'
+    Returns:
+    list: One dictionary per displayed party with its seats, running tally and vote share.
+    """
+    # Ensure the running tallies are shown as integers without decimals
+    temp_votes = [math.floor(vote) for vote in frame.temp_votes]
+    total_temp_vote = math.floor(sum(frame.temp_votes))
+
+    seat_totals = []
+    for i, party_name in enumerate(parties.names):
+        seats = int(frame.fptp_seats[i])
+        if party_name != 'Independent':
+            seats += int(frame.list_seats[i])
+        seat_totals.append(seats)
+
+    ranked_parties = sorted(range(len(parties.names)), key=lambda i: seat_totals[i], reverse=True)
+
+    seat_panel = []
+    for i in ranked_parties[:6]:  # Only take the first 6 parties
+        # Calculate total_vote_percent only if total_temp_vote is greater than 0
+        if total_temp_vote > 0:
+            total_vote_percent = (temp_votes[i] / total_temp_vote) * 100
+        else:
+            total_vote_percent = 0
+
+        seat_panel.append({
+            'name': parties.names[i],
+            'short_pname': parties.short_names[i],
+            'color': parties.colors[i],
+            'seats': seat_totals[i],
+            'temp_vote': temp_votes[i],
+            'vote_percent': f'{total_vote_percent:.1f}%',
+        })
+    return seat_panel
+
+
+# Static layers of the riding figure, keyed by layout, shared by every riding drawn in this process
+_static_layer_cache = {}
+# Padding to add around the canvas for savefig's tight box, per layout (-1 when savefig is needed)
+_tight_padding_cache = {}
+
+
+class RidingFrame:
+    """
+    The figure for one riding, built once and updated for every step of its count.
 
-                    # Load the image
-                    image = plt.imread(candidate_image_path)
+    All candidate cards, photos, party boxes, the progress bar and the seat panel are created
+    when the frame is built, in the same order the original per-step drawing created them.
+    update() then only changes what moves between steps (text, bar widths, colours, photos and
+    the checkmark) before the figure is saved, instead of rebuilding the whole figure. Saving
+    restores a cached static layer and draws only the other artists on top of it.
+    """
 
-                    # Draw picture image above the candidate's information box
-                    ax.imshow(image, extent=(x_pos - width / 2+0.005, x_pos,
-                                             picture_y_pos - 0.05, picture_y_pos - 0.05 + picture_height),
+    width = 0.8 / 4
+    padding = 0.1 / 4
+    picture_height = 0.2  # Height of the picture placeholder
+    max_displayed_candidates = 4
+
+    def __init__(self, riding, parties, num_steps, background_img):
+        """
+        Parameters:
+        riding (dict): The riding's name, candidate_names, party_names and short_name.
+        parties (PartyTable): Names, short names and colours of all parties.
+        num_steps (int): Number of steps in the count.
+        background_img (ndarray): The decoded background image.
+        """
+        self.riding = riding
+        self.parties = parties
+        self.num_steps = num_steps
+        self.party_colors = dict(zip(parties.names, parties.colors))
+
+        # Off-screen Agg figure so the canvas buffer can be restored and drawn into directly
+        self.fig = Figure(figsize=(12, 8))
+        FigureCanvasAgg(self.fig)
+        ax = self.fig.subplots()
+        self.ax = ax
+        self.layout_key = None
+        self.background_img = background_img
+
+        # Ensure this line is added before saving each figure
+        self.fig.subplots_adjust(left=0, right=1, top=1, bottom=0)  # Remove any margins around the plot
+
+        background_low = ax.imshow(background_img, aspect='auto', extent=[0, 1, 0, 1],
+                                   alpha=0.2)  # Make sure it covers the full area
+
+        ax.axis('off')
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+
+        width = self.width
+        picture_height = self.picture_height
+
+        # Limit to first 4 candidates
+        num_candidates_to_display = min(len(riding['candidate_names']), self.max_displayed_candidates)
+        self.num_candidates_to_display = num_candidates_to_display
+
+        # Calculate the number of columns and rows needed
+        num_displayed_columns = min(num_candidates_to_display, 4)  # Number of columns, up to a max of 4
+        num_displayed_rows = (num_candidates_to_display - 1) // num_displayed_columns + 1  # Number of rows
+        self.num_displayed_columns = num_displayed_columns
+
+        # Calculate the total width and height needed for the displayed candidate boxes
+        total_width = num_displayed_columns * (width + self.padding) - self.padding  # Total width required for boxes
+        total_height = num_displayed_rows * (
+                    0.35 + picture_height)  # Total height required for boxes, including picture space
+
+        # Calculate starting position to center the candidate block within the screen
+        self.start_x = (1 - total_width) / 2  # Horizontal centering
+        self.start_y = (1 - total_height) / 2  # Vertical centering
+
+        self.cards = []
+        for j in range(num_candidates_to_display):
+            col = j % num_displayed_columns
+            row = j // num_displayed_columns
+
+            # Calculate position for each candidate box
+            x_pos = self.start_x + col * (width + self.padding) + width / 2
+            y_pos = self.start_y + row * (0.45 + picture_height)  # Position adjusted for picture and info space
+            picture_y_pos = y_pos + 0.35  # Position it such that it starts at y_pos + 0.35 and ends before the information box
+            half_width = width / 2  # Half-width for the left box
+            y_center = y_pos + 0.25 / 2  # Centered vertically in the box
+
+            # Draw candidate's information box with a transparent fill; the colour is set per step
+            rect = plt.Rectangle((x_pos - width / 2, y_pos), width, 0.35 + picture_height,
+                                 color='white', alpha=0.25)
+            ax.add_patch(rect)
+
+            # Draw a vertical line through the center of the rectangle
+            ax.vlines(x=x_pos, ymin=y_pos+0.05, ymax=y_pos + 0.18, color='black', linewidth=1.5)
+
+            # Set the edge color, linewidth, and edge alpha
+            edge_color = 'black'
+            edge_alpha = 0.7  # Set your desired alpha for the edge color
+            rect.set_edgecolor(edge_color)
+
+            # Create a new edge line with the specified alpha
+            edge_line = plt.Line2D([0], [0], color=edge_color, alpha=edge_alpha, linewidth=3)
+            ax.add_line(edge_line)
+
+            # Draw picture image above the candidate's information box
+            photo = ax.imshow(background_img, extent=(x_pos - width / 2+0.005, x_pos,
+                                                      picture_y_pos - 0.05, picture_y_pos - 0.05 + picture_height),
                               aspect='auto', alpha=1, zorder=1)
-                    # Calculate the middle of the picture's height
-                    picture_middle_y = picture_y_pos - 0.05 + (picture_height / 2)
-
-
-
-                    text_y_pos = y_pos + 0.15   # Center the text within the party color box
-
-                    # Define text margin based on rank
-                    lead_margin = calculate_lead_margin(sorted_votes, j,num_candidates_to_display)
-
-                    percentage_of_all = (sorted_votes[j] / total_votes_step) * 100 if total_votes_step > 0 else 0
-
-                    # Fixed Y position for the top of the text
-                    fixed_y_pos = text_y_pos  # The same Y position for all text, no adjustment
+            # Pixel size of the photo on the saved figure, so photos are cached at the size they are shown
+            photo_corners = ax.transData.transform([(x_pos - width / 2 + 0.005, picture_y_pos - 0.05),
+                                                    (x_pos, picture_y_pos - 0.05 + picture_height)])
+            photo_size = tuple(np.ceil(np.abs(photo_corners[1] - photo_corners[0])).astype(int))
 
-                    # Generate the text with or without the lead margin
-                    # Calculate the center of the unified box for consistent Y positioning
-                    y_center = y_pos + 0.25 / 2  # Centered vertically in the box
+            # Calculate positions for the information text on the right side
+            text_x_center = x_pos + (width / 2) / 2  # Center in the right half
 
-                    # Prepare the text for the right side
-                    text = f'{int(sorted_votes[j])}'
+            # Add the information text inside the bottomcandidatebox (right side)
+            votes_text = ax.text(text_x_center, y_center, '',
+                                 fontsize=22, ha='center', va='center',
+                                 color='black')  # Centered both horizontally and vertically
 
-
-
-                    # Define the available width for the right side text
-                    available_width_right = width / 2-0.02  # Right half of the box
-
-                    # Loop to reduce font size if text width exceeds available width
-                    while get_text_width(text,
-                                         name_font_size) > available_width_right and name_font_size > 1:  # Ensure font size doesn't go below 1
-                        name_font_size -= 1
-
-                    # Calculate positions for the information text on the right side
-                    text_x_center = x_pos + (width / 2) / 2  # Center in the right half
-                    text_y_center = y_center  # Use common y_center for consistent vertical alignment
-
-                    # Add the information text inside the bottomcandidatebox (right side)
-                    ax.text(text_x_center, text_y_center, text,
-                            fontsize=name_font_size, ha='center', va='center',
-                            color='black')  # Centered both horizontally and vertically
-
-                    if lead_margin > 0:
-                        leadtext = f'{int(lead_margin)} \nlead'  # Append lead margin information if applicable
-                        ax.text(text_x_center, text_y_center-0.07, leadtext,
+            # Only the leader shows a lead margin
+            lead_text = ax.text(text_x_center, y_center-0.07, '',
                                 fontsize=14, ha='center', va='center',
-                                color='black')  # Centered both horizontally and vertically
-
-                    # Calculate positions for the percentage text on the left side
-                    half_width = width / 2  # Half-width for the left box
-                    text_x_left = x_pos - width / 2 + half_width / 2  # Center in the left half
-                    text_y_left = y_center  # Use common y_center for consistent vertical alignment
-
-                    # Add the text (percentage_of_all) to the center of the left half
-                    ax.text(text_x_left, text_y_left, f'{percentage_of_all:.1f}%',
-                            fontsize=22, ha='center', va='center',
-                            color='black')  # Centered both horizontally and vertically
-
-                    # Add a progress bar in the bottom third of what was the left half
-                    progress_bar_height = 0.02  # Set a height for the progress bar
-                    progress_bar_y = y_pos  # Start at the bottom of the box
-
-                    # Calculate the width of the progress bar based on percentage_of_all
-                    progress_bar_width = (percentage_of_all / 100) * half_width
-
-                    # Create and add the progress bar to what was the left half of the unified box
-                    progress_bar = plt.Rectangle((x_pos - width / 2, progress_bar_y), progress_bar_width,
-                                                 progress_bar_height, color=sorted_colors[j], alpha=0.8)
-                    ax.add_patch(progress_bar)
-
-                    # Optionally, add the border of the full progress bar area for clarity
-                    progress_bar_outline = plt.Rectangle((x_pos - width / 2, progress_bar_y), half_width,
-                                                         progress_bar_height, fill=False, edgecolor='black',
-                                                         linewidth=1)
-                    ax.add_patch(progress_bar_outline)
-
-                    # Use sorted_names[j] as the message
-                    message_text = sorted_names[j]  # Set the text to the name
-                    message_text_x = x_pos  # Centered across the entire box
-                    message_text_y = y_pos + 0.25 - 0.02  # Positioned slightly below the top edge (inside the box)
-
-                    # Set an initial font size for the message
-                    initial_font_size = 22
-                    minimum_font_size = 12  # Minimum font size to prevent excessive shrinking
-
-                    # Dynamically adjust font size to fit within the box
-                    current_font_size = initial_font_size
-                    available_width = width - 0.04  # Leave a small margin
-
-                    # Debugging output
-                    print(f"Available Width: {available_width}")
-                    print(f"Initial Font Size: {current_font_size}")
-
-                    # Only shrink if the text is too wide
-                    current_text_width = get_text_width(message_text, current_font_size)
-                    print(f"Text Width with Initial Font Size: {current_text_width}")
-
-                    if current_text_width > available_width:
-                        while current_text_width > available_width and current_font_size > minimum_font_size:
-                            current_font_size -= 1  # Decrease the font size until it fits
-                            current_text_width = get_text_width(message_text, current_font_size)  # Update text width
-                            print(f"Reducing Font Size: {current_font_size}, Text Width: {current_text_width}")
-
-                    # Add the text message inside the top part with adjusted font size
-                    ax.text(message_text_x, message_text_y, message_text,
-                            fontsize=current_font_size, ha='center', va='top', color='black')
-
-                    # Calculate the center of the left half of the unified box for the percentage text
-                    text_x_left = x_pos - width / 2 + half_width / 2
-                    text_y_left = y_pos + 0.25 / 2  # Vertical center of the box
-
-                    # Add the percentage text in the middle of what was the left half
-                    ax.text(text_x_left, text_y_left, f'{percentage_of_all:.1f}%',
-                            fontsize=22, ha='center', va='center', color='black')
-
-                    # Calculate the center of the left half of the unified box for the percentage text
-                    text_x_left = x_pos - width / 2 + half_width / 2
-                    text_y_left = y_pos + 0.25 / 2  # Vertical center of the box
-
-                    # Add the percentage text in the middle of what was the left half
-                    ax.text(text_x_left, text_y_left, f'{percentage_of_all:.1f}%',
-                            fontsize=22, ha='center', va='center', color='black')
-
-                    add_party_box(ax, x_pos, picture_y_pos, picture_height, width, sorted_short_parties, j,sorted_colors)
-
-                    # Draw checkmark if the candidate is the winner
-                    if winning_candidate_indices[r] != -1:
-                        winning_index = winning_candidate_indices[r]
-
-                        # Find the new index of the winning candidate in the sorted list
-                        sorted_winning_index = np.where(sorted_indices == winning_index)[0][0]
-
-
-                        # Only draw the checkmark if it's among the displayed candidates
-                        if sorted_winning_index < max_displayed_candidates:
-                            x_pos_check = start_x + (sorted_winning_index % num_displayed_columns) * (
-                                        width + padding) + width / 2
-                            y_pos_check = start_y + (sorted_winning_index // num_displayed_columns) * (
-                                        0.35 + picture_height)
-
-                            # Draw the checkmark closer to the right side of the candidate box
-                            ax.text(x_pos_check + width / 2 - 0.005, y_pos_check + 0.35, '✓',
-                                    fontsize=72, ha='right', va='top', color='green')
-
-                draw_progress_bar(ax, step, num_graphics,riding)
-
-                # Create a dictionary for party seat counts using 'seats' from all_parties
-
-                # Example votes for a riding
-                votes_by_riding = vote_totals_by_riding[r][step]  # e.g., [5000, 3000, 2000, 500]
-                parties_by_riding = np.array(riding['party_names'])
-
-                # 1. Update temp_vote for each step
-                update_running_tally(votes_by_riding, parties_by_riding, all_parties)
-
-                # Print the temp_vote to track running totals
-                for party in all_parties:
-                    print(f"{party['name']} - Running Tally (temp_vote): {party['temp_vote']}")
-
-                if np.any(votes_by_riding > 0):
-                    # Get the leading party for the current riding
-                    leading_party = get_leading_party(votes_by_riding, parties_by_riding)
-
-                    # Check if there is a change in the leading party
-                    if leading_party != previous_leading_party:
-                        # Decrement the seat count for the previous leading party if it exists
-                        if previous_leading_party:
-                            if previous_leading_party in party_seat_counts:
-                                party_seat_counts[previous_leading_party] -= 1
-                                print(f"Decremented seat count for previous leading party: {previous_leading_party}")
-
-                        # Increment the seat count for the new leading party
-                        if leading_party:
-                            if leading_party not in party_seat_counts:
-                                party_seat_counts[leading_party] = 0
-                            party_seat_counts[leading_party] += 1
-                            print(f"Incremented seat count for new leading party: {leading_party}")
-
-                        # Update the previous leading party to the new leading party
-                        previous_leading_party = leading_party
-
-                        # Mark seat counts as updated
-                        seat_counts_updated = True
-                    else:
-                        seat_counts_updated = False
-                        print("Leading party has not changed; seat count not updated.")
-                else:
-                    seat_counts_updated = False
-                    print("No votes available, seat counts not updated.")
-
-                # Sort parties by seat count in descending order
-                sorted_party_seat_counts = dict(
-                    sorted(party_seat_counts.items(), key=lambda item: item[1], reverse=True))
-                print("Virginia",party_seat_counts.items())
-
-                party_listseat_counts = {party['name']: party['seats_list'] for party in all_parties}
-
-                combined_seat_counts = {
-                    party_name: party_seat_counts.get(party_name, 0) + party_listseat_counts.get(party_name, 0)
-                    for party_name in party_seat_counts
-                }
+                                color='black', visible=False)
+
+            # Add the text (percentage_of_all) to the center of the left half
+            text_x_left = x_pos - width / 2 + half_width / 2  # Center in the left half
+            percent_texts = [ax.text(text_x_left, y_center, '',
+                                     fontsize=22, ha='center', va='center',
+                                     color='black')]
+
+            # Add a progress bar in the bottom third of what was the left half
+            progress_bar_height = 0.02  # Set a height for the progress bar
+            progress_bar = plt.Rectangle((x_pos - width / 2, y_pos), 0,
+                                         progress_bar_height, color='white', alpha=0.8)
+            ax.add_patch(progress_bar)
+
+            # Optionally, add the border of the full progress bar area for clarity
+            progress_bar_outline = plt.Rectangle((x_pos - width / 2, y_pos), half_width,
+                                                 progress_bar_height, fill=False, edgecolor='black',
+                                                 linewidth=1)
+            ax.add_patch(progress_bar_outline)
+
+            # Add the candidate name inside the top part; its font size is fitted per step
+            name_text = ax.text(x_pos, y_pos + 0.25 - 0.02, '',
+                                fontsize=22, ha='center', va='top', color='black')
+
+            # Add the percentage text in the middle of what was the left half
+            for _ in range(2):
+                percent_texts.append(ax.text(text_x_left, y_pos + 0.25 / 2, '',
+                                             fontsize=22, ha='center', va='center', color='black'))
+
+            party_box, party_text = add_party_box(ax, x_pos, picture_y_pos, picture_height, width, [''], 0,
+                                                  ['white'])
+
+            # Checkmark for the called winner, moved onto the winner's card per step
+            checkmark = ax.text(0, 0, '✓', fontsize=72, ha='right', va='top', color='green', visible=False)
+
+            self.cards.append({
+                'rect': rect,
+                'photo': photo,
+                'photo_size': photo_size,
+                'photo_image': None,
+                'votes_text': votes_text,
+                'lead_text': lead_text,
+                'percent_texts': percent_texts,
+                'progress_bar': progress_bar,
+                'half_width': half_width,
+                'name_text': name_text,
+                'party_box': party_box,
+                'party_text': party_text,
+                'checkmark': checkmark,
+            })
+
+        progress_track, self.progress_bar, self.progress_text = draw_progress_bar(ax, 0, num_steps, riding)
+
+        # Draw party seat counts
+        seat_count_y_pos = y_pos - 0.35  # Positioning for the seat counts row
+        seat_count_height = 0.3  # Height for the seat counts row
+        padding = 0.03  # Reduced padding between party boxes
+        num_parties = min(len(parties.names), 6)  # Limit to first 6 parties for display
+        party_width = 0.6 / num_parties  # Adjust width to fit more compactly
+        total_width = num_parties * party_width + (num_parties - 1) * padding  # Total width including padding
+        start_x = (1 - total_width) / 2  # Center the seat count boxes horizontally
+
+        self.seat_boxes = []
+        for i in range(num_parties):
+            party_x_pos = start_x + i * (party_width + padding) + party_width / 2
+
+            # Draw the party box
+            party_box = plt.Rectangle((party_x_pos - party_width / 2, seat_count_y_pos),
+                                      party_width, seat_count_height,
+                                      color='grey', ec='black',alpha=0.25)
+            ax.add_patch(party_box)
+
+            seats_text = ax.text(party_x_pos, seat_count_y_pos + seat_count_height / 2 + 0.0005,
+                                 '', fontsize=20, ha='center', va='center', color='black')
+
+            # Base vertical position for the main text
+            base_y = seat_count_y_pos + seat_count_height / 2 + 0.075
+
+            # Vertical offset for spacing between lines
+            offset = 0.03  # Adjust as needed for spacing
+
+            # Add text for short_pname
+            name_text = ax.text(
+                party_x_pos,
+                base_y + offset+0.02,  # Positioned at the top
+                '',
+                fontsize=16,
+                ha='center',
+                va='center',
+                color='black',
+                bbox=dict(facecolor='grey', edgecolor='black',
+                          boxstyle='round,pad=0.1')
+            )
+            # Add text for temp_vote
+            temp_vote_text = ax.text(party_x_pos, base_y,  # Positioned in the middle
+                                     '',
+                                     fontsize=12, ha='center', va='center', color='black')
+
+            # Define the y-positions for the texts
+            vote_text_y = base_y - offset
+
+            # Add text for total_vote_percent_formatted
+            percent_text = ax.text(
+                party_x_pos,
+                vote_text_y,  # Positioned at the bottom
+                '',
+                fontsize=16,
+                ha='center',
+                va='center',
+                color='black'
+            )
+
+            # Add a horizontal line directly under total_vote_percent_formatted text
+            line_y = vote_text_y - 0.02  # Adjust the value to control the distance between the text and the line
+            half_party_width = party_width / 2  # Half the width for symmetric positioning
+            ax.hlines(
+                y=line_y,
+                xmin=party_x_pos - half_party_width+0.005,
+                xmax=party_x_pos + half_party_width-0.005,
+                color='black',
+                linewidth=1
+            )
+
+            self.seat_boxes.append({
+                'box': party_box,
+                'seats_text': seats_text,
+                'name_text': name_text,
+                'temp_vote_text': temp_vote_text,
+                'percent_text': percent_text,
+            })
+
+        # Add background image last
+        background_high = ax.imshow(background_img, aspect='auto', extent=[0, 1, 0, 1], alpha=0.3)
+
+        # Remove the axis lines and labels
+        ax.axis('off')
+
+        # Set limits
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+
+        # Both backgrounds (drawn first, at zorder 0) and the progress bar track (nothing drawn before
+        # it overlaps it) look the same on every frame of every riding with this layout, so they are
+        # rendered once into a cached buffer. Everything else is drawn on top in the usual order.
+        self.static_artists = [background_low, background_high, progress_track]
+        self.layout_key = (num_candidates_to_display, num_parties, self.fig.bbox.bounds, id(background_img))
+        excluded = {ax.patch, ax.xaxis, ax.yaxis, *ax.spines.values(), *self.static_artists}
+        self.layer_artists = sorted((artist for artist in ax.get_children() if artist not in excluded),
+                                    key=lambda artist: artist.get_zorder())
+
+    def _static_layer(self, renderer):
+        static_layer = _static_layer_cache.get(self.layout_key)
+        if static_layer is not None:
+            static_layer = static_layer[1]
+        else:
+            visibility = [(artist, artist.get_visible()) for artist in self.layer_artists]
+            for artist, _ in visibility:
+                artist.set_visible(False)
+            self.fig.canvas.draw()
+            static_layer = np.array(renderer.buffer_rgba())
+            for artist, visible in visibility:
+                artist.set_visible(visible)
+            # Keep the background alive with its layer so its id cannot be reused by another image
+            _static_layer_cache[self.layout_key] = (self.background_img, static_layer)
+        return static_layer
+
+    def render(self):
+        """Draw the current state onto the cached static layer and return the RGBA canvas buffer."""
+        renderer = self.fig.canvas.get_renderer()
+        static_layer = self._static_layer(renderer)
+        pixels = np.asarray(renderer.buffer_rgba())
+        pixels[...] = static_layer
+        for artist in self.layer_artists:
+            artist.draw(renderer)
+        return pixels
+
+    def update(self, frame):
+        """Update every changing artist to show the given FrameState."""
+        riding = self.riding
+        width = self.width
+        num_candidates_to_display = self.num_candidates_to_display
+
+        # Sort candidates by vote count for the current step
+        sorted_indices = np.argsort(-frame.votes)
+        sorted_votes = frame.votes[sorted_indices]
+        sorted_names = np.array(riding['candidate_names'])[sorted_indices]
+        sorted_parties = np.array(riding['party_names'])[sorted_indices]
+        sorted_short_parties = np.array(riding['short_name'])[sorted_indices]
+        sorted_colors = np.array([self.party_colors[party] for party in sorted_parties])
+
+        total_votes_step = sorted_votes.sum()
+        # Set the initial font size; every frame starts fresh so frames can be rendered independently
+        name_font_size = 22
 
-                # Sort the combined_seat_counts dictionary by the combined value in descending order
-                sorted_combined_seat_counts = dict(
-                    sorted(combined_seat_counts.items(), key=lambda item: item[1], reverse=True)
-                )
+        # Find where the called winner sits in the sorted list
+        sorted_winning_index = None
+        if frame.called:
+            sorted_winning_index = np.where(sorted_indices == frame.winner_index)[0][0]
+
+        for j, card in enumerate(self.cards):
+            card['rect'].set_facecolor(sorted_colors[j])
+
+            # Load the candidate's photo (or the placeholder) from the shared cache; only swap it when it changes
+            photo = asset_cache.candidate_photo(sorted_names[j], card['photo_size'])
+            if card['photo_image'] is not photo:
+                card['photo'].set_data(photo)
+                card['photo_image'] = photo
+
+            # Define text margin based on rank
+            lead_margin = calculate_lead_margin(sorted_votes, j,num_candidates_to_display)
+
+            percentage_of_all = (sorted_votes[j] / total_votes_step) * 100 if total_votes_step > 0 else 0
+
+            # Prepare the text for the right side
+            text = f'{int(sorted_votes[j])}'
+
+            # Define the available width for the right side text
+            available_width_right = width / 2-0.02  # Right half of the box
+
+            # Reduce font size if text width exceeds available width; vote counts on a frame share the smallest size
+            name_font_size = fit_font_size(text, available_width_right, name_font_size, min_size=1)
+
+            card['votes_text'].set_text(text)
+            card['votes_text'].set_fontsize(name_font_size)
+
+            if lead_margin > 0:
+                card['lead_text'].set_text(f'{int(lead_margin)} \nlead')  # Append lead margin information if applicable
+            card['lead_text'].set_visible(lead_margin > 0)
+
+            for percent_text in card['percent_texts']:
+                percent_text.set_text(f'{percentage_of_all:.1f}%')
 
+            # Calculate the width of the progress bar based on percentage_of_all
+            card['progress_bar'].set_width((percentage_of_all / 100) * card['half_width'])
+            card['progress_bar'].set_color(sorted_colors[j])
 
-                # Print sorted seat counts (for debugging purposes)
-                print("Ohio Sorted Combined Seat Counts:", sorted_combined_seat_counts)
+            # Use sorted_names[j] as the message
+            message_text = sorted_names[j]  # Set the text to the name
 
+            # Set an initial font size for the message
+            initial_font_size = 22
+            minimum_font_size = 12  # Minimum font size to prevent excessive shrinking
+
+            # Dynamically adjust font size to fit within the box, only shrinking if the text is too wide
+            available_width = width - 0.04  # Leave a small margin
+            current_font_size = fit_font_size(message_text, available_width, initial_font_size, minimum_font_size)
 
+            card['name_text'].set_text(message_text)
+            card['name_text'].set_fontsize(current_font_size)
 
-                # Draw party seat counts
+            card['party_box'].set_facecolor(sorted_colors[j])
+            card['party_text'].set_text(f'{sorted_short_parties[j]}')
 
-                seat_count_y_pos = y_pos - 0.35  # Positioning for the seat counts row
-                seat_count_height = 0.3  # Height for the seat counts row
-                padding = 0.03  # Reduced padding between party boxes
-                num_parties = min(len(sorted_combined_seat_counts), 6)  # Limit to first 6 parties for display
-                party_width = 0.6 / num_parties  # Adjust width to fit more compactly
-                total_width = num_parties * party_width + (num_parties - 1) * padding  # Total width including padding
-                start_x = (1 - total_width) / 2  # Center the seat count boxes horizontally
-                for i, (party_name, count) in enumerate(
-                        list(sorted_combined_seat_counts.items())[:6]):  # Only take the first 6 parties
+            # Draw checkmark if the candidate is the winner and among the displayed candidates
+            show_checkmark = sorted_winning_index is not None and sorted_winning_index < self.max_displayed_candidates
+            if show_checkmark:
+                x_pos_check = self.start_x + (sorted_winning_index % self.num_displayed_columns) * (
+                            width + self.padding) + width / 2
+                y_pos_check = self.start_y + (sorted_winning_index // self.num_displayed_columns) * (
+                            0.35 + self.picture_height)
 
-                    temp_vote = next((party['temp_vote'] for party in all_parties if party['name'] == party_name), 0)
+                # Draw the checkmark closer to the right side of the candidate box
+                card['checkmark'].set_position((x_pos_check + width / 2 - 0.005, y_pos_check + 0.35))
+            card['checkmark'].set_visible(show_checkmark)
 
-                    # Ensure pop_vote is converted to an integer without decimals
-                    temp_vote = math.floor(temp_vote)  # Rounds down to nearest integer
-                    # Calculate the total temp_vote across all parties
-                    total_temp_vote = sum(party['temp_vote'] for party in all_parties)
+        # Calculate the progress percentage
+        progress = (frame.step / (self.num_steps - 1)) * 100
+        self.progress_bar.set_width((progress / 100) * 0.9)
+        self.progress_text.set_text(f'{progress:.1f}%')
 
-                    # Ensure total_temp_vote is converted to an integer without decimals
-                    total_temp_vote = math.floor(total_temp_vote)  # Rounds down to nearest integer
+        for seat_box, panel_entry in zip(self.seat_boxes, build_seat_panel(frame, self.parties)):
+            seat_box['box'].set_facecolor(panel_entry['color'])
+            seat_box['seats_text'].set_text(f'{panel_entry["seats"]}')
+            seat_box['name_text'].set_text(f'{panel_entry["short_pname"]}')
+            seat_box['name_text'].get_bbox_patch().set_facecolor(panel_entry['color'])
+            seat_box['temp_vote_text'].set_text(f'{panel_entry["temp_vote"]}')
+            seat_box['percent_text'].set_text(f'{panel_entry["vote_percent"]}')
 
-                    # Calculate the total temp_vote across all parties excluding 'Independent'
-                    noindytotal_temp_vote = sum(
-                        party['temp_vote'] for party in all_parties if party['name'] != 'Independent')
+    def snapshot(self):
+        """
+        Render the current state and return the RGBA image savefig(bbox_inches='tight') would write.
 
-                    # Ensure total_temp_vote is converted to an integer without decimals
-                    noindytotal_temp_vote = math.floor(total_temp_vote)  # Rounds down to nearest integer
+        The tight box is worked out once per layout. When it is the whole figure (the backgrounds
+        fill it and nothing overflows), the tight output is the canvas with a plain border of
+        savefig's padding, so the blitted buffer is used directly. Otherwise this falls back to a
+        full savefig.
+        """
+        pixels = self.render()
+        tight_padding = _tight_padding_cache.get(self.layout_key)
+        if tight_padding is None:
+            tight_bbox = self.fig.get_tightbbox(self.fig.canvas.get_renderer())
+            padding = plt.rcParams['savefig.pad_inches'] * self.fig.dpi
+            fills_figure = np.allclose(tight_bbox.bounds, self.fig.bbox_inches.bounds)
+            tight_padding = int(round(padding)) if fills_figure and float(padding).is_integer() else -1
+            _tight_padding_cache[self.layout_key] = tight_padding
 
-                    # Retrieve the party dictionary using party_name
-                    party_dict = next((party for party in all_parties if party['name'] == party_name), None)
+        if tight_padding < 0:
+            buffer = io.BytesIO()
+            self.fig.savefig(buffer, format='png', bbox_inches='tight')
+            buffer.seek(0)
+            return np.asarray(Image.open(buffer).convert('RGBA'))
 
-                    # Get the short_pname from the dictionary
-                    short_pname = party_dict['short_pname'] if party_dict else party_name
+        padding = tight_padding
+        height, width = pixels.shape[:2]
+        facecolor = np.round(np.array(to_rgba(self.fig.get_facecolor())) * 255).astype(np.uint8)
+        image = np.empty((height + 2 * padding, width + 2 * padding, 4), dtype=np.uint8)
+        image[...] = facecolor
+        image[padding:padding + height, padding:padding + width] = pixels
+        return image
 
-                    for party in all_parties:
-                        if party['name'] == party_name:
-                            party['seats'] = party_seat_counts[party['name']]
+    def write_png(self, image, filepath):
+        """Write an image from snapshot() as a PNG."""
+        mpimg.imsave(filepath, image, format='png', dpi=self.fig.dpi)
+
+    def save(self, filepath):
+        """Render the current state and write it as a PNG, matching savefig(bbox_inches='tight')."""
+        self.write_png(self.snapshot(), filepath)
+
+    def close(self):
+        self.fig.clear()
+
+
+def riding_key(riding_index, riding):
+    """Key of a riding's entries in the build manifest and checkpoint; names alone need not be unique."""
+    return f'{riding_index:02d}_{riding["name"]}'
+
+
+def step_png_path(output_dir, riding, step):
+    """Path of the PNG render_riding writes for one step of a riding."""
+    return os.path.join(output_dir, f'{riding["name"].replace(" ", "_")}_step_{step + 1:02}.png')
+
+
+def animation_path(output_dir, riding, animation_format):
+    """Path of the animation render_riding writes for a riding."""
+    return os.path.join(output_dir, f'{riding["name"].replace(" ", "_")}_animation{ANIMATION_EXTENSIONS[animation_format]}')
+
+
+def line_graph_path(output_dir, riding, riding_index, step=None):
+    """Path of a riding's line graph, or of its graph up to step."""
+    line_graph_name = f'line_graph_riding_{riding_index + 1:02}_{riding["name"].replace(" ", "_")}'
+    if step is not None:
+        line_graph_name = f'{line_graph_name}_step_{step + 1:02}'
+    return os.path.join(output_dir, f'{line_graph_name}.png')
+
+
+def draw_line_graph(riding, riding_index, parties, vote_totals, winner_step, output_dir, progressive_steps=None):
+    """
+    Draws the vote progression of every candidate in a riding over the whole count.
 
-                    if party_name != 'Independent' and total_temp_vote > 0:
-                        print("doctor ", seatsToProcess)
+    All candidates are drawn as one LineCollection. With progressive_steps, the same figure also
+    saves a graph of the count up to each of those steps by moving the clip edge of the lines,
+    keeping the axes of the finished graph so the images line up.
 
-                        seats_allocated = MMP_calculation(all_parties, seatsToProcess, seatsprocessed)
+    Parameters:
+    riding (dict): The riding's name, candidate_names and party_names.
+    riding_index (int): Position of the riding in the count, used in the file name.
+    parties (PartyTable): Names and colours of all parties.
+    vote_totals (ndarray): (steps x candidates) cumulative votes.
+    winner_step (int): The step the riding was called at, or None.
+    output_dir (str): The directory the image is written to.
+    progressive_steps (list): Steps to also save a partial graph for, or None for only the full graph.
+    """
+    party_colors = dict(zip(parties.names, parties.colors))
+    num_graphics = len(vote_totals)
+    num_candidates = min(len(riding['candidate_names']), 4)
+    increments = np.linspace(0, num_graphics, num=num_graphics)
+    candidate_colors = [party_colors[party_name] for party_name in riding['party_names']]
+
+    # Generate line graph
+    fig, ax = plt.subplots(figsize=(max(10, num_candidates * 2), 8))
+    ax.set_title(f'Vote Progression in {riding["name"]}')
+    ax.set_xlabel('Steps')
+    ax.set_ylabel('Votes')
+
+    # One (steps x 2) polyline per candidate
+    segments = [np.column_stack([increments, vote_totals[:, idx]]) for idx in range(len(riding['candidate_names']))]
+    lines = LineCollection(segments, colors=candidate_colors, linewidths=plt.rcParams['lines.linewidth'])
+    ax.add_collection(lines)
+    ax.autoscale_view()
+    handles = [Line2D([], [], color=color, label=candidate_name)
+               for candidate_name, color in zip(riding['candidate_names'], candidate_colors)]
+
+    # Draw a horizontal dotted line at the step where the winner is determined
+    winner_line = None
+    if winner_step is not None:
+        winner_line = ax.axvline(x=winner_step, color='red', linestyle='--', label='Winner Determined')
+        handles.append(winner_line)
+
+    ax.legend(handles=handles, loc='upper left')
+    ax.grid(True)
+
+    if progressive_steps is not None:
+        # Reveal the lines up to each step by clipping them, without re-plotting anything
+        x_min, x_max = ax.get_xlim()
+        y_min, y_max = ax.get_ylim()
+        ax.set_xlim(x_min, x_max)
+        ax.set_ylim(y_min, y_max)
+        clip_rect = patches.Rectangle((x_min, y_min), 0, y_max - y_min, transform=ax.transData)
+        for step in progressive_steps:
+            clip_rect.set_width(increments[step] - x_min)
+            lines.set_clip_path(clip_rect)
+            if winner_line is not None:
+                winner_line.set_visible(step >= winner_step)
+            fig.savefig(line_graph_path(output_dir, riding, riding_index, step))
+
+        lines.set_clip_path(ax.patch)
+        if winner_line is not None:
+            winner_line.set_visible(True)
+
+    fig.savefig(line_graph_path(output_dir, riding, riding_index))
+    plt.close(fig)
+
+
+def render_line_graph(task, output_dir):
+    """Draws a riding's line graph (and its per-step graphs, if asked for) from its precomputed votes."""
+    line_graph = task['line_graph']
+    if line_graph is None:
+        return
+    with profiler.stage('line_graph', task['riding']['name']):
+        draw_line_graph(task['riding'], line_graph['riding_index'], task['parties'], line_graph['vote_totals'],
+                        line_graph['winner_step'], output_dir, line_graph.get('progressive_steps'))
+
+
+def estimate_riding_cost(task):
+    """
+    Rough relative cost of rendering a riding, used to order work for the process pool.
 
-                        for party in all_parties:
-                            if party['name'] == party_name:
-                                party['seats'] = party_seat_counts[party['name']]
+    Every saved step pays for its candidate cards and seat panel.
+    """
+    per_frame = 4 * min(len(task['riding']['candidate_names']), 4) + min(len(task['parties'].names), 6)
+    return len(task['frames']) * per_frame
 
-                        for party in all_parties:
-                            if party['name'] in seats_allocated:
-                                party['seats_list'] = seats_allocated[party['name']]
-                            else:
-                                party['seats_list'] = 0  # Set to 0 if the party was not allocated any seats
 
-                party_listseat_counts = {party['name']: party['seats_list'] for party in all_parties}
-                party_fptp_counts = {party['name']: party['seats'] for party in
-                                     all_parties}  # Assuming you meant 'seats', not 'seats_list'
+def render_riding(task, background_img, output_dir, png_writer=None):
+    """
+    Draws and saves every selected step of one riding, as step PNGs and/or one animation.
 
-                combined_seat_counts = {
-                    party['name']: party_fptp_counts.get(party['name'], 0) + party_listseat_counts.get(party['name'], 0)
-                    for party in all_parties
-                }
+    The riding's figure is built once and updated between steps. Only the precomputed timeline
+    state is read, so ridings can be drawn in any order.
 
-                sorted_combined_seat_counts = dict(
-                    sorted(combined_seat_counts.items(), key=lambda item: item[1], reverse=True)
-                )
+    Parameters:
+    task (dict): The riding, the PartyTable ('parties'), the FrameStates to save ('frames'), the
+        data for its line graph ('line_graph', see render_line_graph, or None to skip it) and, optionally, what to write
+        ('output': 'step_pngs', 'animation_format' and 'frame_duration' in milliseconds).
+    background_img (ndarray): The decoded background image.
+    output_dir (str): The directory the images are written to.
+    png_writer (AsyncImageWriter): The writer shared by the run's ridings; the step PNGs may still be
+        queued when this returns. Without one, the riding gets a writer of its own and waits for it.
 
-                for i, (party_name, count) in enumerate(
-                        list(sorted_combined_seat_counts.items())[:6]):  # Only take the first 6 parties
+    Returns:
+    dict: Step -> the Future of its PNG write (None if no PNG was saved) for every step drawn without
+    an error, see steps_written.
+    """
+    riding = task['riding']
+    frames = task['frames']
+    if not frames:
+        return {}
+    logger.info(f'Starting processing for riding {riding["name"]}')
+
+    output = task.get('output', {})
+    save_step_pngs = output.get('step_pngs', True)
+    animation_format = output.get('animation_format')
+
+    with profiler.stage('figure_build', riding['name']):
+        riding_frame = RidingFrame(riding, task['parties'], frames[0].num_steps, background_img)
+    # PNGs are encoded and written on background threads while the next step is drawn
+    own_writer = png_writer is None and save_step_pngs
+    if own_writer:
+        png_writer = AsyncImageWriter()
+    animation = None
+    if animation_format:
+        # Frames go straight from the canvas to the encoder, one at a time
+        animation = AnimationWriter(animation_path(output_dir, riding, animation_format), animation_format, len(frames),
+                                    duration=output.get('frame_duration', 500))
+    drawn_steps = {}
+    try:
+        for frame in frames:
+            try:
+                with profiler.stage('draw', riding['name']), artist_profiler.frame(f'{riding["name"]} step {frame.step + 1}'):
+                    riding_frame.update(frame)
+                    image = riding_frame.snapshot()
 
-                    party_x_pos = start_x + i * (party_width + padding) + party_width / 2
+                # Save the figure
+                png_write = None
+                if save_step_pngs:
+                    png_write = png_writer.submit(image, step_png_path(output_dir, riding, frame.step),
+                                                  dpi=riding_frame.fig.dpi, riding=riding['name'])
+                if animation is not None:
+                    with profiler.stage('animation_encode', riding['name']):
+                        animation.add(image)
+                drawn_steps[frame.step] = png_write
+            except Exception as e:
+                logger.error(f"Error processing step {frame.step} for riding {riding['name']}: {e}")
+    finally:
+        if animation is not None:
+            animation.close()
+        if own_writer:
+            png_writer.close()
+        riding_frame.close()
+    return drawn_steps
 
-                    # Draw the party box
-                    party_box = plt.Rectangle((party_x_pos - party_width / 2, seat_count_y_pos),
-                                              party_width, seat_count_height,
-                                              color=party_colors.get(party_name, 'grey'),
-                                              ec='black',alpha=0.25)  # Use 'grey' if color not found
-                    ax.add_patch(party_box)
 
-                    temp_vote = next((party['temp_vote'] for party in all_parties if party['name'] == party_name), 0)
+def steps_written(drawn_steps):
+    """
+    Wait for a riding's step PNGs and return the steps that were drawn and written without an error.
 
-                    # Ensure pop_vote is converted to an integer without decimals
-                    temp_vote = math.floor(temp_vote)  # Rounds down to nearest integer
-                    # Calculate the total temp_vote across all parties
-                    total_temp_vote = sum(party['temp_vote'] for party in all_parties)
-
-                    # Ensure total_temp_vote is converted to an integer without decimals
-                    total_temp_vote = math.floor(total_temp_vote)  # Rounds down to nearest integer
-
-                    # Calculate the total temp_vote across all parties excluding 'Independent'
-                    noindytotal_temp_vote = sum(party['temp_vote'] for party in all_parties if party['name'] != 'Independent')
-
-                    # Ensure total_temp_vote is converted to an integer without decimals
-                    noindytotal_temp_vote = math.floor(total_temp_vote)  # Rounds down to nearest integer
-
-                    # Retrieve the party dictionary using party_name
-                    party_dict = next((party for party in all_parties if party['name'] == party_name), None)
-
-
-                    # Get the short_pname from the dictionary
-                    short_pname = party_dict['short_pname'] if party_dict else party_name
-
-                    # Calculate total_vote_percent only if total_temp_vote is greater than 0
-                    if total_temp_vote > 0:
-                        total_vote_percent = (temp_vote / total_temp_vote) * 100
-                    else:
-                        total_vote_percent = 0
-                    total_vote_percent_formatted = f'{total_vote_percent:.1f}%'
-
-                    # National vote seat allocation
-
-                    if party_name != 'Independent' and total_temp_vote > 0:
-                        print("doctor ",seatsToProcess)
-                        seats_allocated = MMP_calculation(all_parties, seatsToProcess, seatsprocessed)
-                        for party in all_parties:
-                            print("bad wolf", party_seat_counts[party['name']])
-                            if party['name'] == party_name:
-                                party['seats'] = party_seat_counts[party['name']]
-
-                        for party in all_parties:
-                            if party['name'] in seats_allocated:
-                                party['seats_list'] = seats_allocated[party['name']]
-                            else:
-                                party['seats_list'] = 0  # Set to 0 if the party was not allocated any seats
-
-                        # Use `seats_allocated` for drawing the seat count text
-                        print(all_parties,"tyler")
-
-
-                        ax.text(party_x_pos, seat_count_y_pos + seat_count_height / 2 + 0.0005,
-                                f'{int(seats_allocated.get(party_name, 0))+party_seat_counts.get(party_name,0)}', fontsize=20, ha='center', va='center',
-                                color='black')
-
-                    else:
-                        ax.text(party_x_pos, seat_count_y_pos + seat_count_height / 2 + 0.0005,
-                                f'{int(count)}', fontsize=20, ha='center', va='center', color='black')
-
-
-
-                    # Set the position and text for the label
-                    # Format the text to be displayed
-                    # Main text with fontsize 16
-                    # Base vertical position for the main text
-                    base_y = seat_count_y_pos + seat_count_height / 2 + 0.075
-
-                    # Vertical offset for spacing between lines
-                    offset = 0.03  # Adjust as needed for spacing
-
-                    # Add text for short_pname
-                    ax.text(
-                        party_x_pos,
-                        base_y + offset+0.02,  # Positioned at the top
-                        f'{short_pname}',
-                        fontsize=16,
-                        ha='center',
-                        va='center',
-                        color='black',
-                        bbox=dict(facecolor=party_colors.get(party_name, 'grey'), edgecolor='black',
-                                  boxstyle='round,pad=0.1')
-                    )
-                    # Add text for temp_vote
-                    ax.text(party_x_pos, base_y,  # Positioned in the middle
-                            f'{temp_vote}',
-                            fontsize=12, ha='center', va='center', color='black')
-
-                    # Define the y-positions for the texts
-                    vote_text_y = base_y - offset
-
-                    # Add text for total_vote_percent_formatted
-                    ax.text(
-                        party_x_pos,
-                        vote_text_y,  # Positioned at the bottom
-                        f'{total_vote_percent_formatted}',
-                        fontsize=16,
-                        ha='center',
-                        va='center',
-                        color='black'
-                    )
-
-                    # Add a horizontal line directly under total_vote_percent_formatted text
-                    line_y = vote_text_y - 0.02  # Adjust the value to control the distance between the text and the line
-                    half_party_width = party_width / 2  # Half the width for symmetric positioning
-                    ax.hlines(
-                        y=line_y,
-                        xmin=party_x_pos - half_party_width+0.005,
-                        xmax=party_x_pos + half_party_width-0.005,
-                        color='black',
-                        linewidth=1
-                    )
-
-                # Add background image last
-                ax.imshow(background_img, aspect='auto', extent=[0, 1, 0, 1], alpha=0.3)
-
-                # Remove the axis lines and labels
-                ax.axis('off')
-
-                # Set limits
-                ax.set_xlim(0, 1)
-                ax.set_ylim(0, 1)
+    Args:
+    drawn_steps (dict): What render_riding returned.
+    """
+    # Steps whose PNG failed to encode or write are not done either
+    return [step for step, png_write in drawn_steps.items() if png_write is None or png_write.result()]
 
-                # Save the figure
-                filename = f'{riding["name"].replace(" ", "_")}_step_{step + 1:02}.png'
-                filepath = os.path.join(output_dir, filename)
-                plt.savefig(filepath, bbox_inches='tight')
-                plt.close()
 
-                # Generate line graph
-                fig, ax = plt.subplots(figsize=(max(10, num_candidates * 2), 8))
-                ax.set_title(f'Vote Progression in {riding["name"]}')
-                ax.set_xlabel('Steps')
-                ax.set_ylabel('Votes')
+def _steps_pending(drawn_steps):
+    return any(png_write is not None and not png_write.done() for png_write in drawn_steps.values())
 
-                for idx, candidate_name in enumerate(riding['candidate_names']):
-                    ax.plot(increments, vote_totals_by_riding[r][:, idx], label=candidate_name,
-                            color=party_colors[riding['party_names'][idx]])
 
-                # Draw a horizontal dotted line at the step where the winner is determined
-                if winner_determined_steps[r] is not None:
-                    winner_step = winner_determined_steps[r]
-                    ax.axvline(x=winner_step, color='red', linestyle='--', label='Winner Determined')
+_worker_background_img = None
+_worker_png_writer = None
 
-                ax.legend(loc='upper left')
-                plt.grid(True)
 
-                line_graph_filename = f'line_graph_riding_{r + 1:02}_{riding["name"].replace(" ", "_")}.png'
-                line_graph_filepath = os.path.join(output_dir, line_graph_filename)
-                plt.savefig(line_graph_filepath)
-                plt.close()
+def _init_render_worker(background_path, profile=False, profile_artists=False):
+    # Each worker process decodes the background once, renders off-screen and keeps one PNG writer
+    global _worker_background_img, _worker_png_writer
+    plt.switch_backend('Agg')
+    profiler.enabled = profile
+    if profile_artists:
+        artist_profiler.install()
+    _worker_background_img = asset_cache.image(background_path)
+    _worker_png_writer = AsyncImageWriter()
 
 
+def _render_riding_in_worker(task, output_dir):
+    # Timings are sent back with the result so the parent can report on every process
+    result = None
+    try:
+        drawn_steps = render_riding(task, _worker_background_img, output_dir, _worker_png_writer)
+        # The parent records the steps as done, so their PNGs must be on disk first; the other
+        # workers keep drawing meanwhile
+        result = steps_written(drawn_steps), os.getpid(), _worker_png_writer.stats()
+    except Exception as e:
+        logger.error(f"Error processing riding {task['riding']['name']}: {e}")
+    return result, profiler.drain(), artist_profiler.drain()
 
-            except Exception as e:
 
-                print(f"Error processing step {step} for riding {riding['name']}: {e}")
-        votes_by_riding = vote_totals_by_riding[r][step]  # e.g., [5000, 3000, 2000, 500]
-        parties_by_riding = riding[
-                    'party_names']  # e.g., ['Liberal Party of Canada', 'Conservative Party of Canada', ...]
-                # 2. After processing the whole riding, finalize the frozentotal (pop_vote)
-        finalize_riding_votes(votes_by_riding, parties_by_riding, all_parties)
-        seatsprocessed = seatsprocessed + 1
+def _render_line_graph_in_worker(task, output_dir):
+    done = False
+    try:
+        render_line_graph(task, output_dir)
+        done = True
+    except Exception as e:
+        logger.error(f"Error drawing line graph for riding {task['riding']['name']}: {e}")
+    return done, profiler.drain()
 
 
-                # Now print the final updated pop_vote after finalizing
-        for party in all_parties:
-            print(f"{party['name']} - Total Votes (pop_vote): {party['pop_vote']}")
+def render_ridings(tasks, output_dir, background_path, jobs=1, on_riding_done=None, on_line_graph_done=None):
+    """
+    Renders every riding's frames, then every riding's line graph, either in this process or
+    spread over a process pool.
 
-        print(f'Completed all graphics for riding {riding["short_name"]} with final results: {riding["final_results"]}')
+    Ridings are independent of each other, so the images written with jobs > 1 are identical to a
+    serial run. Each process keeps one PNG writer for all of its ridings. Work is handed out most
+    expensive riding first so that ridings with many candidates start early and do not leave the
+    other workers idle at the end of the batch.
 
+    Parameters:
+    tasks (list): Riding tasks built from the election timeline, see render_riding.
+    output_dir (str): The directory the images are written to.
+    background_path (str): Path to the background image.
+    jobs (int): Number of worker processes; 1 renders serially.
+    on_riding_done (callable): Called in this process with (task, written_steps) once each riding's
+        frames are drawn and their PNGs written, e.g. to write a checkpoint.
+    on_line_graph_done (callable): Called with the task as each line graph is written.
+    """
+    if jobs <= 1:
+        background_img = asset_cache.image(background_path)
+        # One writer for the run, so a riding's last PNGs are encoded while the next one is drawn
+        png_writer = AsyncImageWriter()
+        unreported = []  # (task, drawn steps) of ridings whose PNGs may still be queued
+
+        def report_written(wait=False):
+            # A riding is reported once all of its PNGs are written
+            for entry in list(unreported):
+                task, drawn_steps = entry
+                if wait or not _steps_pending(drawn_steps):
+                    unreported.remove(entry)
+                    if on_riding_done is not None:
+                        on_riding_done(task, steps_written(drawn_steps))
+
+        try:
+            for task in tasks:
+                try:
+                    unreported.append((task, render_riding(task, background_img, output_dir, png_writer)))
+                except Exception as e:
+                    logger.error(f"Error processing riding {task['riding']['name']}: {e}")
+                report_written()
+            for task in tasks:
+                try:
+                    render_line_graph(task, output_dir)
+                except Exception as e:
+                    logger.error(f"Error drawing line graph for riding {task['riding']['name']}: {e}")
+                    continue
+                if on_line_graph_done is not None and task['line_graph'] is not None:
+                    on_line_graph_done(task)
+                report_written()
+        finally:
+            # Ridings whose PNGs were written are reported however the run stops, so a resumed run
+            # does not draw them again
+            png_writer.close()
+            report_written(wait=True)
+        logger.info(f"PNG writer: {combine_writer_stats([png_writer.stats()])}")
+        return
+
+    writer_stats = {}  # Worker process -> its writer's stats so far
+
+    # Longest-processing-time-first scheduling over ridings
+    ordered_tasks = sorted(tasks, key=estimate_riding_cost, reverse=True)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                             initargs=(background_path, profiler.enabled, artist_profiler.installed)) as executor:
+        riding_futures = {executor.submit(_render_riding_in_worker, task, output_dir): task for task in ordered_tasks}
+        # Line graphs are one figure each, so they fill in behind the frames
+        line_graph_futures = {executor.submit(_render_line_graph_in_worker, task, output_dir): task
+                              for task in tasks if task['line_graph'] is not None}
+        # Results are handled as they arrive, so progress is recorded even if a later riding fails
+        for future in as_completed(list(riding_futures) + list(line_graph_futures)):
+            if future in riding_futures:
+                result, timings, artist_frames = future.result()
+                profiler.extend(timings)
+                artist_profiler.extend(artist_frames)
+                if result is not None:
+                    written_steps, pid, worker_writer_stats = result
+                    writer_stats[pid] = worker_writer_stats
+                    if on_riding_done is not None:
+                        on_riding_done(riding_futures[future], written_steps)
+            else:
+                done, timings = future.result()
+                profiler.extend(timings)
+                if done and on_line_graph_done is not None:
+                    on_line_graph_done(line_graph_futures[future])
+    logger.info(f"PNG writer: {combine_writer_stats(list(writer_stats.values()))}")
+
+
+def skip_fresh_ridings(manifest, tasks, ridings, vote_totals_by_riding, render_inputs, output_dir):
+    """
+    Drop the frames and line graphs whose outputs are already up to date from the riding tasks.
 
-        # Update the 'seats_list' field in all_parties based on the seat allocation
-        for party in all_parties:
-            if party['name'] in seats_allocated:
-                party['seats_list'] = seats_allocated[party['name']]
+    A riding's frames are hashed together with every riding counted before it, since the seat
+    panel shows the national count so far: a change to riding k makes the frames of riding k and
+    of every later riding stale, and leaves the earlier ones alone. A line graph only depends on
+    its own riding.
 
+    Parameters:
+    manifest (BuildManifest): What the outputs were last built from.
+    tasks (list): Riding tasks, see render_riding; fresh ones get no frames and no line graph.
+    ridings (list): The ridings in the order they are counted.
+    vote_totals_by_riding (list): The simulated count of each riding.
+    render_inputs (dict): Everything else every frame depends on (parties, seats, steps, output settings...).
+    output_dir (str): The directory the images are written to.
 
-            riding_name = riding['name']
-            file_path = f'irlriding/{riding_name}.txt'
-            input_svg = f'svg/{riding_name}.svg'
-            output_dir = f'output_images'
-            party_names=riding['short_name']  # Assuming this is a list of party short names
-            pop_votes=riding['final_results']  # Flatten the list of final results
+    Returns:
+    list: (key, digest, outputs) for everything left to render, to record once it is written.
+    """
+    pending = []
+    count_digest = hash_inputs(render_inputs)
+    for r, (task, riding, vote_totals) in enumerate(zip(tasks, ridings, vote_totals_by_riding)):
+        count_digest = hash_inputs(count_digest, riding, vote_totals)
+        photos = [file_digest(asset_cache.photo_path(name)) for name in riding['candidate_names']]
+        frames_digest = hash_inputs(count_digest, photos)
+        output = task['output']
+        frame_outputs = []
+        if output['step_pngs']:
+            frame_outputs += [step_png_path(output_dir, riding, frame.step) for frame in task['frames']]
+        if output['animation_format']:
+            frame_outputs.append(animation_path(output_dir, riding, output['animation_format']))
+        key = f'frames/{riding_key(r, riding)}'
+        if manifest.is_fresh(key, frames_digest):
+            task['frames'] = []
+        else:
+            pending.append((key, frames_digest, frame_outputs))
+
+        line_graph = task['line_graph']
+        line_graph_digest = hash_inputs(render_inputs['parties'], r, riding, vote_totals, line_graph['winner_step'],
+                                        line_graph['progressive_steps'])
+        line_graph_outputs = [line_graph_path(output_dir, riding, r)]
+        line_graph_outputs += [line_graph_path(output_dir, riding, r, step) for step in line_graph['progressive_steps'] or []]
+        key = f'line_graph/{riding_key(r, riding)}'
+        if manifest.is_fresh(key, line_graph_digest):
+            task['line_graph'] = None
+        else:
+            pending.append((key, line_graph_digest, line_graph_outputs))
+    return pending
+
+
+def riding_tallies(timeline, riding_index):
+    """The party votes and seat allocation once a riding is fully counted, as saved in checkpoints."""
+    return {
+        name: {
+            'votes': float(timeline.temp_votes[riding_index, -1, p]),
+            'seats': int(timeline.fptp_seats[riding_index, -1, p]),
+            'list_seats': int(timeline.list_seats[riding_index, -1, p]),
+        }
+        for p, name in enumerate(timeline.parties.names)
+    }
+
+
+def build_national_maps(ridings, output_dir, map_projections, manifest=None, run_checkpoint=None):
+    """
+    Assemble the regional maps of every projection into national maps, unless they are up to date.
 
-            # Ensure pop_votes is a list of integers or floats
-            pop_votes = [float(vote) for vote in pop_votes]
+    Args:
+    ridings (list): The regions, in the order they are laid out.
+    output_dir (str): Where the regional maps were written.
+    map_projections (tuple): The projections the regional maps were drawn for.
+    manifest (BuildManifest): Skips the national maps if no regional map changed, when given.
+    run_checkpoint (RunCheckpoint): Skips the national maps if the interrupted run built them, when given.
+    """
+    regions = [riding['name'] for riding in ridings]
+    if manifest is not None:
+        national_digest = hash_inputs(regions, [file_digest(path) for projection in map_projections for region in regions
+                                                for path in map_output_paths(output_dir, region, projection)])
+        if manifest.is_fresh('national_map', national_digest):
+            return
+    if run_checkpoint is not None and run_checkpoint.is_done('national_map'):
+        return
+    with profiler.stage('national_map'):
+        for projection in map_projections:
+            build_national_map(regions, output_dir, projection)
+    if manifest is not None:
+        manifest.record('national_map', national_digest, [path for projection in map_projections
+                                                          for path in national_output_paths(output_dir, projection)])
+    if run_checkpoint is not None:
+        run_checkpoint.mark_done('national_map')
+        run_checkpoint.save()
+
+
+class RunOptions(NamedTuple):
+    """
+    How generate_individual_graphics carries out a run; every field has a default.
+
+    jobs > 1 renders the frames on that many worker processes; on platforms that spawn workers the
+    calling script needs an ``if __name__ == '__main__':`` guard. A seed gives the same counts and
+    selected steps on every run. With step_selection='random' every riding saves the same
+    num_selected_steps steps, the first and last plus random ones; with 'story' each riding saves
+    its first and last steps, every lead change and the step it is called at, and fills the rest
+    of num_selected_steps evenly. With incremental=True only the outputs whose inputs (riding
+    results, parties, seed, selected steps, photos, template SVGs...) changed since the hashes in
+    build_manifest are rebuilt. Progress is saved to checkpoint after every riding; resume=True
+    replays the same count and carries on from the first unfinished work of an interrupted run
+    with the same inputs, without drawing the finished frames again.
+    """
+    jobs: int = 1  # Worker processes rendering frames; 1 renders serially
+    seed: Optional[int] = None  # Seed for the count and the selected steps
+    call_threshold: float = 0.4  # Share of the remaining votes the runner-up would need before a riding is called
+    step_selection: str = 'random'  # Which steps are saved, one of STEP_SELECTIONS
+    progressive_line_graphs: bool = False  # Also save each riding's line graph up to every selected step
+    animation_format: Optional[str] = None  # Also write each riding as one animation, one of ANIMATION_FORMATS
+    save_step_pngs: bool = True  # Write a PNG of every selected step
+    frame_duration: int = 500  # Milliseconds per step of an animation
+    map_projections: tuple = (0,)  # Historical years (0 the most recent) the maps are projected from, and/or BLEND
+    national_map: bool = False  # Also assemble the regional maps into a national map and merged results
+    incremental: bool = False  # Only rebuild outputs whose inputs changed since build_manifest
+    build_manifest: str = 'output_images/build_manifest.json'
+    checkpoint: Optional[str] = 'output_images/checkpoint.json'  # Where progress is saved, None to turn it off
+    resume: bool = False  # Carry on from the checkpoint of an interrupted run
+    profile: bool = False  # Time every stage per riding and write profile_report
+    profile_report: str = 'output_images/profile.json'
+    profile_artists: bool = False  # Count and time every artist draw and write artist_report
+    artist_report: str = 'output_images/artist_profile.json'
+
+
+def generate_individual_graphics(ridings, all_parties, num_graphics, num_selected_steps,seatsToProcess,byelection,
+                                 options=None):
+    """
+    Generates the step images, line graphs, maps and list graphics for a whole election.
 
-            # After the loop, call mapmaker_main with the collected data
-            mapmaker_main(file_path, input_svg, output_dir, party_names, pop_votes,riding_name)
+    The count is simulated first into an ElectionTimeline, then every frame is rendered from it.
+    How the run is carried out (worker processes, seed, which frames and outputs, profiling,
+    incremental builds and checkpoints...) is set by options, see RunOptions; the defaults render
+    every riding serially with a random count.
+    """
+    options = options or RunOptions()
+    if options.animation_format is not None and options.animation_format not in ANIMATION_FORMATS:
+        raise ValueError(f"animation_format must be one of {ANIMATION_FORMATS}, not {options.animation_format!r}")
+    if options.step_selection not in STEP_SELECTIONS:
+        raise ValueError(f"step_selection must be one of {STEP_SELECTIONS}, not {options.step_selection!r}")
+    profiler.enabled = options.profile
+    profiler.reset()
+    artist_profiler.reset()
+    if options.profile_artists:
+        artist_profiler.install()
 
-        print('Processed all ridings for all steps')
-        for party in all_parties:
-            print(f"Name: {party.get('name')}")
-            print(f"Short Name: {party.get('short_pname')}")
-            print(f"Color: {party.get('color')}")
-            print(f"Seats: {party.get('seats')}")
-            print(f"Seat Hold: {party.get('seats_list')}")
-            print(f"Popular Vote: {party.get('pop_vote')}")
-            print(f"Temporary Vote: {party.get('temp_vote')}")
-            print("-" * 20)
-    print('end')
-    listcreation()
+    sorted_ridings = ridings  # Keep the original order from the spreadsheet
+    rng = np.random.default_rng(options.seed)
+
+    run_checkpoint = None
+    if options.checkpoint is not None:
+        run_digest = hash_inputs(sorted_ridings, all_parties, num_graphics, num_selected_steps, seatsToProcess, byelection,
+                                 options.seed, options.call_threshold, options.progressive_line_graphs,
+                                 options.animation_format, options.save_step_pngs, options.frame_duration,
+                                 options.step_selection, list(options.map_projections), options.national_map)
+        if options.resume:
+            run_checkpoint = RunCheckpoint.load(options.checkpoint, run_digest)
+        if run_checkpoint is not None:
+            # Replay the count the interrupted run simulated
+            rng.bit_generator.state = run_checkpoint.rng_state
+            logger.info(f"Resuming from {options.checkpoint}")
+        else:
+            run_checkpoint = RunCheckpoint(options.checkpoint, run_digest, rng.bit_generator.state)
+
+    with profiler.stage('simulation'):
+        # Generate the vote totals for every candidate in every riding at once
+        vote_progressions = generate_vote_progressions([riding['final_results'] for riding in sorted_ridings],
+                                                       num_graphics, rng)
+        vote_totals_by_riding = [vote_progressions[r, :, :len(riding['final_results'])]
+                                 for r, riding in enumerate(sorted_ridings)]
+
+        # Always include the first and last step; story steps are picked per riding once the count is known
+        selected_steps = select_steps(num_graphics, num_selected_steps, rng) if options.step_selection == 'random' else None
 
+    # Check if output directory exists; if not, create it
+    output_dir = 'output_images'
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
 
+    # Snapshot what the count starts from before apply_final_state writes the results back
+    starting_parties = [dict(party) for party in all_parties]
+    manifest = BuildManifest(options.build_manifest) if options.incremental else None
+    if manifest is not None and options.seed is None:
+        logger.warning('Incremental builds need a seed; without one every count is new and everything is rebuilt')
+
+    # Run the whole count before drawing anything
+    timeline = ElectionTimeline(sorted_ridings, all_parties, vote_totals_by_riding, seatsToProcess, options.call_threshold)
+    if run_checkpoint is not None:
+        # The replayed count has to end each finished riding with the tallies that were saved
+        for r, riding in enumerate(sorted_ridings):
+            tallies = run_checkpoint.tallies.get(riding_key(r, riding))
+            if tallies is not None and tallies != riding_tallies(timeline, r):
+                logger.warning(f"The count no longer matches {options.checkpoint}; starting over")
+                run_checkpoint = RunCheckpoint(options.checkpoint, run_checkpoint.run_digest, run_checkpoint.rng_state)
+                break
+
+    if options.step_selection == 'story':
+        steps_by_riding = [select_story_steps(timeline.leaders[r], timeline.call_steps[r], num_graphics, num_selected_steps)
+                           for r in range(len(sorted_ridings))]
+        logger.info(f"Story steps: {sum(map(len, steps_by_riding))} frames for {len(sorted_ridings)} ridings")
+    else:
+        steps_by_riding = [selected_steps] * len(sorted_ridings)
 
+    # Generate a separate image for each selected step for each riding
+    tasks = []
+    for r, riding in enumerate(sorted_ridings):
+        tasks.append({
+            'riding': {key: riding[key] for key in ('name', 'candidate_names', 'party_names', 'short_name')},
+            'riding_index': r,
+            'parties': timeline.parties,
+            'frames': [timeline.frame(r, step) for step in steps_by_riding[r]],
+            'line_graph': {
+                'riding_index': r,
+                'vote_totals': timeline.votes[r],
+                'winner_step': timeline.call_steps[r] if timeline.call_steps[r] >= 0 else None,
+                'progressive_steps': list(steps_by_riding[r]) if options.progressive_line_graphs else None,
+            },
+            'output': {
+                'step_pngs': options.save_step_pngs,
+                'animation_format': options.animation_format,
+                'frame_duration': options.frame_duration,
+            },
+        })
+    background_path = 'Required_Images/background.jpg'
+    pending = []
+    if manifest is not None:
+        render_inputs = {
+            'parties': starting_parties,
+            'seats': seatsToProcess,
+            'call_threshold': options.call_threshold,
+            'num_graphics': num_graphics,
+            'step_selection': options.step_selection,
+            'selected_steps': selected_steps,
+            'output': tasks[0]['output'] if tasks else None,
+            'background': file_digest(background_path),
+        }
+        pending = skip_fresh_ridings(manifest, tasks, sorted_ridings, vote_totals_by_riding, render_inputs, output_dir)
+
+    riding_done = line_graph_done = None
+    if run_checkpoint is not None:
+        for task in tasks:
+            key = riding_key(task['riding_index'], task['riding'])
+            written = run_checkpoint.frames_written(key)
+            remaining = [frame for frame in task['frames'] if frame.step not in written]
+            # An animation needs every frame, so a riding with any frame missing is drawn again in full
+            if not remaining or options.animation_format is None:
+                task['frames'] = remaining
+            if run_checkpoint.is_done('line_graph', key):
+                task['line_graph'] = None
+        run_checkpoint.save()
+
+        def riding_done(task, written_steps):
+            run_checkpoint.record_riding(riding_key(task['riding_index'], task['riding']), written_steps,
+                                         riding_tallies(timeline, task['riding_index']))
+            run_checkpoint.save()
+
+        def line_graph_done(task):
+            run_checkpoint.mark_done('line_graph', riding_key(task['riding_index'], task['riding']))
+            run_checkpoint.save()
+    render_ridings(tasks, output_dir, background_path, jobs=options.jobs, on_riding_done=riding_done,
+                   on_line_graph_done=line_graph_done)
+    if manifest is not None:
+        for key, digest, outputs in pending:
+            manifest.record(key, digest, outputs)
+        manifest.save()
+
+    timeline.apply_final_state(all_parties)
+
+    map_times = {}
+    for r, riding in enumerate(sorted_ridings):
+        logger.info(f'Completed all graphics for riding {riding["short_name"]} with final results: {riding["final_results"]}')
+
+        map_key = f'map/{riding_key(r, riding)}'
+        if manifest is not None:
+            map_digest = hash_inputs(riding['short_name'], riding['final_results'],
+                                     file_digest(f'irlriding/{riding["name"]}.txt'), file_digest(f'svg/{riding["name"]}.svg'),
+                                     list(options.map_projections))
+            if manifest.is_fresh(map_key, map_digest):
+                continue
+        if run_checkpoint is not None and run_checkpoint.is_done('map', riding_key(r, riding)):
+            continue
+
+        # Each region's map is built once, from its final results
+        riding_name = riding['name']
+        file_path = f'irlriding/{riding_name}.txt'
+        input_svg = f'svg/{riding_name}.svg'
+        party_names = riding['short_name']
+        pop_votes = [float(vote) for vote in riding['final_results']]
+        map_start = time.perf_counter()
+        with profiler.stage('map_generation', riding_name):
+            mapmaker_main(file_path, input_svg, output_dir, party_names, pop_votes, riding_name, options.map_projections)
+        map_times[riding_name] = time.perf_counter() - map_start
+        logger.info(f"Map for {riding_name} built in {map_times[riding_name]:.2f}s")
+        if manifest is not None:
+            manifest.record(map_key, map_digest, [path for projection in options.map_projections
+                                                  for path in map_output_paths(output_dir, riding_name, projection)])
+        if run_checkpoint is not None:
+            run_checkpoint.mark_done('map', riding_key(r, riding))
+            run_checkpoint.save()
+    logger.debug('Processed all ridings for all steps')
+    for party in all_parties:
+        logger.debug(f"Name: {party.get('name')}")
+        logger.debug(f"Short Name: {party.get('short_pname')}")
+        logger.debug(f"Color: {party.get('color')}")
+        logger.debug(f"Seats: {party.get('seats')}")
+        logger.debug(f"Seat Hold: {party.get('seats_list')}")
+        logger.debug(f"Popular Vote: {party.get('pop_vote')}")
+        logger.debug(f"Temporary Vote: {party.get('temp_vote')}")
+        logger.debug("-" * 20)
+    if map_times:
+        logger.info(f"Built {len(map_times)} maps in {sum(map_times.values()):.2f}s, slowest "
+                    f"{max(map_times, key=map_times.get)} ({max(map_times.values()):.2f}s)")
+    if options.national_map:
+        build_national_maps(sorted_ridings, output_dir, options.map_projections, manifest, run_checkpoint)
+    logger.info('end')
+    lists_fresh = False
+    if manifest is not None:
+        # The list graphics show the final seats, so they depend on the whole election
+        list_names = [name for party in party_listcandidates for name in party['list_names']]
+        lists_digest = hash_inputs(all_parties, sorted_ridings, party_listcandidates,
+                                   [file_digest(asset_cache.photo_path(name)) for name in list_names])
+        lists_fresh = manifest.is_fresh('lists', lists_digest)
+    if run_checkpoint is not None and run_checkpoint.is_done('lists'):
+        lists_fresh = True
+    if not lists_fresh:
+        with profiler.stage('list_graphics'):
+            listcreation()
+        if manifest is not None:
+            manifest.record('lists', lists_digest, [os.path.join('party_graphics', f"{party['party_name'][0].replace(' ', '_')}.jpg")
+                                                    for party in party_listcandidates])
+        if run_checkpoint is not None:
+            run_checkpoint.mark_done('lists')
+            run_checkpoint.save()
+    logger.info(f"Image cache: {asset_cache.stats()}")
+    if manifest is not None:
+        manifest.save()
+        logger.info(f"Build manifest: {manifest.stats()}")
+
+    if options.profile:
+        profiler.write_json(options.profile_report)
+        logger.info(f"Stage timings:\n{profiler.summary()}")
+        logger.info(f"Profile report written to {options.profile_report}")
+    if options.profile_artists:
+        artist_profiler.write_json(options.artist_report)
+        artist_profiler.uninstall()
+        logger.info(f"Artist draws:\n{artist_profiler.summary()}")
+        logger.info(f"Artist draw report written to {options.artist_report}")
+
+
+def main(argv=None):
+    """Generate the graphics for the election in the inputs package."""
+    parser = argparse.ArgumentParser(description='Generate the graphics for the election in the inputs package.')
+    parser.add_argument('--seats', type=int, required=True, help='Number of seats in the election.')
+    parser.add_argument('--steps', type=int, default=40, help='Number of steps in each riding\'s count.')
+    parser.add_argument('--selected-steps', type=int, default=5, help='Number of images saved per riding.')
+    parser.add_argument('--byelection', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes rendering frames.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible counts.')
+    parser.add_argument('--story-frames', action='store_true',
+                        help='Save each riding\'s lead changes and call instead of random steps.')
+    parser.add_argument('--animation', choices=ANIMATION_FORMATS, default=None, help='Also write each riding as an animation.')
+    parser.add_argument('--all-map-years', action='store_true',
+                        help='Project each regional map from every historical year and their blend, not just the latest.')
+    parser.add_argument('--national-map', action='store_true',
+                        help='Also assemble the regional maps into one national map and results file.')
+    parser.add_argument('--incremental', action='store_true', help='Only rebuild outputs whose inputs changed.')
+    parser.add_argument('--checkpoint', default='output_images/checkpoint.json', help='Where progress is saved.')
+    parser.add_argument('--resume', action='store_true', help='Carry on from the checkpoint of an interrupted run.')
+    parser.add_argument('--log-level', default='INFO', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+                        help='Least severe messages logged.')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format='%(levelname)s %(name)s: %(message)s')
+
+    from inputs.party_data import all_parties
+    from inputs.vote_data import ridings
+    options = RunOptions(
+        jobs=args.jobs,
+        seed=args.seed,
+        step_selection='story' if args.story_frames else 'random',
+        animation_format=args.animation,
+        map_projections=(0, 1, 2, BLEND) if args.all_map_years else (0,),
+        national_map=args.national_map,
+        incremental=args.incremental,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+    )
+    generate_individual_graphics(ridings, all_parties, args.steps, args.selected_steps, args.seats, args.byelection, options)
+
+
+if __name__ == '__main__':
+    main()
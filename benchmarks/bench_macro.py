@@ -0,0 +1,99 @@
+"""
+Macro benchmarks: whole-election stages and the graphics, on the national-scale synthetic election.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from ElectionGraphicMachine import RidingFrame
+from data.asset_cache import asset_cache
+from data.MapMaker import parse_results, update_svg_fill
+from data.timeline import ElectionTimeline
+from data.vote_calculations import determine_winners, generate_vote_progressions
+from benchmarks.conftest import REPO_ROOT
+
+NUM_STEPS = 40
+
+
+@pytest.fixture(scope='module')
+def progressions(election):
+    return generate_vote_progressions([riding['final_results'] for riding in election.ridings], NUM_STEPS,
+                                      np.random.default_rng(0))
+
+
+@pytest.fixture(scope='module')
+def vote_totals_by_riding(election, progressions):
+    return [progressions[r, :, :len(riding['final_results'])] for r, riding in enumerate(election.ridings)]
+
+
+@pytest.fixture(scope='module')
+def timeline(election, vote_totals_by_riding):
+    return ElectionTimeline(election.ridings, election.all_parties, vote_totals_by_riding, len(election.ridings))
+
+
+def _starting_parties(election):
+    # The count starts from nothing
+    return [dict(party, seats=0, seats_list=0, pop_vote=0, temp_vote=0) for party in election.all_parties]
+
+
+def test_generate_vote_progressions(benchmark, election):
+    final_results = [riding['final_results'] for riding in election.ridings]
+    benchmark(generate_vote_progressions, final_results, NUM_STEPS, np.random.default_rng(0))
+
+
+def test_determine_winners_national(benchmark, election, progressions):
+    num_candidates = np.array([len(riding['final_results']) for riding in election.ridings])
+    call_steps, _ = benchmark(determine_winners, progressions, num_candidates, 0.4)
+    assert len(call_steps) == len(election.ridings)
+
+
+def test_election_timeline(benchmark, election, vote_totals_by_riding):
+    benchmark.pedantic(ElectionTimeline, args=(election.ridings, _starting_parties(election), vote_totals_by_riding,
+                                               len(election.ridings)), rounds=3, iterations=1)
+
+
+def test_single_frame_render(benchmark, in_repo_root, election, timeline):
+    # The riding with the most candidates, part way through its count
+    r = max(range(len(election.ridings)), key=lambda r: len(election.ridings[r]['candidate_names']))
+    riding = election.ridings[r]
+    background_img = asset_cache.image(os.path.join('Required_Images', 'background.jpg'))
+    riding_frame = RidingFrame(riding, timeline.parties, NUM_STEPS, background_img)
+    frame = timeline.frame(r, NUM_STEPS // 2)
+
+    def render():
+        riding_frame.update(frame)
+        return riding_frame.snapshot()
+
+    try:
+        image = benchmark(render)
+    finally:
+        riding_frame.close()
+    assert image.ndim == 3
+
+
+def test_update_svg_fill_largest_region(benchmark, tmp_path, election):
+    svg_dir = os.path.join(REPO_ROOT, 'svg')
+    results_dir = os.path.join(REPO_ROOT, 'irlriding')
+    input_svg = max((os.path.join(svg_dir, name) for name in os.listdir(svg_dir) if name.endswith('.svg')),
+                    key=os.path.getsize)
+    # Result files and SVGs are matched by name, ignoring case
+    region = os.path.splitext(os.path.basename(input_svg))[0].lower()
+    results_file = next(os.path.join(results_dir, name) for name in os.listdir(results_dir)
+                        if os.path.splitext(name)[0].lower() == region)
+    riding_results = parse_results(results_file)
+
+    pop_vote = np.array([party['pop_vote'] for party in election.all_parties])
+    ratios = {party['short_pname']: votes / pop_vote.sum() for party, votes in zip(election.all_parties, pop_vote)}
+
+    benchmark.pedantic(update_svg_fill, args=(input_svg, str(tmp_path / 'out.svg'), str(tmp_path / 'out.json'),
+                                              riding_results, 0, ratios), rounds=3, iterations=1)
+
+
+def test_listcreation(benchmark, tmp_path, monkeypatch, election):
+    from data.listMaker import listcreation
+
+    # listcreation writes party_graphics/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    benchmark.pedantic(listcreation, rounds=1, iterations=1)
+    assert len(os.listdir(tmp_path / 'party_graphics')) == len(election.party_listcandidates)
@@ -0,0 +1,140 @@
+"""
+Micro benchmarks: the per-step calculations run for every frame of the count.
+"""
+import numpy as np
+import pytest
+
+from ElectionGraphicMachine import MMP_calculation
+from data.party_registry import PartyRegistry
+from data.seat_allocation import DHondtAllocator, highest_averages_seats
+from data.vote_calculations import calculate_vote_totals, determine_winner, update_running_tally
+
+NUM_STEPS = 40
+# Ridings of the count replayed by the D'Hondt comparisons; the round-by-round loop is slow
+REPLAY_RIDINGS = 20
+
+
+@pytest.fixture
+def largest_riding(election):
+    return max(election.ridings, key=lambda riding: len(riding['candidate_names']))
+
+
+@pytest.fixture(scope='module')
+def running_tallies(election):
+    """Running national tallies of the non-Independent parties, one row per (riding, step), as the timeline has them."""
+    rng = np.random.default_rng(0)
+    eligible = [p for p, party in enumerate(election.all_parties) if party['name'] != 'Independent']
+    tallies = np.zeros((REPLAY_RIDINGS * NUM_STEPS, len(eligible)))
+    completed = np.zeros(len(eligible))
+    party_index = {party['name']: p for p, party in enumerate(election.all_parties)}
+    for r, riding in enumerate(election.ridings[:REPLAY_RIDINGS]):
+        riding_final = np.zeros(len(election.all_parties))
+        for name, votes in zip(riding['party_names'], riding['final_results']):
+            riding_final[party_index[name]] += votes
+        riding_final = riding_final[eligible]
+        progress = np.sort(rng.random(NUM_STEPS))
+        progress[0], progress[-1] = 0.0, 1.0
+        riding_steps = np.floor(progress[:, None] * riding_final[None, :])
+        riding_steps[-1] = riding_final
+        tallies[r * NUM_STEPS:(r + 1) * NUM_STEPS] = completed + riding_steps
+        completed = completed + riding_final
+    return tallies
+
+
+def _round_by_round_dhondt(votes, num_seats):
+    # The allocation loop MMP_calculation ran before the incremental allocator, without its prints
+    original_party_votes = dict(enumerate(votes))
+    party_votes = original_party_votes.copy()
+    seats_allocated = {party: 0 for party in original_party_votes}
+    for _ in range(num_seats):
+        leading_party = max(party_votes, key=party_votes.get)
+        seats_allocated[leading_party] += 1
+        party_votes[leading_party] = original_party_votes[leading_party] / (seats_allocated[leading_party] + 1)
+    return np.array([seats_allocated[party] for party in range(len(votes))], dtype=int)
+
+
+def test_mmp_calculation(benchmark, all_parties, election):
+    seats = len(election.ridings)
+    result = benchmark(MMP_calculation, all_parties, seats, seats)
+    assert sum(result.values()) >= 0
+
+
+def test_highest_averages_seats(benchmark, election):
+    votes = [party['temp_vote'] for party in election.all_parties if party['name'] != 'Independent']
+    seats = benchmark(highest_averages_seats, votes, len(election.ridings))
+    assert seats.sum() == len(election.ridings)
+
+
+def test_dhondt_allocator_single_update(benchmark, election):
+    votes = np.array([party['temp_vote'] for party in election.all_parties if party['name'] != 'Independent'])
+    allocator = DHondtAllocator(votes, len(election.ridings))
+    calls = [0]
+
+    def step():
+        # One party gains or loses a step's worth of votes, as between two frames
+        calls[0] += 1
+        allocator.update(0, allocator.votes[0] + (1000.0 if calls[0] % 2 else -1000.0))
+
+    benchmark(step)
+
+
+def test_dhondt_replay_round_by_round(benchmark, election, running_tallies):
+    seats = len(election.ridings)
+    allocations = benchmark(lambda: [_round_by_round_dhondt(row, seats) for row in running_tallies])
+    assert all(np.array_equal(a, highest_averages_seats(row, seats)) for a, row in zip(allocations, running_tallies))
+
+
+def test_dhondt_replay_full_recompute(benchmark, election, running_tallies):
+    seats = len(election.ridings)
+    allocations = benchmark(lambda: [highest_averages_seats(row, seats) for row in running_tallies])
+    assert all(a.sum() == seats for a in allocations)
+
+
+def test_dhondt_replay_incremental(benchmark, election, running_tallies):
+    seats = len(election.ridings)
+
+    def replay():
+        allocator = DHondtAllocator(running_tallies[0], seats)
+        allocations = []
+        for row in running_tallies:
+            allocator.set_votes(row)
+            allocations.append(allocator.allocation())
+        return allocations
+
+    allocations = benchmark(replay)
+    assert all(np.array_equal(a, highest_averages_seats(row, seats)) for a, row in zip(allocations, running_tallies))
+
+
+def test_per_candidate_vote_totals(benchmark, election):
+    # How the renderer built its vote matrices before generate_vote_progressions (see bench_macro)
+    def per_candidate_loop():
+        vote_totals_by_riding = []
+        for riding in election.ridings:
+            results = riding['final_results']
+            vote_totals = np.zeros((NUM_STEPS, len(results)))
+            for j, total_votes in enumerate(results):
+                vote_totals[:, j] = calculate_vote_totals(total_votes, NUM_STEPS)
+            vote_totals[-1] = results
+            vote_totals[0] = 0
+            vote_totals_by_riding.append(vote_totals)
+        return vote_totals_by_riding
+
+    assert len(benchmark(per_candidate_loop)) == len(election.ridings)
+
+
+def test_determine_winner(benchmark, largest_riding):
+    final_results = np.array(largest_riding['final_results'], dtype=float)
+    vote_totals = final_results * 0.6
+    remaining_votes = final_results.sum() - vote_totals.sum()
+    benchmark(determine_winner, vote_totals, remaining_votes, 0.4)
+
+
+def test_update_running_tally(benchmark, all_parties, largest_riding):
+    votes = [votes * 0.6 for votes in largest_riding['final_results']]
+    benchmark(update_running_tally, votes, largest_riding['party_names'], all_parties)
+
+
+def test_party_registry_update_running_tally(benchmark, all_parties, largest_riding):
+    registry = PartyRegistry(all_parties)
+    votes = [votes * 0.6 for votes in largest_riding['final_results']]
+    benchmark(registry.update_running_tally, votes, largest_riding['party_names'])
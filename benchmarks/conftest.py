@@ -0,0 +1,45 @@
+import copy
+import os
+
+import matplotlib
+import pytest
+
+matplotlib.use('Agg')
+
+from benchmarks.synthetic_election import install_inputs, make_election
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Saved runs, in one folder per machine: timings are only comparable on the machine that made them
+BENCHMARK_STORAGE = os.path.join(REPO_ROOT, 'benchmarks', '.benchmarks')
+
+# listMaker reads the inputs package when it is imported, so the synthetic election has to be in
+# place before any benchmark imports ElectionGraphicMachine or data.listMaker
+ELECTION = make_election()
+install_inputs(ELECTION)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # pytest-benchmark resolves its storage against the working directory; keep it in benchmarks/
+    # wherever pytest is started from, unless --benchmark-storage is given
+    if config.getoption('benchmark_storage') == 'file://./.benchmarks':
+        config.option.benchmark_storage = f'file://{BENCHMARK_STORAGE}'
+
+
+@pytest.fixture(scope='session')
+def election():
+    """The national-scale synthetic election: 338 ridings, 2-8 candidates, 10 parties."""
+    return ELECTION
+
+
+@pytest.fixture
+def all_parties(election):
+    """A fresh copy of the parties with their final tallies, for benchmarks that write to them."""
+    return copy.deepcopy(election.all_parties)
+
+
+@pytest.fixture
+def in_repo_root(monkeypatch):
+    """Run from the repository root, where the photo and background paths resolve."""
+    monkeypatch.chdir(REPO_ROOT)
+    return REPO_ROOT
@@ -0,0 +1,125 @@
+"""
+Synthetic national-scale elections for the benchmarks.
+
+make_election() builds data in the same shapes as the inputs package (all_parties, ridings and
+party_listcandidates): by default 338 ridings with 2 to 8 candidates each, 10 parties and long list
+rosters, with final tallies and MMP list seats already worked out. install_inputs() registers it
+as inputs.party_data, inputs.vote_data and inputs.list_candidates so listMaker can be imported
+against it.
+"""
+import sys
+import types
+from typing import NamedTuple
+
+import numpy as np
+
+from data.seat_allocation import MMPSeatAllocator
+
+# (name, short name, colour); short names match the party columns MapMaker reads
+PARTIES = [
+    ('Liberal Party of Canada', 'LPC', 'red'),
+    ('Conservative Party of Canada', 'CPC', 'blue'),
+    ('New Democratic Party', 'NDP', 'orange'),
+    ('Green Party of Canada', 'GRN', 'green'),
+    ('Bloc Quebecois', 'BLOC', 'cyan'),
+    ("People's Party of Canada", 'PPC', 'purple'),
+    ('Independent', 'IND', 'gray'),
+    ('Christian Heritage Party', 'CHP', 'brown'),
+    ('Maverick Party', 'MAV', 'olive'),
+    ('Libertarian Party', 'LBT', 'gold'),
+]
+
+
+class SyntheticElection(NamedTuple):
+    all_parties: list
+    ridings: list
+    party_listcandidates: list
+
+
+def make_election(num_ridings=338, num_parties=10, min_candidates=2, max_candidates=8, list_length=60, seed=0):
+    """
+    Build a reproducible synthetic election.
+
+    Args:
+    num_ridings (int): Number of ridings (and seats).
+    num_parties (int): Number of parties, at most len(PARTIES).
+    min_candidates (int): Fewest candidates in a riding.
+    max_candidates (int): Most candidates in a riding, at most num_parties.
+    list_length (int): Names on each party's list, riding candidates included.
+    seed (int): Seed for the random numbers.
+
+    Returns:
+    SyntheticElection: all_parties with final tallies and seats, ridings and list rosters.
+    """
+    rng = np.random.default_rng(seed)
+    parties = PARTIES[:num_parties]
+    party_strength = rng.dirichlet(np.full(num_parties, 2.0))
+
+    ridings = []
+    for r in range(num_ridings):
+        num_candidates = int(rng.integers(min_candidates, max_candidates + 1))
+        # Stronger parties are more likely to run a candidate
+        running = rng.choice(num_parties, size=num_candidates, replace=False, p=party_strength)
+        shares = rng.dirichlet(party_strength[running] * 20)
+        final_results = np.round(shares * rng.integers(20000, 90000)).astype(int)
+        ridings.append({
+            'name': f'Riding {r + 1:03d}',
+            'final_results': [int(votes) for votes in final_results],
+            'candidate_names': [f'Candidate_{r + 1:03d}_{j + 1}' for j in range(num_candidates)],
+            'party_names': [parties[p][0] for p in running],
+            'short_name': [parties[p][1] for p in running],
+        })
+
+    party_index = {name: i for i, (name, _, _) in enumerate(parties)}
+    pop_vote = np.zeros(num_parties)
+    fptp_seats = np.zeros(num_parties, dtype=int)
+    riding_candidates = {name: [] for name, _, _ in parties}
+    for riding in ridings:
+        for name, votes, candidate in zip(riding['party_names'], riding['final_results'], riding['candidate_names']):
+            pop_vote[party_index[name]] += votes
+            riding_candidates[name].append(candidate)
+        fptp_seats[party_index[riding['party_names'][int(np.argmax(riding['final_results']))]]] += 1
+
+    allocator = MMPSeatAllocator([name for name, _, _ in parties], num_ridings)
+    list_seats = allocator.update(pop_vote, fptp_seats)
+
+    all_parties = [
+        {
+            'name': name,
+            'short_pname': short_name,
+            'color': color,
+            'seats': int(fptp_seats[i]),
+            'seats_list': int(max(list_seats[i], 0)),
+            'pop_vote': float(pop_vote[i]),
+            'temp_vote': float(pop_vote[i]),
+        }
+        for i, (name, short_name, color) in enumerate(parties)
+    ]
+
+    # Lists start with some of the party's riding candidates, then list-only candidates
+    party_listcandidates = []
+    for name, short_name, _ in parties:
+        if name == 'Independent':
+            continue
+        from_ridings = riding_candidates[name][:list_length // 3]
+        list_only = [f'List_{short_name}_{i + 1:03d}' for i in range(list_length - len(from_ridings))]
+        party_listcandidates.append({'party_name': [name], 'list_names': from_ridings + list_only})
+
+    return SyntheticElection(all_parties, ridings, party_listcandidates)
+
+
+def install_inputs(election):
+    """Register the election as the inputs package, before anything imports data.listMaker."""
+    package = types.ModuleType('inputs')
+    package.__path__ = []
+    modules = {
+        'inputs.party_data': {'all_parties': election.all_parties},
+        'inputs.vote_data': {'ridings': election.ridings},
+        'inputs.list_candidates': {'party_listcandidates': election.party_listcandidates},
+    }
+    sys.modules['inputs'] = package
+    for module_name, attributes in modules.items():
+        module = types.ModuleType(module_name)
+        module.__dict__.update(attributes)
+        sys.modules[module_name] = module
+        setattr(package, module_name.split('.')[1], module)
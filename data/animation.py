@@ -0,0 +1,176 @@
+import io
+import os
+import struct
+import zlib
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+ANIMATION_FORMATS = ('gif', 'apng', 'webp')
+ANIMATION_EXTENSIONS = {'gif': '.gif', 'apng': '.png', 'webp': '.webp'}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _png_chunks(data):
+    # (type, payload) for every chunk of an encoded PNG
+    position = len(PNG_SIGNATURE)
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        chunk_type = data[position + 4:position + 8]
+        yield chunk_type, data[position + 8:position + 8 + length]
+        position += 12 + length
+
+
+def _png_chunk(chunk_type, payload):
+    return (struct.pack('>I', len(payload)) + chunk_type + payload
+            + struct.pack('>I', zlib.crc32(chunk_type + payload) & 0xffffffff))
+
+
+def _riff_chunks(data):
+    # (fourcc, payload) for every chunk inside a RIFF/WEBP file
+    position = 12
+    while position < len(data):
+        fourcc = data[position:position + 4]
+        size, = struct.unpack('<I', data[position + 4:position + 8])
+        yield fourcc, data[position + 8:position + 8 + size]
+        position += 8 + size + (size & 1)
+
+
+def _riff_chunk(fourcc, payload):
+    return fourcc + struct.pack('<I', len(payload)) + payload + (b'\x00' if len(payload) & 1 else b'')
+
+
+def _uint24(value):
+    return struct.pack('<I', value)[:3]
+
+
+class AnimationWriter:
+    """
+    Writes an animated GIF, APNG or WebP one frame at a time.
+
+    Each frame is encoded with Pillow as soon as it is added and its encoded data is appended to
+    the open file, so only the frame being encoded is held in memory however long the animation
+    is. No external programs are needed.
+    """
+
+    def __init__(self, filepath, animation_format, num_frames, duration=500, loop=0, quality=90):
+        """
+        Args:
+        filepath (str): File to write.
+        animation_format (str): 'gif', 'apng' or 'webp'.
+        num_frames (int): Number of frames that will be added (APNG stores it up front).
+        duration (int): How long each frame is shown, in milliseconds.
+        loop (int): Number of times to play the animation, 0 to loop forever.
+        quality (int): WebP quality, 0-100.
+        """
+        if animation_format not in ANIMATION_FORMATS:
+            raise ValueError(f"Unknown animation format {animation_format!r}, expected one of {ANIMATION_FORMATS}")
+        self.filepath = filepath
+        self.format = animation_format
+        self.num_frames = num_frames
+        self.duration = int(duration)
+        self.loop = int(loop)
+        self.quality = quality
+        self.frames_written = 0
+        self._sequence = 0  # APNG fcTL/fdAT sequence number
+        self._file = open(filepath, 'wb')
+
+    def add(self, frame):
+        """
+        Encode one frame and append it to the file.
+
+        Args:
+        frame (ndarray): (height x width x 3 or 4) uint8 image; alpha is dropped.
+        """
+        image = Image.fromarray(np.ascontiguousarray(frame[..., :3]), 'RGB')
+        if self.format == 'gif':
+            self._add_gif(image)
+        elif self.format == 'apng':
+            self._add_apng(image)
+        else:
+            self._add_webp(image)
+        self.frames_written += 1
+
+    def _add_gif(self, image):
+        image = image.quantize(colors=256)
+        if self.frames_written == 0:
+            header, _ = GifImagePlugin.getheader(image, info={'loop': self.loop, 'duration': self.duration})
+            self._file.write(b''.join(header))
+        # Every frame carries its own palette, so frames with different colours stay accurate
+        for data in GifImagePlugin.getdata(image, duration=self.duration, include_color_table=True):
+            self._file.write(data)
+
+    def _add_apng(self, image):
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=6)
+        chunks = list(_png_chunks(buffer.getvalue()))
+
+        if self.frames_written == 0:
+            self._file.write(PNG_SIGNATURE)
+            self._file.write(_png_chunk(b'IHDR', dict(chunks)[b'IHDR']))
+            self._file.write(_png_chunk(b'acTL', struct.pack('>II', self.num_frames, self.loop)))
+
+        # Frame control: full-canvas frame at (0, 0), shown for duration/1000 s, replacing the last one
+        width, height = image.size
+        self._file.write(_png_chunk(b'fcTL', struct.pack('>IIIIIHHBB', self._sequence, width, height, 0, 0,
+                                                         self.duration, 1000, 0, 0)))
+        self._sequence += 1
+
+        for chunk_type, payload in chunks:
+            if chunk_type != b'IDAT':
+                continue
+            if self.frames_written == 0:
+                # The first frame doubles as the still image for viewers without APNG support
+                self._file.write(_png_chunk(b'IDAT', payload))
+            else:
+                self._file.write(_png_chunk(b'fdAT', struct.pack('>I', self._sequence) + payload))
+                self._sequence += 1
+
+    def _add_webp(self, image):
+        buffer = io.BytesIO()
+        image.save(buffer, format='WEBP', quality=self.quality)
+        bitstream = b''.join(_riff_chunk(fourcc, payload) for fourcc, payload in _riff_chunks(buffer.getvalue())
+                             if fourcc in (b'ALPH', b'VP8 ', b'VP8L'))
+
+        width, height = image.size
+        if self.frames_written == 0:
+            self._file.write(b'RIFF\x00\x00\x00\x00WEBP')  # Size is filled in by close()
+            # Extended header with the animation flag, then a white background and the loop count
+            self._file.write(_riff_chunk(b'VP8X', b'\x02\x00\x00\x00' + _uint24(width - 1) + _uint24(height - 1)))
+            self._file.write(_riff_chunk(b'ANIM', b'\xff\xff\xff\xff' + struct.pack('<H', self.loop)))
+
+        # Frame at (0, 0) that replaces the canvas rather than blending with it
+        frame_header = (_uint24(0) + _uint24(0) + _uint24(width - 1) + _uint24(height - 1)
+                        + _uint24(self.duration) + b'\x02')
+        self._file.write(_riff_chunk(b'ANMF', frame_header + bitstream))
+
+    def close(self):
+        """Finish the file. An animation with no frames is removed."""
+        if self._file.closed:
+            return
+        if self.frames_written == 0:
+            self._file.close()
+            os.remove(self.filepath)
+            return
+
+        if self.format == 'gif':
+            self._file.write(b';')
+        elif self.format == 'apng':
+            if self.frames_written != self.num_frames:
+                # Fix the frame count if fewer frames than announced were added
+                self._file.seek(len(PNG_SIGNATURE) + 12 + 13)
+                self._file.write(_png_chunk(b'acTL', struct.pack('>II', self.frames_written, self.loop)))
+                self._file.seek(0, os.SEEK_END)
+            self._file.write(_png_chunk(b'IEND', b''))
+        else:
+            size = self._file.tell() - 8
+            self._file.seek(4)
+            self._file.write(struct.pack('<I', size))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,140 @@
+import os
+from collections import OrderedDict
+
+import matplotlib.image as mpimg
+import numpy as np
+from PIL import Image
+
+PHOTO_DIR = 'facesteals'
+NOPIC_PATH = os.path.join('Required_Images', 'nopic.jpg')
+
+
+def _to_uint8(img):
+    # PNGs decode to floats in [0, 1]; Pillow needs 8-bit channels to resize
+    if img.dtype == np.uint8:
+        return img
+    return np.clip(np.round(img * 255), 0, 255).astype(np.uint8)
+
+
+def downscale(img, size):
+    """
+    Shrink an image to fit within size, never enlarging it.
+
+    Args:
+    img (ndarray): Decoded image.
+    size (tuple): (width, height) in pixels.
+
+    Returns:
+    ndarray: The resized image, or img itself if it is already small enough.
+    """
+    height, width = img.shape[:2]
+    target_width, target_height = min(width, max(int(size[0]), 1)), min(height, max(int(size[1]), 1))
+    if (target_width, target_height) == (width, height):
+        return img
+    resized = Image.fromarray(_to_uint8(img)).resize((target_width, target_height), Image.Resampling.LANCZOS)
+    return np.asarray(resized)
+
+
+class AssetCache:
+    """
+    Decoded images shared by every graphic drawn in this process.
+
+    Images are kept in least-recently-used order and the oldest are dropped once the decoded
+    pixels pass max_bytes. A photo asked for at a pixel size is stored already shrunk to that
+    size, so each card only holds as many pixels as it can show. Directory listings are read once,
+    so checking whether a candidate has a photo usually does not touch the disk again; a name not in
+    the listing is still checked on disk, so case-insensitive file systems and photos added during
+    the run are handled. clear() forgets the images and listings.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        """
+        Args:
+        max_bytes (int): Largest total size of the decoded images kept in memory.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._images = OrderedDict()
+        self._listings = {}
+
+    def exists(self, path):
+        """Check whether a file exists, listing its directory only the first time it is asked about."""
+        directory, filename = os.path.split(os.path.abspath(path))
+        listing = self._listings.get(directory)
+        if listing is None:
+            listing = {os.path.normcase(name) for name in os.listdir(directory)} if os.path.isdir(directory) else set()
+            self._listings[directory] = listing
+        if os.path.normcase(filename) in listing:
+            return True
+        # Names differing only in case on a case-insensitive disk, or files added since the listing
+        if os.path.exists(path):
+            listing.add(os.path.normcase(filename))
+            return True
+        return False
+
+    def clear(self):
+        """Forget every cached image and directory listing."""
+        self._images.clear()
+        self._listings.clear()
+        self.current_bytes = 0
+
+    def image(self, path, size=None):
+        """
+        Return a decoded image, reading it from disk only if it is not cached.
+
+        Args:
+        path (str): Path to the image.
+        size (tuple): (width, height) in pixels to shrink the image to, or None to keep it as is.
+
+        Returns:
+        ndarray: The read-only decoded image.
+        """
+        key = (os.path.abspath(path), None if size is None else (int(size[0]), int(size[1])))
+        img = self._images.get(key)
+        if img is not None:
+            self.hits += 1
+            self._images.move_to_end(key)
+            return img
+
+        self.misses += 1
+        img = mpimg.imread(path)
+        if size is not None:
+            img = downscale(img, size)
+        img = np.array(img)  # Own the pixels so a shared entry cannot change under another user
+        img.flags.writeable = False
+
+        self._images[key] = img
+        self.current_bytes += img.nbytes
+        while self.current_bytes > self.max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.evictions += 1
+        return img
+
+    def photo_path(self, candidate, photo_dir=PHOTO_DIR, fallback=NOPIC_PATH):
+        """Return the path of a candidate's photo, or the placeholder if they do not have one."""
+        path = os.path.join(photo_dir, f'{candidate}.jpg')
+        return path if self.exists(path) else fallback
+
+    def candidate_photo(self, candidate, size=None, photo_dir=PHOTO_DIR, fallback=NOPIC_PATH):
+        """Return a candidate's photo, or the placeholder, shrunk to size if given."""
+        return self.image(self.photo_path(candidate, photo_dir, fallback), size)
+
+    def stats(self):
+        """Return the hit/miss counts and memory use of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'images': len(self._images),
+            'bytes': self.current_bytes,
+        }
+
+
+# The cache shared by the riding graphics and the party list graphics
+asset_cache = AssetCache()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _jsonable(value):
+    # NumPy arrays and scalars, and anything else json does not know, hash by their plain value
+    if isinstance(value, np.ndarray):
+        return {'dtype': str(value.dtype), 'shape': value.shape, 'data': value.tolist()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return repr(value)
+
+
+def hash_inputs(*parts):
+    """
+    Hash the inputs an output is built from.
+
+    Args:
+    *parts: JSON-like values (dicts, lists, numbers, strings, NumPy arrays), or earlier hashes.
+
+    Returns:
+    str: Hex SHA-256 digest; the same for equal inputs on every run.
+    """
+    encoded = json.dumps(parts, sort_keys=True, default=_jsonable, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+_file_digests = {}
+
+
+def file_digest(path):
+    """
+    Hash a file's contents, or return None if it does not exist.
+
+    Digests are remembered by path, size and modification time, so a file shared by many outputs
+    (a photo, a template SVG) is only read once per run.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                sha.update(chunk)
+        digest = _file_digests[key] = sha.hexdigest()
+    return digest
+
+
+class BuildManifest:
+    """
+    What every group of outputs was last built from, so a rerun only rebuilds the stale ones.
+
+    Each entry maps a key (one riding's frames, one regional map, the list graphics...) to the hash
+    of the inputs the outputs were built from and the files that were written. An entry is fresh
+    when its hash matches the current inputs and all of its files still exist.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+        path (str): The JSON file the manifest is read from and saved to.
+        """
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as manifest_file:
+                    self.entries = json.load(manifest_file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable build manifest {path}: {e}")
+        self.fresh = 0
+        self.stale = 0
+
+    def is_fresh(self, key, digest):
+        """Check whether the outputs recorded under key were built from inputs hashing to digest."""
+        entry = self.entries.get(key)
+        fresh = entry is not None and entry['digest'] == digest and all(os.path.exists(path) for path in entry['outputs'])
+        if fresh:
+            self.fresh += 1
+        else:
+            self.stale += 1
+        return fresh
+
+    def record(self, key, digest, outputs):
+        """
+        Record that outputs were built from inputs hashing to digest.
+
+        Nothing is recorded if any of the outputs is missing, so a failed build is retried next run.
+        """
+        outputs = sorted(outputs)
+        missing = [path for path in outputs if not os.path.exists(path)]
+        if missing:
+            logger.warning(f"Not recording {key} in the build manifest, missing {missing}")
+            self.entries.pop(key, None)
+            return
+        self.entries[key] = {'digest': digest, 'outputs': outputs}
+
+    def save(self):
+        """Write the manifest, replacing the old file only once the new one is complete."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(self.entries, manifest_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def stats(self):
+        """Return how many entries were fresh and how many were rebuilt this run."""
+        return {'fresh': self.fresh, 'stale': self.stale}
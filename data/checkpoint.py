@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class RunCheckpoint:
+    """
+    Progress of a rendering run, saved after every riding so an interrupted run can be resumed.
+
+    Holds the random generator state the count was simulated from, so a resumed run replays exactly
+    the same count, the party tallies and seat allocation at the end of each finished riding, the
+    steps of each riding whose frames were written, and which line graphs, maps, national maps and
+    list graphics are done. A checkpoint only applies to the run it was written for: resuming with
+    different inputs starts over.
+    """
+
+    def __init__(self, path, run_digest, rng_state):
+        """
+        Args:
+        path (str): The JSON file the checkpoint is saved to.
+        run_digest (str): Hash of the run's inputs and settings, see hash_inputs.
+        rng_state (dict): The random generator's bit_generator.state before the count was simulated.
+        """
+        self.path = path
+        self.run_digest = run_digest
+        self.rng_state = rng_state
+        self.frames = {}  # Riding key -> steps whose frames were written
+        self.tallies = {}  # Riding key -> party tallies and seats once the riding is counted
+        self.done = {}  # Stage -> keys of the ridings (or '' for the whole election) it is done for
+
+    @classmethod
+    def load(cls, path, run_digest):
+        """Return the checkpoint saved at path if it was written for this run, otherwise None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as checkpoint_file:
+                saved = json.load(checkpoint_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+        if saved.get('run') != run_digest:
+            logger.warning(f"Checkpoint {path} is from a run with different inputs; starting over")
+            return None
+        checkpoint = cls(path, run_digest, saved['rng_state'])
+        checkpoint.frames = saved['frames']
+        checkpoint.tallies = saved['tallies']
+        checkpoint.done = saved['done']
+        return checkpoint
+
+    def frames_written(self, riding):
+        """Return the steps of a riding (by its key, see riding_key) whose frames were written."""
+        return set(self.frames.get(riding, ()))
+
+    def record_riding(self, riding, steps, tallies):
+        """
+        Record the frames written for a riding and the tallies once it is counted.
+
+        Args:
+        riding (str): The riding's key, its index and name (see riding_key).
+        steps (list): The steps whose frames were written in this pass.
+        tallies (dict): The party tallies and seat allocation at the end of the riding.
+        """
+        self.frames[riding] = sorted(self.frames_written(riding) | {int(step) for step in steps})
+        self.tallies[riding] = tallies
+
+    def is_done(self, stage, name=''):
+        """Check whether a stage ('line_graph', 'map', 'national_map', 'lists') is done for a riding, or for the election."""
+        return name in self.done.get(stage, ())
+
+    def mark_done(self, stage, name=''):
+        """Record that a stage is done for a riding, or for the election when no name is given."""
+        names = self.done.setdefault(stage, [])
+        if name not in names:
+            names.append(name)
+
+    def save(self):
+        """Write the checkpoint, replacing the old file only once the new one is complete."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as checkpoint_file:
+            json.dump({
+                'run': self.run_digest,
+                'rng_state': self.rng_state,
+                'frames': self.frames,
+                'tallies': self.tallies,
+                'done': self.done,
+            }, checkpoint_file)
+        os.replace(temp_path, self.path)
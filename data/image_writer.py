@@ -0,0 +1,157 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.image as mpimg
+import numpy as np
+
+from data.profiler import profiler
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncImageWriter:
+    """
+    Encodes and writes PNGs on background threads while the next frame is drawn.
+
+    At most max_pending images are queued or being written at once; submit() waits for a free
+    slot when the queue is full, so a slow disk holds up drawing instead of filling memory with
+    finished frames. Queue depth, time spent waiting for a slot and encode times are recorded for
+    stats() as running totals, with the encode-time percentiles taken from a fixed-size random
+    sample, so a writer's memory does not grow with the number of images. One writer is meant to
+    serve a whole run (or worker process), so the last images of a riding are still being encoded
+    while the next riding is drawn.
+    """
+
+    def __init__(self, max_workers=2, max_pending=4, sample_size=1024):
+        """
+        Args:
+        max_workers (int): Number of encoder threads.
+        max_pending (int): Most images allowed in the queue, including those being written.
+        sample_size (int): Most encode times kept for the percentiles in stats().
+        """
+        self.max_pending = max(int(max_pending), 1)
+        self._executor = ThreadPoolExecutor(max_workers=max(int(max_workers), 1),
+                                            thread_name_prefix='png-writer')
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._futures = []  # Images not yet written, for flush()
+        self.submitted = 0
+        self.queue_depth_total = 0  # Images already queued each time one is submitted, summed
+        self.max_queue_depth = 0
+        self.images = 0  # Images encoded and written
+        self.encode_time = 0.0  # Seconds spent encoding and writing them
+        self.sample_size = max(int(sample_size), 1)
+        self.encode_time_sample = []  # Reservoir sample of the encode times, for the percentiles
+        self._sampler = random.Random(0)
+        self.wait_time = 0.0  # Seconds submit() spent blocked on a full queue
+        self.errors = []
+
+    def submit(self, image, filepath, dpi=100, riding=None):
+        """
+        Queue an image to be written as a PNG.
+
+        Args:
+        image (ndarray): RGBA image; it must not be changed afterwards.
+        filepath (str): File to write.
+        dpi (float): Resolution recorded in the PNG.
+        riding (str): Riding the image belongs to, for the profiler.
+
+        Returns:
+        Future: Resolves to True once the image is written, or False if writing it failed.
+        """
+        wait_start = time.perf_counter()
+        self._slots.acquire()
+        self.wait_time += time.perf_counter() - wait_start
+        with self._lock:
+            self.submitted += 1
+            self.queue_depth_total += self._pending
+            self.max_queue_depth = max(self.max_queue_depth, self._pending)
+            self._pending += 1
+        future = self._executor.submit(self._write, image, filepath, dpi, riding)
+        # Written images are forgotten; the caller holds their futures if it needs them
+        self._futures = [pending for pending in self._futures if not pending.done()]
+        self._futures.append(future)
+        return future
+
+    def _write(self, image, filepath, dpi, riding):
+        try:
+            start = time.perf_counter()
+            mpimg.imsave(filepath, image, format='png', dpi=dpi)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._record_encode_time(elapsed)
+            profiler.record('encode', elapsed, riding)
+            return True
+        except Exception as e:
+            with self._lock:
+                self.errors.append((filepath, e))
+            logger.error(f"Error writing {filepath}: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def _record_encode_time(self, elapsed):
+        self.images += 1
+        self.encode_time += elapsed
+        if len(self.encode_time_sample) < self.sample_size:
+            self.encode_time_sample.append(elapsed)
+        else:
+            # Each encode time so far has the same chance of being in the sample
+            slot = self._sampler.randrange(self.images)
+            if slot < self.sample_size:
+                self.encode_time_sample[slot] = elapsed
+
+    def flush(self):
+        """Wait until every queued image has been written."""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Write everything still queued and stop the encoder threads."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """Return the queue-depth and encode-time metrics."""
+        with self._lock:
+            sample = list(self.encode_time_sample)
+            return {
+                'images': self.images,
+                'errors': len(self.errors),
+                'max_queue_depth': self.max_queue_depth,
+                'mean_queue_depth': self.queue_depth_total / self.submitted if self.submitted else 0.0,
+                'wait_time': self.wait_time,
+                'encode_time': self.encode_time,
+                'encode_time_p50': float(np.percentile(sample, 50)) if sample else 0.0,
+                'encode_time_p95': float(np.percentile(sample, 95)) if sample else 0.0,
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def combine_writer_stats(all_stats):
+    """Combine stats() from several writers, e.g. one per worker process, into a single summary."""
+    all_stats = [stats for stats in all_stats if stats]
+    if not all_stats:
+        return {}
+    images = sum(stats['images'] for stats in all_stats)
+    return {
+        'images': images,
+        'errors': sum(stats['errors'] for stats in all_stats),
+        'max_queue_depth': max(stats['max_queue_depth'] for stats in all_stats),
+        'wait_time': sum(stats['wait_time'] for stats in all_stats),
+        'encode_time': sum(stats['encode_time'] for stats in all_stats),
+        'encode_time_mean': sum(stats['encode_time'] for stats in all_stats) / images if images else 0.0,
+        'worst_encode_time_p95': max(stats['encode_time_p95'] for stats in all_stats),
+    }
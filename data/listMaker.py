@@ -1,16 +1,18 @@
+import logging
 import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
+import numpy as np
 import os
 from matplotlib import patches
 from inputs.party_data import all_parties
 from inputs.vote_data import ridings
 from inputs.list_candidates import party_listcandidates
+from data.asset_cache import asset_cache
+from data.profiler import artist_profiler
 
-def add_candidate_image(ax, img, x, y, candidate_number, candidate, party_colour):
-    rect = patches.Rectangle((x + 0.1, y + 0.2), 1.2, 1.8, linewidth=1, edgecolor='black',
-                             facecolor=party_colour, alpha=0.3, zorder=1)
-    ax.add_patch(rect)
+logger = logging.getLogger(__name__)
 
+def photo_extent(x, y):
+    """Return the (left, right, bottom, top) of the photo in the candidate box at x, y, in plot units."""
     # Define a small margin for the left side
     left_margin = 0.05  # Left margin
     right_margin = 0.05  # Right margin for text
@@ -28,8 +30,23 @@ def add_candidate_image(ax, img, x, y, candidate_number, candidate, party_colour
     img_x_end = x + 0.1 + 0.55  # Image takes up half of the box
     img_y_start = rect_y_start + (rect_height - img_height) / 2  # Center vertically
     img_y_end = img_y_start + img_height  # Extend to the calculated height
+    return img_x_start, img_x_end, img_y_start, img_y_end
 
-    ax.imshow(img, extent=(img_x_start, img_x_end, img_y_start, img_y_end), aspect='auto', zorder=2)
+
+def photo_pixel_size(ax):
+    """Return the (width, height) in pixels of a candidate box's photo, to shrink the photos to."""
+    # Every box is the same size, so the first one stands for all of them
+    left, right, bottom, top = photo_extent(0, 0)
+    corners = ax.transData.transform([(left, bottom), (right, top)])
+    return tuple(np.ceil(np.abs(corners[1] - corners[0])).astype(int))
+
+
+def add_candidate_image(ax, img, x, y, candidate_number, candidate, party_colour):
+    rect = patches.Rectangle((x + 0.1, y + 0.2), 1.2, 1.8, linewidth=1, edgecolor='black',
+                             facecolor=party_colour, alpha=0.3, zorder=1)
+    ax.add_patch(rect)
+
+    ax.imshow(img, extent=photo_extent(x, y), aspect='auto', zorder=2)
 
 
 
@@ -69,20 +86,21 @@ def listcreation():
         party['name']: number_of_mmp.get(party['name'], 0)
         for party in all_parties if party['name'] != 'Independent'
     }
-    print(number_list_seats)
+    logger.debug(number_list_seats)
 
     # Create a graphic for each party
     output_dir = "party_graphics"
     os.makedirs(output_dir, exist_ok=True)
     facesteals_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../facesteals")
     required_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../Required_Images")
+    nopic_path = os.path.join(required_dir, "nopic.jpg")
     party_colors = {party['name']: party['color'] for party in all_parties}
 
     for party in party_listcandidates:
         party_name = party['party_name'][0]
         # Create a dictionary for quick lookup of party colors
         party_colour = party_colors.get(party_name, 'grey')  # Get party color, default to grey if not found
-        print(party_name, party_colour)
+        logger.debug("%s %s", party_name, party_colour)
         candidates = party['list_names']
 
         # Gather elected candidates from this party
@@ -104,7 +122,7 @@ def listcreation():
         # Set up the figure with dynamic height
         unique_elected_seats = [candidate for candidate in elected_seats if candidate not in candidates]
         total_candidates = len(candidates) + len(unique_elected_seats)+total_needed_seats  # Total unique candidates to display
-        print(total_candidates)
+        logger.debug(total_candidates)
         num_cols = 2 if total_candidates <= 16 else 3  # Up to 2 columns for 16 candidates or less, else 3
         num_rows = ((total_candidates + num_cols) // num_cols)  # Calculate number of rows needed
         fig_height = 3 + num_rows * 2  # Adjust height based on rows
@@ -119,6 +137,9 @@ def listcreation():
 
         ax.axis('off')
 
+        # Photos are taken from the cache already shrunk to the boxes they are drawn in
+        photo_size = photo_pixel_size(ax)
+
         # Track assigned list seats
         assigned_list_seats = []
 
@@ -130,8 +151,7 @@ def listcreation():
             y = fig_height - (0.8+2 + (row * 2))  # Adjust y to fit within the dynamic height
 
             # Load candidate image
-            image_path = os.path.join(facesteals_dir, f"{candidate}.jpg")
-            img = mpimg.imread(image_path) if os.path.exists(image_path) else mpimg.imread(os.path.join(required_dir, "nopic.jpg"))
+            img = asset_cache.candidate_photo(candidate, photo_size, photo_dir=facesteals_dir, fallback=nopic_path)
 
             add_candidate_image(ax, img, x, y, idx + 1, candidate, party_colour)
 
@@ -182,7 +202,7 @@ def listcreation():
             x = col * 1.5
             y = fig_height - (0.8+2 + (row * 2))
 
-            img = mpimg.imread(os.path.join(required_dir, "nopic.jpg"))
+            img = asset_cache.image(nopic_path, photo_size)
             add_candidate_image(ax, img, x, y, idx + 1, candidate, party_colour)
             # Position the text on the right half of the box with margins
             top_margin = 0.05  # Small top margin
@@ -210,8 +230,7 @@ def listcreation():
             y = fig_height - (0.8+2 + (row * 2))
 
             # Load candidate image
-            image_path = os.path.join(facesteals_dir, f"{candidate}.jpg")
-            img = mpimg.imread(image_path) if os.path.exists(image_path) else mpimg.imread(os.path.join(required_dir, "nopic.jpg"))
+            img = asset_cache.candidate_photo(candidate, photo_size, photo_dir=facesteals_dir, fallback=nopic_path)
 
             add_candidate_image(ax, img, x, y, idx + 1, candidate, party_colour)
             # Position the text on the right half of the box with margins
@@ -240,7 +259,7 @@ def listcreation():
         # Save the graphic as a jpg file
         # Set background image
         background_image_path = os.path.join(required_dir, "background.jpg")
-        img = mpimg.imread(background_image_path)
+        img = asset_cache.image(background_image_path)
 
         # Set extent to stretch the background image to cover the entire figure area
         ax.imshow(img, aspect='auto', extent=[0, num_cols * 2, 0, fig_height], zorder=-1,alpha=0.2)
@@ -251,5 +270,6 @@ def listcreation():
         ax.axis('off')
 
         output_path = os.path.join(output_dir, f"{party_name.replace(' ', '_')}.jpg")
-        plt.savefig(output_path, format='jpg', bbox_inches='tight')
+        with artist_profiler.frame(f'list {party_name}'):
+            plt.savefig(output_path, format='jpg', bbox_inches='tight')
         plt.close()
@@ -0,0 +1,178 @@
+import json
+import logging
+import math
+import re
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+from data.MapMaker import map_output_paths
+
+logger = logging.getLogger(__name__)
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+SVG_GROUP = '{%s}g' % SVG_NS
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
+# A reference to an element id inside an attribute or style sheet, e.g. fill="url(#gradient)"
+URL_REFERENCE = re.compile(r'url\(\s*([\'"]?)#')
+NATIONAL_NAME = 'national'
+# Regions are laid out in a grid of equal cells, each fitted into its cell keeping its aspect ratio
+NATIONAL_COLUMNS = 4
+NATIONAL_CELL = (1000.0, 800.0)
+
+
+def national_output_paths(output_dir, projection=0):
+    """Paths of the composite SVG and merged JSON for one projection, named like the regional maps."""
+    return map_output_paths(output_dir, NATIONAL_NAME, projection)
+
+
+def region_transform(view_box, cell_origin, cell_size):
+    """
+    Transform fitting a region's viewBox into its cell of the composite, centred.
+
+    Args:
+    view_box (str): The region's viewBox attribute, "min-x min-y width height".
+    cell_origin (tuple): Top left corner of the cell in the composite.
+    cell_size (tuple): Width and height of the cell.
+
+    Returns:
+    str: An SVG transform attribute.
+    """
+    min_x, min_y, width, height = (float(value) for value in view_box.replace(',', ' ').split())
+    scale = min(cell_size[0] / width, cell_size[1] / height)
+    x = cell_origin[0] + (cell_size[0] - width * scale) / 2
+    y = cell_origin[1] + (cell_size[1] - height * scale) / 2
+    return f'translate({x:.6g} {y:.6g}) scale({scale:.6g}) translate({0 - min_x:.6g} {0 - min_y:.6g})'
+
+
+def _local_name(name, prefixes, declarations):
+    # SVG names lose their namespace, which the composite declares once; others keep their prefix
+    if not name.startswith('{'):
+        return name
+    uri, local = name[1:].split('}', 1)
+    if uri == SVG_NS:
+        return local
+    prefix = prefixes.setdefault(uri, f'ns{len(prefixes)}')
+    if uri != XML_NS:
+        declarations[prefix] = uri
+    return f'{prefix}:{local}'
+
+
+def _prefix_urls(text, id_prefix):
+    return URL_REFERENCE.sub(lambda match: f'url({match.group(1)}#{id_prefix}-', text)
+
+
+def _prefixed_value(key, value, id_prefix):
+    # Ids get the region's prefix, and so does everything that points at one
+    if key == 'id':
+        return f'{id_prefix}-{value}'
+    if key.endswith('href') and value.startswith('#'):
+        return f'#{id_prefix}-{value[1:]}'
+    return _prefix_urls(value, id_prefix)
+
+
+def _start_tag(elem, id_prefix, prefixes):
+    declarations = {}
+    tag = _local_name(elem.tag, prefixes, declarations)
+    attributes = []
+    for key, value in elem.attrib.items():
+        value = _prefixed_value(key, value, id_prefix)
+        attributes.append(f' {_local_name(key, prefixes, declarations)}={quoteattr(value)}')
+    attributes.extend(f' xmlns:{prefix}="{uri}"' for prefix, uri in declarations.items())
+    return f'<{tag}{"".join(attributes)}>\n'
+
+
+def _strip_svg_namespace(elem, id_prefix):
+    # Ids and the references to them are prefixed with the region so regions cannot clash
+    prefix = '{%s}' % SVG_NS
+    for child in elem.iter():
+        if isinstance(child.tag, str) and child.tag.startswith(prefix):
+            child.tag = child.tag[len(prefix):]
+        for key, value in list(child.attrib.items()):
+            child.set(key, _prefixed_value(key, value, id_prefix))
+        if child.tag == 'style' and child.text:
+            child.text = _prefix_urls(child.text, id_prefix)
+
+
+def _stream_region(svg_path, region, out, cell_origin, cell_size):
+    # Groups are written tag by tag and every other element as soon as it is parsed, then dropped,
+    # so only the open groups and the element being parsed are held, never the region's whole tree
+    id_prefix = region.replace(' ', '_')
+    prefixes = {XML_NS: 'xml'}
+    open_elements = []  # (element, written tag by tag), root first
+    for event, item in ET.iterparse(svg_path, events=('start-ns', 'start', 'end')):
+        if event == 'start-ns':
+            prefixes.setdefault(item[1], item[0])
+        elif event == 'start':
+            if not open_elements:
+                view_box = item.get('viewBox')
+                if view_box is None:
+                    raise ValueError(f"{svg_path} has no viewBox to place it in the national map")
+                out.write(f'<g data-region={quoteattr(region)} transform="{region_transform(view_box, cell_origin, cell_size)}">\n')
+                open_elements.append((item, True))
+                continue
+            streamed = open_elements[-1][1] and item.tag == SVG_GROUP
+            if streamed:
+                out.write(_start_tag(item, id_prefix, prefixes))
+            open_elements.append((item, streamed))
+        else:
+            elem, streamed = open_elements.pop()
+            if not open_elements:
+                out.write('</g>\n')
+                continue
+            parent, parent_streamed = open_elements[-1]
+            if streamed:
+                out.write('</g>\n')
+            elif parent_streamed:
+                _strip_svg_namespace(elem, id_prefix)
+                elem.tail = '\n'
+                out.write(ET.tostring(elem, encoding='unicode'))
+            if parent_streamed:
+                parent.remove(elem)
+
+
+def build_national_map(regions, output_dir, projection=0, columns=NATIONAL_COLUMNS, cell_size=NATIONAL_CELL):
+    """
+    Assemble the regional maps of one projection into a national composite SVG and merged results.
+
+    The regional SVGs are streamed one at a time, so memory stays at about one region's size. Each
+    region becomes a group with its own transform in a grid of cells. The merged JSON maps each riding
+    to its projected result and region; a riding drawn in several regional maps keeps the result of
+    the first, and lists the others under 'also_drawn_in'.
+
+    Args:
+    regions (list): The region names, in the order they are laid out, see mapmaker_main.
+    output_dir (str): Where the regional maps were written and the composite is written.
+    projection: The projection to assemble (a year index or BLEND), see map_output_paths.
+    columns (int): Number of cells per row.
+    cell_size (tuple): Width and height of each cell.
+
+    Returns:
+    tuple: Paths of the SVG and JSON written.
+    """
+    output_svg, output_json = national_output_paths(output_dir, projection)
+    rows = math.ceil(len(regions) / columns)
+    width, height = columns * cell_size[0], rows * cell_size[1]
+
+    with open(output_svg, 'w', encoding='utf-8') as out:
+        out.write(f'<svg xmlns="{SVG_NS}" viewBox="0 0 {width:g} {height:g}" width="{width:g}" height="{height:g}">\n')
+        for i, region in enumerate(regions):
+            region_svg = map_output_paths(output_dir, region, projection)[0]
+            cell_origin = ((i % columns) * cell_size[0], (i // columns) * cell_size[1])
+            logger.debug(f"Adding {region_svg} to the national map")
+            _stream_region(region_svg, region, out, cell_origin, cell_size)
+        out.write('</svg>\n')
+    logger.info(f"National SVG file written to: {output_svg}")
+
+    merged = {}
+    for region in regions:
+        with open(map_output_paths(output_dir, region, projection)[1]) as json_file:
+            for entry in json.load(json_file):
+                riding = entry.pop('riding')
+                if riding in merged:
+                    merged[riding].setdefault('also_drawn_in', []).append(region)
+                else:
+                    merged[riding] = {'region': region, **entry}
+    with open(output_json, 'w') as json_file:
+        json.dump(merged, json_file, indent=4)
+    logger.info(f"National data written to {output_json}")
+    return output_svg, output_json
@@ -0,0 +1,93 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+def first_index_by_name(names):
+    """
+    Map each party name to the position of its first entry.
+
+    A name listed twice in all_parties is credited to its first entry, as a scan that stops at the
+    first match would find it.
+    """
+    index = {}
+    for i, name in enumerate(names):
+        index.setdefault(name, i)
+    return index
+
+
+class PartyTable(NamedTuple):
+    """Display details for every party, in the order of all_parties."""
+    names: tuple
+    short_names: tuple
+    colors: tuple
+
+
+class PartyRegistry:
+    """
+    The parties of an election with their tallies held in NumPy arrays.
+
+    Parties keep the order of all_parties and are looked up by name through a dictionary, so
+    tally updates for a whole riding are a single vectorized operation instead of a scan over
+    the party list per candidate. to_dicts() and export() give back the all_parties dictionary
+    shape that listMaker.listcreation reads.
+    """
+
+    def __init__(self, all_parties):
+        """
+        Args:
+        all_parties (list): Party dictionaries with 'name', 'short_pname', 'color', 'seats',
+            'seats_list', 'pop_vote' and 'temp_vote'.
+        """
+        self.names = tuple(party['name'] for party in all_parties)
+        self.short_names = tuple(party['short_pname'] for party in all_parties)
+        self.colors = tuple(party['color'] for party in all_parties)
+        self.index = first_index_by_name(self.names)
+
+        self.seats = np.array([party['seats'] for party in all_parties], dtype=int)
+        self.seats_list = np.array([party['seats_list'] for party in all_parties], dtype=int)
+        self.pop_vote = np.array([party['pop_vote'] for party in all_parties], dtype=float)
+        self.temp_vote = np.array([party['temp_vote'] for party in all_parties], dtype=float)
+
+    def __len__(self):
+        return len(self.names)
+
+    def table(self):
+        """Return the names, short names and colours as a small picklable PartyTable."""
+        return PartyTable(names=self.names, short_names=self.short_names, colors=self.colors)
+
+    def indices(self, party_names):
+        """Map party names to registry indices, with -1 for parties that are not registered."""
+        return np.array([self.index.get(name, -1) for name in party_names], dtype=int)
+
+    def update_running_tally(self, votes_by_riding, parties_by_riding):
+        """Set temp_vote to pop_vote plus this riding's current votes for the parties running in it."""
+        indices = self.indices(parties_by_riding)
+        known = indices >= 0
+        self.temp_vote[indices[known]] = self.pop_vote[indices[known]] + np.asarray(votes_by_riding, dtype=float)[known]
+
+    def finalize_riding_votes(self, votes_by_riding, parties_by_riding):
+        """Add a finished riding's votes to pop_vote."""
+        indices = self.indices(parties_by_riding)
+        known = indices >= 0
+        np.add.at(self.pop_vote, indices[known], np.asarray(votes_by_riding, dtype=float)[known])
+
+    def to_dicts(self):
+        """Return the parties in the all_parties dictionary shape."""
+        return [
+            {
+                'name': self.names[i],
+                'short_pname': self.short_names[i],
+                'color': self.colors[i],
+                'seats': int(self.seats[i]),
+                'seats_list': int(self.seats_list[i]),
+                'pop_vote': self.pop_vote[i],
+                'temp_vote': self.temp_vote[i],
+            }
+            for i in range(len(self))
+        ]
+
+    def export(self, all_parties):
+        """Write the tallies back into existing party dictionaries, in place."""
+        for party, values in zip(all_parties, self.to_dicts()):
+            party.update(values)
@@ -0,0 +1,247 @@
+import contextlib
+import functools
+import json
+import time
+
+import numpy as np
+
+# Shared do-nothing context manager, so a disabled profiler costs one attribute check per stage
+_DISABLED = contextlib.nullcontext()
+
+
+class _Timer:
+    __slots__ = ('profiler', 'stage', 'riding', 'start')
+
+    def __init__(self, profiler, stage, riding):
+        self.profiler = profiler
+        self.stage = stage
+        self.riding = riding
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.stage, time.perf_counter() - self.start, self.riding)
+        return False
+
+
+class StageProfiler:
+    """
+    Wall-clock timings of the stages of a run, per stage and per riding.
+
+    Timings are plain (stage, riding, seconds) records, so worker processes can hand theirs back
+    with drain() and the parent adds them with extend(). Nothing is recorded unless enabled.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.records = []
+
+    def stage(self, name, riding=None):
+        """Context manager that times one stage, optionally for one riding."""
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self, name, riding)
+
+    def record(self, name, seconds, riding=None):
+        """Add one timing measured elsewhere."""
+        if self.enabled:
+            self.records.append((name, riding, seconds))
+
+    def drain(self):
+        """Return the records so far and forget them, for sending back from a worker process."""
+        records, self.records = self.records, []
+        return records
+
+    def extend(self, records):
+        """Add records drained from another profiler."""
+        if self.enabled:
+            self.records.extend(records)
+
+    def reset(self):
+        self.records = []
+
+    def report(self):
+        """
+        Returns:
+        dict: Count, total, p50 and p95 seconds per stage, total seconds per stage for each riding,
+            and the p50/p95 of frame times (the 'draw' stage).
+        """
+        by_stage = {}
+        by_riding = {}
+        for name, riding, seconds in self.records:
+            by_stage.setdefault(name, []).append(seconds)
+            if riding is not None:
+                riding_stages = by_riding.setdefault(riding, {})
+                riding_stages[name] = riding_stages.get(name, 0.0) + seconds
+
+        stages = {name: _summarize(times) for name, times in by_stage.items()}
+        return {
+            'stages': stages,
+            'ridings': by_riding,
+            'frames': stages.get('draw', _summarize([])),
+        }
+
+    def write_json(self, filepath):
+        """Write report() as JSON."""
+        with open(filepath, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+
+    def summary(self):
+        """Return a short summary for the log: frame p50/p95 and the time spent in each stage."""
+        report = self.report()
+        frames = report['frames']
+        lines = [f"Frames: {frames['count']}, p50 {frames['p50'] * 1000:.1f} ms, p95 {frames['p95'] * 1000:.1f} ms"]
+        for name, stats in sorted(report['stages'].items(), key=lambda item: -item[1]['total']):
+            lines.append(f"  {name:<16} {stats['total']:8.2f} s  x{stats['count']:<5} "
+                         f"p50 {stats['p50'] * 1000:8.1f} ms  p95 {stats['p95'] * 1000:8.1f} ms")
+        return '\n'.join(lines)
+
+
+def _summarize(times):
+    if not times:
+        return {'count': 0, 'total': 0.0, 'p50': 0.0, 'p95': 0.0}
+    return {
+        'count': len(times),
+        'total': float(np.sum(times)),
+        'p50': float(np.percentile(times, 50)),
+        'p95': float(np.percentile(times, 95)),
+    }
+
+
+class ArtistDrawProfiler:
+    """
+    Counts and times every Matplotlib artist draw, grouped by artist type, per frame.
+
+    install() wraps the draw method of the base artist classes (text, patches, images, lines and
+    collections). Times are exclusive, so a Text that draws its bbox patch is charged only for the
+    text and the FancyBboxPatch is counted on its own. Draws are only recorded inside frame(), and
+    invisible artists (which return without drawing) are not counted.
+    """
+
+    def __init__(self):
+        self.frames = []
+        self._current = None
+        self._stack = []  # Time spent in nested draws, one entry per draw in progress
+        self._originals = {}
+
+    def _artist_classes(self):
+        from matplotlib import collections, image, lines, patches, text
+        return [text.Text, patches.Patch, image._ImageBase, lines.Line2D, collections.Collection]
+
+    @property
+    def installed(self):
+        return bool(self._originals)
+
+    def install(self):
+        """Wrap the artist draw methods; does nothing if already installed."""
+        if self.installed:
+            return
+        for cls in self._artist_classes():
+            original = cls.__dict__['draw']
+            self._originals[cls] = original
+            cls.draw = self._wrap(original)
+
+    def uninstall(self):
+        """Restore the original draw methods."""
+        for cls, original in self._originals.items():
+            cls.draw = original
+        self._originals = {}
+
+    def _wrap(self, original):
+        profiler = self
+
+        @functools.wraps(original)
+        def draw(artist, renderer, *args, **kwargs):
+            if profiler._current is None or not artist.get_visible():
+                return original(artist, renderer, *args, **kwargs)
+            profiler._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(artist, renderer, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = profiler._stack.pop()
+                if profiler._stack:
+                    profiler._stack[-1] += elapsed
+                profiler._add(type(artist).__name__, elapsed - nested)
+
+        return draw
+
+    def _add(self, artist_type, seconds):
+        counts = self._current['artists'].setdefault(artist_type, {'count': 0, 'time': 0.0})
+        counts['count'] += 1
+        counts['time'] += seconds
+
+    @contextlib.contextmanager
+    def frame(self, label):
+        """Record the artist draws made inside this block as one frame."""
+        if not self.installed:
+            yield
+            return
+        previous, self._current = self._current, {'label': label, 'artists': {}}
+        try:
+            yield
+        finally:
+            frame, self._current = self._current, previous
+            frame['count'] = sum(counts['count'] for counts in frame['artists'].values())
+            frame['time'] = sum(counts['time'] for counts in frame['artists'].values())
+            self.frames.append(frame)
+
+    def drain(self):
+        """Return the frames so far and forget them, for sending back from a worker process."""
+        frames, self.frames = self.frames, []
+        return frames
+
+    def extend(self, frames):
+        """Add frames drained from another profiler."""
+        self.frames.extend(frames)
+
+    def reset(self):
+        self.frames = []
+
+    def report(self):
+        """
+        Returns:
+        dict: Every frame's artist counts and draw times, and totals per artist type with the
+            average count and time per frame.
+        """
+        totals = {}
+        for frame in self.frames:
+            for artist_type, counts in frame['artists'].items():
+                total = totals.setdefault(artist_type, {'count': 0, 'time': 0.0})
+                total['count'] += counts['count']
+                total['time'] += counts['time']
+        num_frames = len(self.frames)
+        for total in totals.values():
+            total['count_per_frame'] = total['count'] / num_frames
+            total['time_per_frame'] = total['time'] / num_frames
+        return {
+            'num_frames': num_frames,
+            'artists_per_frame': float(np.mean([frame['count'] for frame in self.frames])) if self.frames else 0.0,
+            'draw_time_per_frame': float(np.mean([frame['time'] for frame in self.frames])) if self.frames else 0.0,
+            'totals': totals,
+            'frames': self.frames,
+        }
+
+    def write_json(self, filepath):
+        """Write report() as JSON."""
+        with open(filepath, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+
+    def summary(self):
+        """Return a short summary for the log of the artist types, most expensive first."""
+        report = self.report()
+        lines = [f"Artist draws: {report['num_frames']} frames, {report['artists_per_frame']:.1f} artists and "
+                 f"{report['draw_time_per_frame'] * 1000:.1f} ms per frame"]
+        for artist_type, total in sorted(report['totals'].items(), key=lambda item: -item[1]['time']):
+            lines.append(f"  {artist_type:<16} {total['count_per_frame']:7.1f} per frame  "
+                         f"{total['time_per_frame'] * 1000:8.2f} ms per frame")
+        return '\n'.join(lines)
+
+
+# The profilers the rendering code reports to; RunOptions(profile=True) enables
+# the stage profiler and profile_artists=True installs the artist profiler
+profiler = StageProfiler()
+artist_profiler = ArtistDrawProfiler()
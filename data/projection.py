@@ -0,0 +1,105 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from data.results_cache import RESULT_PARTIES, NUM_YEARS
+
+# Years of the historical results, in file order, and their weights in the blended projection
+YEAR_LABELS = ['2019', '2015', '2011']
+YEAR_WEIGHTS = np.array([0.50, 0.333, 0.167])
+BLEND = 'blend'
+
+PARTY_COLORS = {
+    'LPC': '#ff0000',
+    'CPC': '#0000ff',
+    'NDP': '#ffa500',
+    'GRN': '#00ff00',
+    'BLOC': '#00ffdd',
+    'PPC': '#ff1493',
+    'IND': '#808080',
+    'others': '#d3d3d3'
+}
+_PARTY_RGB = np.array([[int(PARTY_COLORS[party][i:i + 2], 16) for i in (1, 3, 5)] for party in RESULT_PARTIES], dtype=float)
+
+
+class SwingProjection(NamedTuple):
+    # The last axis of projections is the years in file order, then the weighted blend
+    shares: np.ndarray  # (ridings x projections x parties) projected vote share in percent
+    winners: np.ndarray  # (ridings x projections) index of the winning party in RESULT_PARTIES
+    margins: np.ndarray  # (ridings x projections) winner's lead over the runner-up in points
+    fills: np.ndarray  # (ridings x projections) fill colour of the riding
+
+
+def projection_index(projection):
+    """Position of a year index, or of BLEND, on the projections axis of a SwingProjection."""
+    return NUM_YEARS if projection == BLEND else int(projection)
+
+
+def party_averages(matrix):
+    """
+    Average share of each party in each year over the ridings it ran in.
+
+    Args:
+    matrix (ndarray): (ridings x years x parties) historical vote shares.
+
+    Returns:
+    ndarray: (years x parties) mean of the non-zero shares, 0 where a party never ran.
+    """
+    ran = matrix != 0
+    # A running sum in riding order, so the averages match adding the ridings up one at a time
+    totals = np.cumsum(np.where(ran, matrix, 0.0), axis=0)[-1] if len(matrix) else np.zeros(matrix.shape[1:])
+    counts = ran.sum(axis=0)
+    return np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+
+
+def _fill_colors(winners, margins):
+    # Close races are drawn lighter: half way to white under 5 points, 30% under 20
+    factor = np.select([margins < 5, margins < 20], [0.5, 0.3], default=0.0)[..., None]
+    rgb = _PARTY_RGB[winners]
+    rgb = np.where(factor > 0, ((1 - factor) * rgb + factor * 255).astype(int), rgb.astype(int))
+    return np.array(['#{:02x}{:02x}{:02x}'.format(*color) for color in rgb.reshape(-1, 3).tolist()],
+                    dtype=object).reshape(winners.shape)
+
+
+def project_swing(matrix, ratios, year_weights=YEAR_WEIGHTS):
+    """
+    Project every riding's result from a uniform swing, for every historical year and their blend.
+
+    Each party's historical share in a riding is scaled by its entered share over its average
+    share that year, the projected shares are normalized to 100, and the winner, margin and fill
+    colour are found from them. The blend is the year_weights average of the yearly projections.
+
+    Args:
+    matrix (ndarray): (ridings x years x parties) historical vote shares, see load_results.
+    ratios (dict): Party short name -> entered share of the vote (0 to 1).
+    year_weights (ndarray): Weight of each year in the blend.
+
+    Returns:
+    SwingProjection: Shares, winners, margins and fills for the years in file order, then the blend.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    num_ridings = len(matrix)
+    averages = party_averages(matrix)
+    entered = np.array([ratios.get(party, 0) for party in RESULT_PARTIES], dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio_change = np.where(averages > 0, entered / averages, 0.0)
+    nvp = np.where(averages > 0, matrix * ratio_change, 0.0)
+
+    # Added up party by party, in column order
+    total = np.zeros((num_ridings, NUM_YEARS))
+    for p in range(len(RESULT_PARTIES)):
+        total = total + nvp[:, :, p]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        yearly = np.where(total[..., None] > 0, (nvp / total[..., None]) * 100, nvp)
+
+    blend = np.tensordot(yearly, np.asarray(year_weights, dtype=float), axes=([1], [0]))
+    shares = np.concatenate([yearly, blend[:, None, :]], axis=1)
+
+    # The first of equally placed parties wins, as with a stable sort
+    winners = np.argmax(shares, axis=2)
+    if shares.shape[2] > 1:
+        ordered = np.sort(shares, axis=2)
+        margins = ordered[..., -1] - ordered[..., -2]
+    else:
+        margins = np.zeros(shares.shape[:2])
+    return SwingProjection(shares, winners, margins, _fill_colors(winners, margins))
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Column order of the historical results files: each year lists these parties, most recent year first
+RESULT_PARTIES = ['LPC', 'CPC', 'NDP', 'GRN', 'BLOC', 'PPC', 'IND']
+NUM_YEARS = 3
+CACHE_DIR = '.cache'
+
+
+class RegionResults(NamedTuple):
+    names: list  # Normalized riding names, in file order
+    index: dict  # Normalized riding name -> row of matrix
+    matrix: np.ndarray  # (ridings x years x parties) vote shares as fractions
+
+
+def normalize_riding_name(name):
+    """Replace the different dashes riding names are written with by a plain hyphen."""
+    return name.replace('—', '-').replace('–', '-').replace('−', '-').replace('â€”', '-')
+
+
+def parse_results_text(file_path):
+    """
+    Parse a historical results file.
+
+    Each line is a riding name followed by NUM_YEARS x len(RESULT_PARTIES) percentages such as
+    "57.2%". Short lines, lines with the wrong number of columns and lines that do not parse are
+    skipped; a riding listed twice keeps its last line.
+
+    Returns:
+    RegionResults: The parsed results, with the matrix in memory.
+    """
+    rows = {}
+    num_columns = NUM_YEARS * len(RESULT_PARTIES)
+    with open(file_path, 'r') as file:
+        for line in file:
+            parts = line.strip().split(',')
+            if len(parts) < 8 or len(parts) != 1 + num_columns:
+                continue
+            try:
+                rows[normalize_riding_name(parts[0])] = np.array([part.strip('%') for part in parts[1:]], dtype=float) / 100
+            except ValueError:
+                continue
+    names = list(rows)
+    matrix = np.array([rows[name] for name in names], dtype=float).reshape(len(names), NUM_YEARS, len(RESULT_PARTIES))
+    return RegionResults(names, {name: i for i, name in enumerate(names)}, matrix)
+
+
+def _file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _cache_paths(file_path, cache_dir):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f'{stem}.npy'), os.path.join(cache_dir, f'{stem}.json')
+
+
+def load_results(file_path, cache_dir=None):
+    """
+    Load a historical results file through its binary sidecar.
+
+    The first load parses the text and saves the matrix as a .npy file, next to a small JSON file
+    holding the riding names and the source file's size, modification time and SHA-256. Later loads
+    memory-map the .npy file instead of parsing the text. A source whose modification time changed
+    is hashed: if its contents are unchanged the sidecar is kept, otherwise it is rebuilt.
+
+    Args:
+    file_path (str): The results file, e.g. 'irlriding/toronto.txt'.
+    cache_dir (str): Where the sidecars are kept; defaults to a .cache directory next to the file.
+
+    Returns:
+    RegionResults: The results, with a read-only memory-mapped matrix when the sidecar is used.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(file_path), CACHE_DIR)
+    matrix_path, meta_path = _cache_paths(file_path, cache_dir)
+    stat = os.stat(file_path)
+
+    meta = None
+    if os.path.exists(matrix_path) and os.path.exists(meta_path):
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            meta = None
+    if meta is not None and (meta['size'], meta['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        # Touched but maybe not edited: only the contents decide
+        if meta['size'] == stat.st_size and meta['sha256'] == _file_sha256(file_path):
+            meta['mtime_ns'] = stat.st_mtime_ns
+            try:
+                _write_meta(meta_path, meta)
+            except OSError:
+                pass  # Hashed again next time
+        else:
+            meta = None
+
+    if meta is not None:
+        try:
+            matrix = np.load(matrix_path, mmap_mode='r')
+            names = meta['names']
+            return RegionResults(names, {name: i for i, name in enumerate(names)}, matrix)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding unreadable results cache {matrix_path}: {e}")
+
+    logger.debug(f"Parsing results from file: {file_path}")
+    results = parse_results_text(file_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f'{matrix_path}.tmp.npy'
+        np.save(temp_path, results.matrix)
+        os.replace(temp_path, matrix_path)
+        _write_meta(meta_path, {
+            'names': results.names,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': _file_sha256(file_path),
+        })
+    except OSError as e:
+        # A read-only checkout still works, it just parses the text every time
+        logger.warning(f"Could not write results cache for {file_path}: {e}")
+    return results
+
+
+def _write_meta(meta_path, meta):
+    temp_path = f'{meta_path}.tmp'
+    with open(temp_path, 'w') as meta_file:
+        json.dump(meta, meta_file)
+    os.replace(temp_path, meta_path)
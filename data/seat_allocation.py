@@ -0,0 +1,187 @@
+import heapq
+
+import numpy as np
+
+
+def highest_averages_seats(votes, num_seats):
+    """
+    Allocate seats with the D'Hondt highest-averages method.
+
+    This gives the same result as handing out one seat per round to the party with the largest
+    votes / (seats won + 1), with ties going to the party listed first.
+
+    Args:
+    votes (ndarray): Vote totals, one per party.
+    num_seats (int): Number of seats to hand out.
+
+    Returns:
+    ndarray: Seats won by each party.
+    """
+    votes = np.asarray(votes, dtype=float)
+    num_seats = max(int(num_seats), 0)
+    seats = np.zeros(len(votes), dtype=int)
+    if num_seats == 0 or len(votes) == 0:
+        return seats
+
+    # Every quotient a party could ever use, one column per divisor
+    divisors = np.arange(1, num_seats + 1, dtype=float)
+    quotients = votes[:, None] / divisors[None, :]
+    party_index = np.broadcast_to(np.arange(len(votes))[:, None], quotients.shape)
+
+    # Largest quotient first, ties to the party listed first
+    order = np.lexsort((party_index.ravel(), -quotients.ravel()))[:num_seats]
+    np.add.at(seats, party_index.ravel()[order], 1)
+    return seats
+
+
+class DHondtAllocator:
+    """
+    D'Hondt allocation that is kept up to date as vote totals change.
+
+    Two heaps are kept: the next quotient each party would win a seat with, and the quotient of
+    the last seat each party holds. After a change, seats are moved from the weakest held seat to
+    the strongest unheld one until no swap improves the result, so a small change in one party's
+    votes costs a few O(log parties) heap operations instead of a full rerun.
+
+    Quotients are ranked by (quotient, party order), matching a round-by-round allocation where
+    ties go to the party listed first. Entries made stale by a later change are dropped lazily,
+    and a heap is rebuilt once its stale entries outnumber the live ones about two to one.
+    """
+
+    def __init__(self, votes, num_seats):
+        """
+        Args:
+        votes (sequence): Starting vote totals, one per party.
+        num_seats (int): Number of seats to hand out.
+        """
+        self.votes = [float(vote) for vote in votes]
+        self.seats = [0] * len(self.votes)
+        self.num_seats = 0
+        self._allocated = 0
+        self._versions = [0] * len(self.votes)
+        self._next_seat = []  # Min-heap of (-quotient, party, version) for each party's next seat
+        self._last_seat = []  # Min-heap of (quotient, -party, version) for each party's weakest seat
+        for party in range(len(self.votes)):
+            self._push(party)
+        self.set_num_seats(num_seats)
+
+    def _push(self, party):
+        self._versions[party] += 1
+        version = self._versions[party]
+        votes = self.votes[party]
+        seats = self.seats[party]
+        heapq.heappush(self._next_seat, (-(votes / (seats + 1)), party, version))
+        if seats > 0:
+            heapq.heappush(self._last_seat, (votes / seats, -party, version))
+        self._next_seat = self._compact(self._next_seat)
+        self._last_seat = self._compact(self._last_seat)
+
+    def _compact(self, heap):
+        # Each party has at most one current entry per heap, so past three per party most are stale
+        if len(heap) <= 3 * len(self.votes):
+            return heap
+        heap = [entry for entry in heap if entry[2] == self._versions[abs(entry[1])]]
+        heapq.heapify(heap)
+        return heap
+
+    def _peek(self, heap):
+        # Drop entries made stale by a later change to the same party
+        while heap and heap[0][2] != self._versions[abs(heap[0][1])]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _award(self, party):
+        self.seats[party] += 1
+        self._allocated += 1
+        self._push(party)
+
+    def _revoke(self, party):
+        self.seats[party] -= 1
+        self._allocated -= 1
+        self._push(party)
+
+    def _rebalance(self):
+        while self._allocated < self.num_seats and self._peek(self._next_seat):
+            self._award(self._peek(self._next_seat)[1])
+        while self._allocated > self.num_seats:
+            self._revoke(-self._peek(self._last_seat)[1])
+
+        while True:
+            best_unheld = self._peek(self._next_seat)
+            weakest_held = self._peek(self._last_seat)
+            if best_unheld is None or weakest_held is None:
+                break
+            gaining, losing = best_unheld[1], -weakest_held[1]
+            if gaining == losing:
+                break
+            # Rank both seats the way a round-by-round allocation would
+            unheld_key = (best_unheld[0], gaining)
+            held_key = (-weakest_held[0], losing)
+            if unheld_key >= held_key:
+                break
+            self._revoke(losing)
+            self._award(gaining)
+
+    def set_num_seats(self, num_seats):
+        """Change the number of seats to hand out."""
+        self.num_seats = max(int(num_seats), 0)
+        self._rebalance()
+
+    def update(self, party, votes):
+        """Change one party's vote total."""
+        votes = float(votes)
+        if votes == self.votes[party]:
+            return
+        self.votes[party] = votes
+        self._push(party)
+        self._rebalance()
+
+    def set_votes(self, votes):
+        """Change several vote totals at once; only parties whose totals moved are touched."""
+        for party, vote in enumerate(votes):
+            vote = float(vote)
+            if vote != self.votes[party]:
+                self.votes[party] = vote
+                self._push(party)
+        self._rebalance()
+
+    def allocation(self):
+        """Return the seats won by each party."""
+        return np.array(self.seats, dtype=int)
+
+
+class MMPSeatAllocator:
+    """
+    Tracks MMP list seats as the national tally changes.
+
+    Independents take no part in the list allocation, and any seats they win in ridings are taken
+    out of the pool first, the same way MMP_calculation does it.
+    """
+
+    def __init__(self, party_names, total_seats):
+        """
+        Args:
+        party_names (sequence): Party names in the order of all_parties.
+        total_seats (int): Total number of seats in the election.
+        """
+        self.total_seats = total_seats
+        self.eligible = np.array([name != 'Independent' for name in party_names], dtype=bool)
+        self.independent_index = list(party_names).index('Independent') if 'Independent' in party_names else None
+        self.dhondt = DHondtAllocator(np.zeros(int(self.eligible.sum())), 0)
+
+    def update(self, temp_votes, fptp_seats):
+        """
+        Args:
+        temp_votes (ndarray): Running vote tally per party.
+        fptp_seats (ndarray): Riding seats per party.
+
+        Returns:
+        ndarray: List seats per party (D'Hondt seats minus riding seats, 0 for Independents).
+        """
+        independent_seats = fptp_seats[self.independent_index] if self.independent_index is not None else 0
+        self.dhondt.set_votes(np.asarray(temp_votes)[self.eligible])
+        self.dhondt.set_num_seats(self.total_seats - independent_seats)
+
+        list_seats = np.zeros(len(self.eligible), dtype=int)
+        list_seats[self.eligible] = self.dhondt.allocation() - np.asarray(fptp_seats)[self.eligible]
+        return list_seats
@@ -0,0 +1,77 @@
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+
+# Width of each text at font size 1, in points, per font: {font_key: {text: width}}
+_unit_widths = {}
+# Largest fitting size for each fit request, so repeated names and vote counts cost one lookup
+_fitted_sizes = {}
+
+
+def _font_key(prop):
+    return None if prop is None else prop.get_fontconfig_pattern()
+
+
+def _unit_width(text, prop=None):
+    widths = _unit_widths.setdefault(_font_key(prop), {})
+    width = widths.get(text)
+    if width is None and not text.strip():
+        # Nothing to draw; TextPath cannot be built from blank text
+        width = widths[text] = 0.0
+    if width is None:
+        # TextPath lays glyphs out once at a fixed scale and only scales the outline for the
+        # requested size, so the width at size 1 gives the width at every size
+        text_path = TextPath((0, 0), text, size=1, prop=prop)
+        width = text_path.get_extents(Affine2D()).width
+        widths[text] = width
+    return width
+
+
+def text_width(text, font_size, scale_factor=0.001, prop=None):
+    """
+    Estimate the width of a text in plot units, the same way get_text_width does with TextPath.
+
+    Args:
+    text (str): The text to measure.
+    font_size (float): Font size in points.
+    scale_factor (float): Plot units per point.
+    prop (FontProperties): Font to measure with, the default font if None.
+
+    Returns:
+    float: Width of the text in plot units.
+    """
+    return _unit_width(text, prop) * font_size * scale_factor
+
+
+def fit_font_size(text, max_width, max_size, min_size=1, scale_factor=0.001, prop=None):
+    """
+    Find the largest whole font size the text fits in.
+
+    This gives the same size as shrinking the font one point at a time from max_size until the
+    text fits or min_size is reached, but measures the text once and binary searches the sizes.
+
+    Args:
+    text (str): The text to fit.
+    max_width (float): Available width in plot units.
+    max_size (int): Size to use if the text already fits.
+    min_size (int): Smallest size to shrink to, used even if the text still does not fit.
+    scale_factor (float): Plot units per point.
+    prop (FontProperties): Font to measure with, the default font if None.
+
+    Returns:
+    int: The font size to use.
+    """
+    key = (_font_key(prop), text, max_width, max_size, min_size, scale_factor)
+    size = _fitted_sizes.get(key)
+    if size is not None:
+        return size
+
+    # Largest size in [min_size, max_size] that fits, or min_size if none does
+    low, high = min_size, max_size
+    while low < high:
+        middle = (low + high + 1) // 2
+        if text_width(text, middle, scale_factor, prop) <= max_width:
+            low = middle
+        else:
+            high = middle - 1
+    _fitted_sizes[key] = low
+    return low
@@ -0,0 +1,148 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from data.party_registry import PartyRegistry
+from data.profiler import profiler
+from data.seat_allocation import MMPSeatAllocator
+from data.vote_calculations import determine_winners
+
+
+class FrameState(NamedTuple):
+    """The state of the whole election at one step of one riding's count."""
+    riding_index: int
+    step: int
+    num_steps: int
+    votes: np.ndarray  # Cumulative votes per candidate in this riding
+    leader: int  # Index of the leading candidate, -1 before any votes are in
+    called: bool  # True once the riding has been called at or before this step
+    winner_index: int  # Index of the called candidate, -1 if not called yet
+    temp_votes: np.ndarray  # National running tally per party
+    fptp_seats: np.ndarray  # Riding seats per party, counting the current leader here
+    list_seats: np.ndarray  # MMP list seats per party
+
+
+def _totals_before_each_riding(base, per_riding):
+    # Row r is base plus everything from ridings 0..r-1, summed in reporting order
+    return np.cumsum(np.vstack([base[None, :], per_riding]), axis=0)[:-1]
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+class ElectionTimeline:
+    """
+    The full count of an election, computed before anything is drawn.
+
+    Every (riding, step) state is stored in read-only arrays, so any frame can be looked up in O(1)
+    with frame() and rendered in any order. all_parties is only read when the timeline is built and
+    only written back by apply_final_state().
+    """
+
+    def __init__(self, ridings, all_parties, vote_totals_by_riding, seatsToProcess, call_threshold=0.4):
+        """
+        Args:
+        ridings (list): The ridings in the order they are reported.
+        all_parties (list): The party dictionaries with their starting tallies.
+        vote_totals_by_riding (list): One (num_steps x candidates) array of cumulative votes per riding.
+        seatsToProcess (int): Total number of seats in the election.
+        call_threshold (float): Share of the remaining votes the runner-up must need before a riding is called.
+        """
+        registry = PartyRegistry(all_parties)
+        self.parties = registry.table()
+        num_parties = len(registry)
+        num_ridings = len(ridings)
+        num_steps = len(vote_totals_by_riding[0]) if num_ridings else 0
+        self.num_steps = num_steps
+        self.seats_to_process = seatsToProcess
+
+        self.votes = tuple(_read_only(np.array(votes, dtype=float)) for votes in vote_totals_by_riding)
+
+        # Map each candidate to its party column; candidates of unknown parties only count in their riding
+        self.candidate_parties = tuple(_read_only(registry.indices(riding['party_names'])) for riding in ridings)
+
+        leaders = np.full((num_ridings, num_steps), -1, dtype=int)
+        call_steps = np.full(num_ridings, -1, dtype=int)
+        winner_indices = np.full(num_ridings, -1, dtype=int)
+        num_candidates = np.array([votes.shape[1] for votes in self.votes], dtype=int)
+        padded_votes = np.zeros((num_ridings, num_steps, max(num_candidates, default=0)))
+        riding_votes = np.zeros((num_ridings, num_steps, num_parties))
+
+        for r, votes in enumerate(self.votes):
+            has_votes = np.any(votes > 0, axis=1)
+            leaders[r, has_votes] = np.argmax(votes[has_votes], axis=1)
+
+            known = self.candidate_parties[r] >= 0
+            for column, party in zip(np.flatnonzero(known), self.candidate_parties[r][known]):
+                riding_votes[r, :, party] += votes[:, column]
+
+            padded_votes[r, :, :votes.shape[1]] = votes
+
+        # Every riding's call is found in one pass before anything is drawn
+        if num_ridings:
+            with profiler.stage('call_detection'):
+                call_steps, winner_indices = determine_winners(padded_votes, num_candidates, call_threshold)
+
+        # Running totals from the ridings already finished, then add the riding being counted
+        completed_pop_votes = _totals_before_each_riding(registry.pop_vote, riding_votes[:, -1, :])
+        temp_votes = completed_pop_votes[:, None, :] + riding_votes
+
+        leading_parties = np.full((num_ridings, num_steps), -1, dtype=int)
+        for r in range(num_ridings):
+            has_leader = leaders[r] >= 0
+            leading_parties[r, has_leader] = self.candidate_parties[r][leaders[r, has_leader]]
+
+        leader_seats = np.zeros((num_ridings, num_steps, num_parties), dtype=int)
+        rows, steps = np.nonzero(leading_parties >= 0)
+        leader_seats[rows, steps, leading_parties[rows, steps]] = 1
+
+        completed_seats = _totals_before_each_riding(registry.seats, leader_seats[:, -1, :])
+        fptp_seats = completed_seats[:, None, :] + leader_seats
+
+        list_seats = np.empty_like(fptp_seats)
+        list_seats[:] = registry.seats_list
+        # Walk the frames in count order so each allocation only adjusts the previous one
+        allocator = MMPSeatAllocator(self.parties.names, seatsToProcess)
+        with profiler.stage('mmp_allocation'):
+            for r in range(num_ridings):
+                for step in range(num_steps):
+                    if np.floor(temp_votes[r, step].sum()) <= 0:
+                        continue
+                    list_seats[r, step] = allocator.update(temp_votes[r, step], fptp_seats[r, step])
+
+        self.leaders = _read_only(leaders)
+        self.call_steps = _read_only(call_steps)
+        self.winner_indices = _read_only(winner_indices)
+        self.temp_votes = _read_only(temp_votes)
+        self.fptp_seats = _read_only(fptp_seats)
+        self.list_seats = _read_only(list_seats)
+
+    def frame(self, riding_index, step):
+        """Return the FrameState for one riding at one step."""
+        called = 0 <= self.call_steps[riding_index] <= step
+        return FrameState(
+            riding_index=riding_index,
+            step=step,
+            num_steps=self.num_steps,
+            votes=self.votes[riding_index][step],
+            leader=int(self.leaders[riding_index, step]),
+            called=bool(called),
+            winner_index=int(self.winner_indices[riding_index]) if called else -1,
+            temp_votes=self.temp_votes[riding_index, step],
+            fptp_seats=self.fptp_seats[riding_index, step],
+            list_seats=self.list_seats[riding_index, step],
+        )
+
+    def apply_final_state(self, all_parties):
+        """Write the tallies at the end of the count back into the party dictionaries."""
+        if not self.votes:
+            return
+        final = self.frame(len(self.votes) - 1, self.num_steps - 1)
+        registry = PartyRegistry(all_parties)
+        registry.pop_vote[:] = final.temp_votes
+        registry.temp_vote[:] = final.temp_votes
+        registry.seats[:] = final.fptp_seats
+        registry.seats_list[:] = final.list_seats
+        registry.export(all_parties)
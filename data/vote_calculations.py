@@ -1,5 +1,10 @@
+import logging
 import numpy as np
 
+from data.party_registry import first_index_by_name
+
+logger = logging.getLogger(__name__)
+
 def calculate_vote_totals(total_votes, num_steps=40):
     random_numbers = np.random.rand(num_steps)
     cumulative_sum = np.cumsum(random_numbers)
@@ -8,6 +13,91 @@ def calculate_vote_totals(total_votes, num_steps=40):
     vote_totals = total_votes * percentages
     return vote_totals
 
+def generate_vote_progressions(final_results_by_riding, num_steps=40, rng=None):
+    """
+    Build the cumulative count curves for every candidate in every riding in one go.
+
+    Each curve follows the same shape as calculate_vote_totals (a normalised cumulative sum of
+    uniform draws), with step 0 at zero votes and the last step at the exact final result.
+
+    Args:
+    final_results_by_riding (list): The 'final_results' list of each riding.
+    num_steps (int): Number of steps in each count.
+    rng (np.random.Generator): Source of randomness; pass a seeded generator for reproducible runs.
+
+    Returns:
+    ndarray: (ridings x num_steps x most candidates in a riding) votes, zero-padded for
+    ridings with fewer candidates.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    num_ridings = len(final_results_by_riding)
+    max_candidates = max((len(results) for results in final_results_by_riding), default=0)
+
+    final_results = np.zeros((num_ridings, max_candidates))
+    for r, results in enumerate(final_results_by_riding):
+        final_results[r, :len(results)] = results
+
+    cumulative = np.cumsum(rng.random((num_ridings, max_candidates, num_steps)), axis=2)
+    cumulative /= cumulative[:, :, -1:]
+    progressions = (final_results[:, :, None] * cumulative).transpose(0, 2, 1)
+
+    # Ensure final step has exact totals and include step 0 where everyone has 0 votes
+    progressions[:, -1, :] = final_results
+    progressions[:, 0, :] = 0
+    return progressions
+
+def select_steps(num_steps, num_selected_steps, rng=None):
+    """Pick the steps that get an image: always the first and last, the rest at random."""
+    if rng is None:
+        rng = np.random.default_rng()
+    middle_steps = rng.choice(np.arange(1, num_steps - 1), size=num_selected_steps - 2, replace=False)
+    return sorted([0, num_steps - 1] + [int(step) for step in middle_steps])
+
+def lead_change_steps(leaders):
+    """
+    Return the steps at which the leading candidate changes.
+
+    Args:
+    leaders (ndarray): The leading candidate's index at every step, -1 before any votes are in.
+
+    Returns:
+    list: Steps whose leader differs from the previous step's; the first leader is not a change.
+    """
+    leaders = np.asarray(leaders)
+    changes = (leaders[1:] != leaders[:-1]) & (leaders[1:] >= 0) & (leaders[:-1] >= 0)
+    return [int(step) + 1 for step in np.flatnonzero(changes)]
+
+def select_story_steps(leaders, call_step, num_steps, num_selected_steps):
+    """
+    Pick the steps that get an image from what happens in the riding's count.
+
+    The first and last steps, every lead change and the step the riding is called at are always
+    kept, even past num_selected_steps. Any budget left is filled one step at a time with the
+    step furthest from those already picked, which spreads them evenly over the quiet stretches.
+
+    Args:
+    leaders (ndarray): The leading candidate's index at every step, -1 before any votes are in.
+    call_step (int): The step the riding is called at, or -1 if it never is.
+    num_steps (int): Number of steps in the count.
+    num_selected_steps (int): How many steps to pick if the must-have steps leave room.
+
+    Returns:
+    list: The selected steps in order.
+    """
+    selected = {0, num_steps - 1, *lead_change_steps(leaders)}
+    if call_step >= 0:
+        selected.add(int(call_step))
+
+    steps = np.arange(num_steps)
+    distance = np.min(np.abs(steps[:, None] - np.array(sorted(selected))[None, :]), axis=1)
+    while len(selected) < min(num_selected_steps, num_steps):
+        # argmax takes the earliest of equally distant steps, so the choice is deterministic
+        step = int(np.argmax(distance))
+        selected.add(step)
+        distance = np.minimum(distance, np.abs(steps - step))
+    return sorted(selected)
+
 def determine_winner(vote_totals, remaining_votes, threshold=0.4):
     if len(vote_totals) == 1:
         # If there's only one candidate, they are the winner
@@ -37,17 +127,59 @@ def determine_winner(vote_totals, remaining_votes, threshold=0.4):
 
     # Call the election if there are no remaining votes
     if remaining_votes == 0:
-        print("No remaining votes. Winner determined: True")
+        logger.debug("No remaining votes. Winner determined: True")
         return True
 
     # Determine if the second place candidate would need more than the threshold percentage of the remaining votes
     if percentage_needed > threshold:
-        print("Winner determined: True")
+        logger.debug("Winner determined: True")
         return True
     else:
-        print("Winner determined: False")
+        logger.debug("Winner determined: False")
         return False
 
+def determine_winners(vote_progressions, num_candidates=None, threshold=0.4):
+    """
+    Find the step at which every riding is called, for all ridings and steps at once.
+
+    Applies the same test as determine_winner to each (riding, step): a riding is called when it
+    has a single candidate, when no votes remain, or when the runner-up would need more than
+    `threshold` of the remaining votes to catch the leader.
+
+    Args:
+    vote_progressions (ndarray): (ridings x steps x candidates) cumulative votes, zero-padded
+        for ridings with fewer candidates. The last step holds the final results.
+    num_candidates (ndarray): Real number of candidates in each riding; defaults to every column.
+    threshold (float): Share of the remaining votes the runner-up must need before a call.
+
+    Returns:
+    tuple: (call_steps, winning_indices), one entry per riding, -1 where a riding is never called.
+    """
+    votes = np.asarray(vote_progressions, dtype=float)
+    num_ridings, num_steps, max_candidates = votes.shape
+    if num_candidates is None:
+        num_candidates = np.full(num_ridings, max_candidates)
+    num_candidates = np.asarray(num_candidates)
+
+    if max_candidates >= 2:
+        top_two = -np.partition(-votes, 1, axis=2)[:, :, :2]
+        margin = top_two[:, :, 0] - top_two[:, :, 1]
+    else:
+        margin = np.zeros((num_ridings, num_steps))
+
+    remaining_votes = np.sum(votes[:, -1:, :], axis=2) - np.sum(votes, axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage_needed = np.where(remaining_votes > 0, margin / remaining_votes, 0)
+
+    called = (num_candidates[:, None] == 1) | (remaining_votes == 0) | (percentage_needed > threshold)
+
+    ever_called = called.any(axis=1)
+    call_steps = np.where(ever_called, np.argmax(called, axis=1), -1)
+    winning_indices = np.full(num_ridings, -1)
+    rows = np.flatnonzero(ever_called)
+    winning_indices[rows] = np.argmax(votes[rows, call_steps[rows]], axis=1)
+    return call_steps, winning_indices
+
 # Define the margin for the leader
 def calculate_lead_margin(votes, rank,num_candidates_to_display):
     if rank == 0 and num_candidates_to_display > 1:  # Leader
@@ -57,16 +189,16 @@ def calculate_lead_margin(votes, rank,num_candidates_to_display):
 
 def update_running_tally(votes_by_riding, parties_by_riding, all_parties):
     # Update temp_vote for each party based on the current step's votes. Keeps track of votes onto the current slide
+    index = first_index_by_name(party['name'] for party in all_parties)
     for party_name, votes in zip(parties_by_riding, votes_by_riding):
-        for party in all_parties:
-            if party['name'] == party_name:
-                party['temp_vote'] = party['pop_vote'] + votes  # temp_vote = frozentotal + current step votes
-                break
+        if party_name in index:
+            party = all_parties[index[party_name]]
+            party['temp_vote'] = party['pop_vote'] + votes  # temp_vote = frozentotal + current step votes
 
 def finalize_riding_votes(votes_by_riding, parties_by_riding, all_parties):
     # After processing the riding, finalize pop_vote by adding all votes in the riding
+    index = first_index_by_name(party['name'] for party in all_parties)
     for party_name, total_riding_votes in zip(parties_by_riding, votes_by_riding):
-        for party in all_parties:
-            if party['name'] == party_name:
-                party['pop_vote'] += total_riding_votes  # frozentotal += total votes at riding
-                break
\ No newline at end of file
+        if party_name in index:
+            party = all_parties[index[party_name]]
+            party['pop_vote'] += total_riding_votes  # frozentotal += total votes at riding
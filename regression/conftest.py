@@ -0,0 +1,5 @@
+def pytest_addoption(parser):
+    parser.addoption('--update-golden', action='store_true',
+                     help="Replace the golden files with this run's outputs instead of comparing against them.")
+    parser.addoption('--time-budgets', action='store_true',
+                     help="Also fail a case that takes longer than its wall-time budget.")
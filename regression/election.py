@@ -0,0 +1,42 @@
+"""
+The fixed election the golden-image cases are rendered from.
+
+Two of the regions whose result files and SVGs are in the repository, four parties and short list
+rosters, in the same shapes as the inputs package.
+"""
+from benchmarks.synthetic_election import SyntheticElection
+
+SEED = 2024
+
+ALL_PARTIES = [
+    {'name': 'Liberal Party of Canada', 'short_pname': 'LPC', 'color': 'red', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+    {'name': 'Conservative Party of Canada', 'short_pname': 'CPC', 'color': 'blue', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+    {'name': 'New Democratic Party', 'short_pname': 'NDP', 'color': 'orange', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+    {'name': 'Independent', 'short_pname': 'IND', 'color': 'gray', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+]
+
+RIDINGS = [
+    {'name': 'Atlantic Canada',
+     'final_results': [467355, 437582, 168439],
+     'candidate_names': ['Phonexia2', 'PhlebotinumEddie', 'redwolf177'],
+     'party_names': ['Liberal Party of Canada', 'Conservative Party of Canada', 'New Democratic Party'],
+     'short_name': ['LPC', 'CPC', 'NDP']},
+    {'name': 'Northern and Eastern Ontario',
+     'final_results': [608352, 544579],
+     'candidate_names': ['Trick_Bar_1439', 'zhuk236'],
+     'party_names': ['Liberal Party of Canada', 'New Democratic Party'],
+     'short_name': ['LPC', 'NDP']},
+]
+
+PARTY_LISTCANDIDATES = [
+    {'party_name': ['Liberal Party of Canada'], 'list_names': ['Phonexia2', 'Trick_Bar_1439', 'WonderOverYander', 'SaskPoliticker']},
+    {'party_name': ['Conservative Party of Canada'], 'list_names': ['PhlebotinumEddie', 'FreedomCanada2025', 'jeninhenin']},
+    {'party_name': ['New Democratic Party'], 'list_names': ['zhuk236', 'redwolf177', 'Model-EpicMFan', 'MrWhiteyIsAwesome']},
+]
+
+
+def make_election():
+    """Return a fresh copy of the election, since generate_individual_graphics writes to the parties."""
+    return SyntheticElection([dict(party) for party in ALL_PARTIES],
+                             [dict(riding) for riding in RIDINGS],
+                             [dict(candidates) for candidates in PARTY_LISTCANDIDATES])
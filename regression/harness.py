@@ -0,0 +1,262 @@
+"""
+Golden-image regression harness.
+
+Each case renders the fixed election in regression/election.py through one part of the pipeline
+in a fresh process on the Agg backend at GOLDEN_DPI, then its outputs are compared against the
+golden files in regression/golden/<case>/:
+
+- PNG and JPG images pixel by pixel: a pixel counts as changed when any channel differs by more
+  than PIXEL_TOLERANCE, and at most MAX_CHANGED_FRACTION of the pixels may change,
+- SVG files after XML canonicalization,
+- JSON files value by value, with floats compared to JSON_REL_TOLERANCE.
+
+The process's peak resident memory is checked against the case's budget, and so is its wall time
+when --time-budgets is given: wall time depends on the machine more than the other checks do.
+
+Run from the repository root:
+    python -m pytest regression                    compare against the golden files
+    python -m pytest regression --time-budgets     also check each case's wall time
+    python -m pytest regression --update-golden    regenerate the golden files after an intended change
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from typing import Callable, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(REPO_ROOT, 'regression', 'golden')
+
+# Directories the cases read from the repository, and the ones they write
+INPUT_DIRS = ('Required_Images', 'facesteals', 'irlriding', 'svg')
+# Inputs the pipeline writes next to (the results cache in irlriding/.cache) are copied, not linked,
+# so a run leaves the repository untouched
+COPIED_INPUT_DIRS = ('irlriding',)
+OUTPUT_DIRS = ('output_images', 'party_graphics')
+
+# Figures are drawn at a low resolution, which still shows layout and colour changes while keeping the
+# golden images small enough to live in the repository
+GOLDEN_DPI = 40
+PIXEL_TOLERANCE = 8
+MAX_CHANGED_FRACTION = 0.001
+JSON_REL_TOLERANCE = 1e-9
+
+
+class Case(NamedTuple):
+    prepare: Callable  # Takes the election and returns the call to time
+    time_budget: float  # Seconds
+    memory_budget: float  # Peak resident memory in MB
+
+
+def _individual_graphics(election):
+    from ElectionGraphicMachine import RunOptions, generate_individual_graphics
+    from regression.election import SEED
+
+    seats = 2 * len(election.ridings)
+    # The checkpoint is not a graphic, so it is left out of the comparison
+    return lambda: generate_individual_graphics(election.ridings, election.all_parties, 10, 3, seats, 0,
+                                                RunOptions(seed=SEED, checkpoint=None))
+
+
+def _regional_map(election):
+    from data.MapMaker import mapmaker_main
+
+    os.makedirs('output_images', exist_ok=True)
+    # The largest regional SVG
+    return lambda: mapmaker_main('irlriding/southwestern ontario.txt', 'svg/southwestern ontario.svg', 'output_images',
+                                 ['CPC', 'LPC'], [1041655.0, 308311.0], 'Southwestern Ontario')
+
+
+def _party_lists(election):
+    from data.listMaker import listcreation
+    from data.timeline import ElectionTimeline
+    from data.vote_calculations import generate_vote_progressions
+
+    # The list graphics are drawn from the final seat counts
+    progressions = generate_vote_progressions([riding['final_results'] for riding in election.ridings], 2,
+                                              np.random.default_rng(0))
+    vote_totals_by_riding = [progressions[r, :, :len(riding['final_results'])] for r, riding in enumerate(election.ridings)]
+    timeline = ElectionTimeline(election.ridings, election.all_parties, vote_totals_by_riding, 2 * len(election.ridings))
+    timeline.apply_final_state(election.all_parties)
+    return listcreation
+
+
+# Budgets leave room for slower machines: about three times what the cases take on a single core
+CASES = {
+    'individual_graphics': Case(_individual_graphics, time_budget=30.0, memory_budget=400.0),
+    'regional_map': Case(_regional_map, time_budget=5.0, memory_budget=150.0),
+    'party_lists': Case(_party_lists, time_budget=15.0, memory_budget=350.0),
+}
+
+
+def prepare_workdir(workdir):
+    """Link or copy the repository's inputs into workdir, so the pipeline can run there."""
+    for input_dir in INPUT_DIRS:
+        if input_dir in COPIED_INPUT_DIRS:
+            shutil.copytree(os.path.join(REPO_ROOT, input_dir), os.path.join(workdir, input_dir),
+                            ignore=shutil.ignore_patterns('.cache'))
+        else:
+            os.symlink(os.path.join(REPO_ROOT, input_dir), os.path.join(workdir, input_dir))
+
+
+def run_case(name, workdir):
+    """
+    Run one case in a fresh process with workdir as its working directory.
+
+    Args:
+    name (str): The case to run, a key of CASES.
+    workdir (str): An empty directory; the case's inputs are linked or copied into it and its outputs written there.
+
+    Returns:
+    dict: The case's 'wall_time' in seconds and 'peak_memory' in MB.
+    """
+    prepare_workdir(workdir)
+    env = dict(os.environ, MPLBACKEND='Agg', PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-m', 'regression.harness', name], cwd=workdir, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Case {name} failed:\n{result.stderr}")
+    # The measurements are the last line the case prints
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _output_files(root):
+    files = []
+    for output_dir in OUTPUT_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(root, output_dir)):
+            files.extend(os.path.relpath(os.path.join(dirpath, filename), root) for filename in filenames)
+    return sorted(files)
+
+
+def compare_images(output_path, golden_path, diff_path=None):
+    """
+    Compare two images within the pixel tolerance.
+
+    Args:
+    output_path (str): The image the case wrote.
+    golden_path (str): The golden image.
+    diff_path (str): Where to write a mask of the changed pixels when they are over the limit.
+
+    Returns:
+    str: What differs, or None when the images match.
+    """
+    output = np.asarray(Image.open(output_path).convert('RGBA'), dtype=np.int16)
+    golden = np.asarray(Image.open(golden_path).convert('RGBA'), dtype=np.int16)
+    if output.shape != golden.shape:
+        return f"size {output.shape[1]}x{output.shape[0]}, expected {golden.shape[1]}x{golden.shape[0]}"
+    changed = np.abs(output - golden).max(axis=2) > PIXEL_TOLERANCE
+    changed_fraction = changed.mean()
+    if changed_fraction <= MAX_CHANGED_FRACTION:
+        return None
+    if diff_path is not None:
+        os.makedirs(os.path.dirname(diff_path), exist_ok=True)
+        Image.fromarray((changed * 255).astype(np.uint8)).save(diff_path)
+    return f"{changed_fraction:.2%} of pixels changed by more than {PIXEL_TOLERANCE}"
+
+
+def compare_svg(output_path, golden_path):
+    """Compare two SVG files after canonicalization; returns what differs or None."""
+    if ET.canonicalize(from_file=output_path) != ET.canonicalize(from_file=golden_path):
+        return "SVG differs"
+    return None
+
+
+def _json_equal(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and \
+            math.isclose(a, b, rel_tol=JSON_REL_TOLERANCE, abs_tol=JSON_REL_TOLERANCE)
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def compare_json(output_path, golden_path):
+    """Compare two JSON files value by value; returns what differs or None."""
+    with open(output_path) as output_file, open(golden_path) as golden_file:
+        if not _json_equal(json.load(output_file), json.load(golden_file)):
+            return "JSON differs"
+    return None
+
+
+def compare_outputs(output_root, golden_root, diff_root=None):
+    """
+    Compare everything a case wrote against its golden files.
+
+    Args:
+    output_root (str): The case's working directory.
+    golden_root (str): The case's golden directory.
+    diff_root (str): Where to write masks of the changed pixels of images that differ.
+
+    Returns:
+    list: One line per file that is missing, unexpected or different; empty when everything matches.
+    """
+    outputs = _output_files(output_root)
+    goldens = _output_files(golden_root)
+    problems = [f"{path}: missing" for path in sorted(set(goldens) - set(outputs))]
+    problems += [f"{path}: not in the golden files" for path in sorted(set(outputs) - set(goldens))]
+    for path in sorted(set(outputs) & set(goldens)):
+        output_path = os.path.join(output_root, path)
+        golden_path = os.path.join(golden_root, path)
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.png', '.jpg', '.jpeg'):
+            diff_path = os.path.join(diff_root, os.path.splitext(path)[0] + '_diff.png') if diff_root else None
+            problem = compare_images(output_path, golden_path, diff_path)
+        elif extension == '.svg':
+            problem = compare_svg(output_path, golden_path)
+        elif extension == '.json':
+            problem = compare_json(output_path, golden_path)
+        else:
+            with open(output_path, 'rb') as output_file, open(golden_path, 'rb') as golden_file:
+                problem = None if output_file.read() == golden_file.read() else "contents differ"
+        if problem is not None:
+            problems.append(f"{path}: {problem}")
+    return problems
+
+
+def update_golden(output_root, golden_root):
+    """Replace the golden files in golden_root with the outputs in output_root."""
+    if os.path.exists(golden_root):
+        shutil.rmtree(golden_root)
+    for path in _output_files(output_root):
+        os.makedirs(os.path.dirname(os.path.join(golden_root, path)), exist_ok=True)
+        shutil.copyfile(os.path.join(output_root, path), os.path.join(golden_root, path))
+
+
+def main(argv=None):
+    """Run one case in the current directory and print its measurements as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('case', choices=CASES)
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use('Agg')
+    matplotlib.rcParams['figure.dpi'] = GOLDEN_DPI
+    from benchmarks.synthetic_election import install_inputs
+    from regression.election import make_election
+
+    # listMaker reads the inputs package when it is imported
+    election = make_election()
+    install_inputs(election)
+    render = CASES[args.case].prepare(election)
+
+    start = time.perf_counter()
+    render()
+    wall_time = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'wall_time': wall_time, 'peak_memory': peak_memory}))
+
+
+if __name__ == '__main__':
+    main()
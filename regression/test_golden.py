@@ -0,0 +1,30 @@
+"""
+Golden-image regression tests with peak-memory and, optionally, wall-time budgets; see regression/harness.py.
+"""
+import os
+
+import pytest
+
+from regression.harness import CASES, GOLDEN_DIR, compare_outputs, run_case, update_golden
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_golden(name, tmp_path, request):
+    case = CASES[name]
+    workdir = tmp_path / 'work'
+    workdir.mkdir()
+    measurements = run_case(name, str(workdir))
+    golden_root = os.path.join(GOLDEN_DIR, name)
+
+    if request.config.getoption('--update-golden'):
+        update_golden(str(workdir), golden_root)
+    else:
+        problems = compare_outputs(str(workdir), golden_root, str(tmp_path / 'diff'))
+        assert not problems, f"{name} differs from the golden files (masks in {tmp_path / 'diff'}):\n" + \
+            "\n".join(problems)
+
+    if request.config.getoption('--time-budgets'):
+        assert measurements['wall_time'] <= case.time_budget, \
+            f"{name} took {measurements['wall_time']:.1f}s, over its {case.time_budget:.0f}s budget"
+    assert measurements['peak_memory'] <= case.memory_budget, \
+        f"{name} peaked at {measurements['peak_memory']:.0f}MB, over its {case.memory_budget:.0f}MB budget"
@@ -0,0 +1,56 @@
+"""
+Resuming an interrupted run from its checkpoint: the frames finished before the interruption are
+not drawn or written again.
+"""
+import glob
+import os
+
+import matplotlib
+import pytest
+
+matplotlib.use('Agg')
+
+from benchmarks.synthetic_election import install_inputs
+from regression.election import SEED, make_election
+from regression.harness import prepare_workdir
+
+# listMaker reads the inputs package when it is imported
+install_inputs(make_election())
+
+import ElectionGraphicMachine
+from ElectionGraphicMachine import RunOptions, generate_individual_graphics
+
+# A time no run writes at, so a rewritten file shows in its mtime
+OLD_MTIME = 1_000_000_000
+
+
+def _run(options):
+    election = make_election()
+    generate_individual_graphics(election.ridings, election.all_parties, 10, 3, 2 * len(election.ridings), 0, options)
+
+
+def test_resume_skips_finished_frames(tmp_path, monkeypatch):
+    prepare_workdir(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    render_riding = ElectionGraphicMachine.render_riding
+
+    def interrupted_render_riding(task, *args, **kwargs):
+        if task['riding_index'] == 1:
+            raise KeyboardInterrupt
+        return render_riding(task, *args, **kwargs)
+
+    monkeypatch.setattr(ElectionGraphicMachine, 'render_riding', interrupted_render_riding)
+    with pytest.raises(KeyboardInterrupt):
+        _run(RunOptions(seed=SEED))
+
+    finished = sorted(glob.glob('output_images/Atlantic_Canada_step_*.png'))
+    assert len(finished) == 3
+    assert not glob.glob('output_images/Northern_and_Eastern_Ontario_step_*.png')
+    for path in finished:
+        os.utime(path, (OLD_MTIME, OLD_MTIME))
+
+    monkeypatch.setattr(ElectionGraphicMachine, 'render_riding', render_riding)
+    _run(RunOptions(seed=SEED, resume=True))
+
+    assert [os.path.getmtime(path) for path in finished] == [OLD_MTIME] * len(finished)
+    assert len(glob.glob('output_images/Northern_and_Eastern_Ontario_step_*.png')) == 3
@@ -0,0 +1,10 @@
+import matplotlib
+
+matplotlib.use('Agg')
+
+from benchmarks.synthetic_election import install_inputs
+from regression.election import make_election
+
+# listMaker reads the inputs package when it is imported, so an election has to be in place before
+# any test imports ElectionGraphicMachine or data.listMaker
+install_inputs(make_election())
@@ -0,0 +1,69 @@
+"""
+AnimationWriter's files, read back with Pillow.
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+
+from data.animation import ANIMATION_EXTENSIONS, ANIMATION_FORMATS, AnimationWriter
+
+NUM_FRAMES = 4
+FRAME_SIZE = (24, 32)
+# Mean difference per channel; GIF frames are quantised and WebP ones lossy
+MEAN_TOLERANCE = {'gif': 4, 'apng': 0, 'webp': 8}
+
+
+def _frames(num_frames=NUM_FRAMES):
+    # Blocks of colour that differ from frame to frame, with an alpha channel the writer drops
+    frames = []
+    for i in range(num_frames):
+        frame = np.full(FRAME_SIZE + (4,), 255, dtype=np.uint8)
+        frame[..., 0] = 40 * i
+        frame[:FRAME_SIZE[0] // 2, :, 1] = 200 - 30 * i
+        frame[:, FRAME_SIZE[1] // 2:, 2] = 60
+        frames.append(frame)
+    return frames
+
+
+def _write(path, animation_format, frames, num_frames=NUM_FRAMES):
+    with AnimationWriter(str(path), animation_format, num_frames, duration=250) as animation:
+        for frame in frames:
+            animation.add(frame)
+    return animation
+
+
+@pytest.mark.parametrize('animation_format', ANIMATION_FORMATS)
+def test_frames_read_back(tmp_path, animation_format):
+    path = tmp_path / f'riding{ANIMATION_EXTENSIONS[animation_format]}'
+    frames = _frames()
+    _write(path, animation_format, frames)
+
+    with Image.open(path) as image:
+        assert image.n_frames == NUM_FRAMES
+        assert image.size == FRAME_SIZE[::-1]
+        for frame, expected in zip(ImageSequence.Iterator(image), frames):
+            decoded = np.asarray(frame.convert('RGB'), dtype=int)
+            assert frame.info['duration'] == 250
+            assert np.abs(decoded - expected[..., :3]).mean() <= MEAN_TOLERANCE[animation_format]
+
+
+def test_apng_frame_count_fixed_on_close(tmp_path):
+    path = tmp_path / 'riding.png'
+    _write(path, 'apng', _frames(2), num_frames=NUM_FRAMES)
+    with Image.open(path) as image:
+        assert image.n_frames == 2
+
+
+@pytest.mark.parametrize('animation_format', ANIMATION_FORMATS)
+def test_empty_animation_removed(tmp_path, animation_format):
+    path = tmp_path / f'riding{ANIMATION_EXTENSIONS[animation_format]}'
+    animation = _write(path, animation_format, [])
+    assert animation.frames_written == 0
+    assert not os.path.exists(path)
+
+
+def test_unknown_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        AnimationWriter(str(tmp_path / 'riding.mp4'), 'mp4', NUM_FRAMES)
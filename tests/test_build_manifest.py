@@ -0,0 +1,78 @@
+"""
+BuildManifest staleness and the input hashes it compares.
+"""
+import os
+
+import numpy as np
+
+from data.build_manifest import BuildManifest, file_digest, hash_inputs
+
+
+def _output(tmp_path, name):
+    path = tmp_path / name
+    path.write_text(name)
+    return str(path)
+
+
+def test_hash_inputs_stable():
+    votes = np.arange(6, dtype=np.int64).reshape(2, 3)
+    inputs = {'riding': 'Bayside', 'seed': np.int64(3), 'votes': votes, 'threshold': 0.5}
+    digest = hash_inputs(inputs, 'frames')
+    assert digest == hash_inputs(dict(reversed(inputs.items())), 'frames')
+    assert digest == hash_inputs({**inputs, 'votes': votes.copy(), 'seed': 3}, 'frames')
+    assert digest != hash_inputs({**inputs, 'votes': votes + 1}, 'frames')
+    assert digest != hash_inputs({**inputs, 'votes': votes.astype(np.float64)}, 'frames')
+    assert digest != hash_inputs({**inputs, 'votes': votes.reshape(3, 2)}, 'frames')
+    assert digest != hash_inputs(inputs, 'list')
+
+
+def test_file_digest(tmp_path):
+    path = _output(tmp_path, 'photo.png')
+    digest = file_digest(path)
+    assert digest == file_digest(path)
+    (tmp_path / 'photo.png').write_text('another photo')
+    assert file_digest(path) != digest
+    assert file_digest(str(tmp_path / 'missing.png')) is None
+
+
+def test_fresh_until_inputs_or_outputs_change(tmp_path):
+    manifest = BuildManifest(str(tmp_path / 'manifest.json'))
+    outputs = [_output(tmp_path, 'step_01.png'), _output(tmp_path, 'step_02.png')]
+    manifest.record('00_Bayside', 'digest', outputs)
+
+    assert manifest.is_fresh('00_Bayside', 'digest')
+    assert not manifest.is_fresh('00_Bayside', 'new digest')
+    assert not manifest.is_fresh('01_Hillcrest', 'digest')
+    os.remove(outputs[1])
+    assert not manifest.is_fresh('00_Bayside', 'digest')
+    assert manifest.stats() == {'fresh': 1, 'stale': 3}
+
+
+def test_record_skips_missing_outputs(tmp_path):
+    manifest = BuildManifest(str(tmp_path / 'manifest.json'))
+    output = _output(tmp_path, 'step_01.png')
+    manifest.record('00_Bayside', 'digest', [output])
+    manifest.record('00_Bayside', 'new digest', [output, str(tmp_path / 'step_02.png')])
+    assert '00_Bayside' not in manifest.entries
+    assert not manifest.is_fresh('00_Bayside', 'digest')
+
+
+def test_saved_manifest_reloads(tmp_path):
+    path = str(tmp_path / 'build' / 'manifest.json')
+    manifest = BuildManifest(path)
+    output = _output(tmp_path, 'list.png')
+    manifest.record('list', 'digest', [output])
+    manifest.save()
+    assert not os.path.exists(f'{path}.tmp')
+
+    reloaded = BuildManifest(path)
+    assert reloaded.entries == manifest.entries
+    assert reloaded.is_fresh('list', 'digest')
+
+
+def test_unreadable_manifest_ignored(tmp_path):
+    path = tmp_path / 'manifest.json'
+    path.write_text('{"list": ')
+    manifest = BuildManifest(str(path))
+    assert manifest.entries == {}
+    assert not manifest.is_fresh('list', 'digest')
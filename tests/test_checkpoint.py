@@ -0,0 +1,59 @@
+"""
+RunCheckpoint: what a resumed run reads back.
+"""
+import numpy as np
+
+from data.checkpoint import RunCheckpoint
+
+TALLIES = {'votes': {'Red': 120, 'Blue': 80}, 'seats': {'Red': 1}}
+
+
+def _checkpoint(tmp_path, run_digest='run'):
+    return RunCheckpoint(str(tmp_path / 'run' / 'checkpoint.json'), run_digest, np.random.default_rng(5).bit_generator.state)
+
+
+def test_record_riding_merges_steps(tmp_path):
+    checkpoint = _checkpoint(tmp_path)
+    assert checkpoint.frames_written('00_Bayside') == set()
+    checkpoint.record_riding('00_Bayside', [np.int64(0), 3], TALLIES)
+    checkpoint.record_riding('00_Bayside', [1, 3], TALLIES)
+    assert checkpoint.frames['00_Bayside'] == [0, 1, 3]
+    assert checkpoint.frames_written('00_Bayside') == {0, 1, 3}
+    assert checkpoint.frames_written('01_Hillcrest') == set()
+
+
+def test_stages_done(tmp_path):
+    checkpoint = _checkpoint(tmp_path)
+    checkpoint.mark_done('line_graph', '00_Bayside')
+    checkpoint.mark_done('line_graph', '00_Bayside')
+    checkpoint.mark_done('lists')
+    assert checkpoint.done == {'line_graph': ['00_Bayside'], 'lists': ['']}
+    assert checkpoint.is_done('line_graph', '00_Bayside')
+    assert not checkpoint.is_done('line_graph', '01_Hillcrest')
+    assert not checkpoint.is_done('map', '00_Bayside')
+    assert checkpoint.is_done('lists')
+
+
+def test_saved_checkpoint_resumes_the_run(tmp_path):
+    checkpoint = _checkpoint(tmp_path)
+    checkpoint.record_riding('00_Bayside', [0, 2], TALLIES)
+    checkpoint.mark_done('map', '00_Bayside')
+    checkpoint.save()
+
+    resumed = RunCheckpoint.load(checkpoint.path, 'run')
+    assert resumed.frames_written('00_Bayside') == {0, 2}
+    assert resumed.tallies == {'00_Bayside': TALLIES}
+    assert resumed.is_done('map', '00_Bayside')
+    # The restored generator replays the same count
+    rng = np.random.default_rng()
+    rng.bit_generator.state = resumed.rng_state
+    assert np.array_equal(rng.random(8), np.random.default_rng(5).random(8))
+
+
+def test_load_other_run(tmp_path):
+    checkpoint = _checkpoint(tmp_path)
+    assert RunCheckpoint.load(checkpoint.path, 'run') is None
+    checkpoint.save()
+    assert RunCheckpoint.load(checkpoint.path, 'another run') is None
+    (tmp_path / 'run' / 'checkpoint.json').write_text('{"run": ')
+    assert RunCheckpoint.load(checkpoint.path, 'run') is None
@@ -0,0 +1,94 @@
+"""
+The LineCollection line graphs against the per-candidate plots they replaced.
+"""
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from PIL import Image
+
+from ElectionGraphicMachine import draw_line_graph, line_graph_path
+from data.party_registry import PartyRegistry
+from regression.election import ALL_PARTIES, RIDINGS
+
+NUM_STEPS = 12
+PIXEL_TOLERANCE = 8
+MAX_CHANGED_FRACTION = 0.002
+
+
+@pytest.fixture(autouse=True)
+def low_resolution():
+    with matplotlib.rc_context({'figure.dpi': 40}):
+        yield
+
+
+@pytest.fixture
+def vote_totals():
+    rng = np.random.default_rng(2)
+    curves = np.cumsum(rng.random((NUM_STEPS, len(RIDINGS[0]['final_results']))), axis=0)
+    return np.vstack([np.zeros((1, curves.shape[1])), curves[:-1]]) / curves[-1] * RIDINGS[0]['final_results']
+
+
+def _plotted_graph(path, vote_totals, winner_step, up_to_step=None, limits=None):
+    # The graph as it was drawn before: one ax.plot per candidate
+    riding = RIDINGS[0]
+    party_colors = {party['name']: party['color'] for party in ALL_PARTIES}
+    increments = np.linspace(0, NUM_STEPS, num=NUM_STEPS)
+    shown = slice(None) if up_to_step is None else slice(0, up_to_step + 1)
+    fig, ax = plt.subplots(figsize=(max(10, len(riding['candidate_names']) * 2), 8))
+    ax.set_title(f'Vote Progression in {riding["name"]}')
+    ax.set_xlabel('Steps')
+    ax.set_ylabel('Votes')
+    for idx, candidate_name in enumerate(riding['candidate_names']):
+        ax.plot(increments[shown], vote_totals[shown, idx], label=candidate_name,
+                color=party_colors[riding['party_names'][idx]])
+    if winner_step is not None:
+        winner_line = ax.axvline(x=winner_step, color='red', linestyle='--', label='Winner Determined')
+    ax.legend(loc='upper left')
+    if up_to_step is not None and winner_step is not None:
+        winner_line.set_visible(up_to_step >= winner_step)
+    plt.grid(True)
+    if limits is not None:
+        ax.set_xlim(limits[0])
+        ax.set_ylim(limits[1])
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def _changed_fraction(path, expected_path):
+    image = np.asarray(Image.open(path).convert('RGBA'), dtype=int)
+    expected = np.asarray(Image.open(expected_path).convert('RGBA'), dtype=int)
+    assert image.shape == expected.shape
+    return (np.abs(image - expected).max(axis=2) > PIXEL_TOLERANCE).mean()
+
+
+def _draw(output_dir, vote_totals, winner_step, progressive_steps=None):
+    parties = PartyRegistry([dict(party) for party in ALL_PARTIES]).table()
+    draw_line_graph(RIDINGS[0], 0, parties, vote_totals, winner_step, str(output_dir), progressive_steps)
+    return line_graph_path(str(output_dir), RIDINGS[0], 0)
+
+
+@pytest.mark.parametrize('winner_step', [None, 7])
+def test_line_graph_matches_plotted_lines(tmp_path, vote_totals, winner_step):
+    path = _draw(tmp_path, vote_totals, winner_step)
+    _plotted_graph(tmp_path / 'expected.png', vote_totals, winner_step)
+    assert _changed_fraction(path, tmp_path / 'expected.png') <= MAX_CHANGED_FRACTION
+
+
+def test_progressive_graphs_show_the_count_so_far(tmp_path, vote_totals):
+    winner_step = 7
+    steps = [0, 4, 7, NUM_STEPS - 1]
+    full_path = _draw(tmp_path, vote_totals, winner_step, steps)
+    _plotted_graph(tmp_path / 'full.png', vote_totals, winner_step)
+    assert _changed_fraction(full_path, tmp_path / 'full.png') <= MAX_CHANGED_FRACTION
+
+    # The partial graphs keep the finished graph's axes
+    fig, ax = plt.subplots()
+    ax.plot(np.linspace(0, NUM_STEPS, num=NUM_STEPS), vote_totals)
+    ax.axvline(x=winner_step)
+    limits = ax.get_xlim(), ax.get_ylim()
+    plt.close(fig)
+    for step in steps[1:]:
+        _plotted_graph(tmp_path / f'expected_{step}.png', vote_totals, winner_step, step, limits)
+        path = line_graph_path(str(tmp_path), RIDINGS[0], 0, step)
+        assert _changed_fraction(path, tmp_path / f'expected_{step}.png') <= MAX_CHANGED_FRACTION, f"step {step}"
@@ -0,0 +1,85 @@
+"""
+The national composite map assembled from regional maps.
+"""
+import json
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from data.MapMaker import map_output_paths
+from data.national_map import SVG_NS, build_national_map, region_transform
+
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+INKSCAPE_NS = 'http://www.inkscape.org/namespaces/inkscape'
+REGION_SVG = f'''<svg xmlns="{SVG_NS}" xmlns:xlink="{XLINK_NS}" xmlns:inkscape="{INKSCAPE_NS}" viewBox="{{view_box}}">
+ <defs><linearGradient id="shade"><stop offset="0" stop-color="#fff"/></linearGradient></defs>
+ <style>.coast {{{{ fill: url(#shade); }}}}</style>
+ <g id="Page" inkscape:label="Page">
+  <path id="riding-a" data-riding="{{first}}" fill="#ff0000" d="M0 0h10v10z"/>
+  <g id="labels"><use xlink:href="#riding-a"/><use href="#riding-b"/></g>
+  <path id="riding-b" data-riding="{{second}}" fill="url(#shade)" d="M10 0h10v10z"/>
+ </g>
+</svg>
+'''
+
+
+def _transform_point(transform, x, y):
+    # Apply a 'translate(a b) scale(s) translate(c d)' transform, innermost first
+    (a, b), (s,), (c, d) = [tuple(float(v) for v in args.split()) for args in re.findall(r'\(([^)]*)\)', transform)]
+    return a + s * (x + c), b + s * (y + d)
+
+
+@pytest.mark.parametrize('view_box', ['0 0 200 100', '-50 20 100 400', '10,10,80,80'])
+def test_region_fits_its_cell(view_box):
+    min_x, min_y, width, height = (float(value) for value in view_box.replace(',', ' ').split())
+    transform = region_transform(view_box, (1000, 800), (1000, 800))
+    left, top = _transform_point(transform, min_x, min_y)
+    right, bottom = _transform_point(transform, min_x + width, min_y + height)
+    # Inside the cell, touching two opposite sides and centred between the other two
+    assert 1000 <= left < right <= 2000 and 800 <= top < bottom <= 1600
+    assert (left, right) == pytest.approx((1000, 2000), abs=0.01) or (top, bottom) == pytest.approx((800, 1600), abs=0.01)
+    assert (left + right) / 2 == pytest.approx(1500, abs=0.01)
+    assert (top + bottom) / 2 == pytest.approx(1200, abs=0.01)
+
+
+@pytest.fixture
+def regional_maps(tmp_path):
+    regions = {'East': ('0 0 200 100', 'Harbour', 'Bay'), 'West': ('0 0 100 100', 'Bay', 'Prairie')}
+    for region, (view_box, first, second) in regions.items():
+        svg_path, json_path = map_output_paths(str(tmp_path), region, 0)
+        with open(svg_path, 'w') as svg_file:
+            svg_file.write(REGION_SVG.format(view_box=view_box, first=first, second=second))
+        with open(json_path, 'w') as json_file:
+            json.dump([{'riding': name, 'party': region, 'margin': 1.0} for name in (first, second)], json_file)
+    return list(regions)
+
+
+def test_regions_keep_their_own_ids(tmp_path, regional_maps):
+    output_svg, _ = build_national_map(regional_maps, str(tmp_path), columns=1)
+    root = ET.parse(output_svg).getroot()
+    regions = root.findall(f'{{{SVG_NS}}}g')
+    assert [group.get('data-region') for group in regions] == regional_maps
+    assert regions[1].get('transform') == region_transform('0 0 100 100', (0, 800), (1000, 800))
+
+    ids = [elem.get('id') for elem in root.iter() if elem.get('id') is not None]
+    assert len(ids) == len(set(ids)) == 10
+    assert {'East-shade', 'East-riding-a', 'West-shade', 'West-riding-b'} <= set(ids)
+    for region, group in zip(regional_maps, regions):
+        references = [elem.get(key) for elem in group.iter() for key in elem.attrib if key.endswith('href')]
+        assert references == [f'#{region}-riding-a', f'#{region}-riding-b']
+        assert group.find(f'.//{{{SVG_NS}}}path[@data-riding]').get('fill') == '#ff0000'
+        assert group.findall(f'.//{{{SVG_NS}}}path')[1].get('fill') == f'url(#{region}-shade)'
+        assert f'url(#{region}-shade)' in group.find(f'.//{{{SVG_NS}}}style').text
+        assert group.find(f'.//{{{SVG_NS}}}g[@id="{region}-Page"]').get(f'{{{INKSCAPE_NS}}}label') == 'Page'
+
+
+def test_merged_results_keep_the_first_region(tmp_path, regional_maps):
+    _, output_json = build_national_map(regional_maps, str(tmp_path))
+    with open(output_json) as json_file:
+        merged = json.load(json_file)
+    assert merged == {
+        'Harbour': {'region': 'East', 'party': 'East', 'margin': 1.0},
+        'Bay': {'region': 'East', 'party': 'East', 'margin': 1.0, 'also_drawn_in': ['West']},
+        'Prairie': {'region': 'West', 'party': 'West', 'margin': 1.0},
+    }
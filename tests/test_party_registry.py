@@ -0,0 +1,62 @@
+"""
+PartyRegistry against the dictionary tally functions in data.vote_calculations.
+"""
+import numpy as np
+import pytest
+
+from data.party_registry import PartyRegistry, first_index_by_name
+from data.vote_calculations import finalize_riding_votes, update_running_tally
+
+
+def _parties():
+    return [
+        {'name': 'Liberal Party of Canada', 'short_pname': 'LPC', 'color': 'red', 'seats': 1, 'seats_list': 0, 'pop_vote': 100, 'temp_vote': 100},
+        {'name': 'Conservative Party of Canada', 'short_pname': 'CPC', 'color': 'blue', 'seats': 0, 'seats_list': 2, 'pop_vote': 50, 'temp_vote': 50},
+        {'name': 'New Democratic Party', 'short_pname': 'NDP', 'color': 'orange', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+        # Listed twice: the first entry gets the votes
+        {'name': 'Liberal Party of Canada', 'short_pname': 'LPC2', 'color': 'pink', 'seats': 0, 'seats_list': 0, 'pop_vote': 7, 'temp_vote': 7},
+        {'name': 'Independent', 'short_pname': 'IND', 'color': 'gray', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+    ]
+
+
+RIDINGS = [
+    (['Liberal Party of Canada', 'New Democratic Party'], [300, 200]),
+    (['Conservative Party of Canada', 'Green Party of Canada', 'Independent'], [400, 900, 50]),
+    (['Liberal Party of Canada', 'Conservative Party of Canada', 'New Democratic Party'], [10, 20, 30]),
+]
+
+
+def test_first_index_by_name_keeps_the_first_entry():
+    assert first_index_by_name(['a', 'b', 'a', 'c']) == {'a': 0, 'b': 1, 'c': 3}
+
+
+def test_indices_mark_unknown_parties():
+    registry = PartyRegistry(_parties())
+    assert registry.indices(['New Democratic Party', 'Green Party of Canada', 'Liberal Party of Canada']).tolist() == [2, -1, 0]
+
+
+def test_tallies_match_the_dictionary_functions():
+    parties = _parties()
+    registry = PartyRegistry(_parties())
+    for party_names, final_votes in RIDINGS:
+        for fraction in (0.25, 0.5, 1.0):
+            step_votes = [votes * fraction for votes in final_votes]
+            update_running_tally(step_votes, party_names, parties)
+            registry.update_running_tally(step_votes, party_names)
+            assert [party['temp_vote'] for party in parties] == pytest.approx(registry.temp_vote.tolist())
+        finalize_riding_votes(final_votes, party_names, parties)
+        registry.finalize_riding_votes(final_votes, party_names)
+        assert [party['pop_vote'] for party in parties] == pytest.approx(registry.pop_vote.tolist())
+
+
+def test_export_round_trips_the_dictionaries():
+    parties = _parties()
+    registry = PartyRegistry(parties)
+    registry.seats[2] = 4
+    registry.pop_vote[1] = 1234.0
+    registry.export(parties)
+    assert parties[2]['seats'] == 4 and parties[1]['pop_vote'] == 1234.0
+    assert PartyRegistry(parties).to_dicts() == registry.to_dicts()
+    assert isinstance(parties[2]['seats'], int)
+    assert registry.table().short_names == ('LPC', 'CPC', 'NDP', 'LPC2', 'IND')
+    np.testing.assert_array_equal(PartyRegistry(parties).seats_list, [0, 2, 0, 0, 0])
@@ -0,0 +1,84 @@
+"""
+The vectorized uniform swing against projecting one riding at a time.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from data.projection import PARTY_COLORS, YEAR_WEIGHTS, project_swing
+from data.results_cache import NUM_YEARS, RESULT_PARTIES, parse_results_text
+
+IRLRIDING = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'irlriding')
+RATIOS = [
+    {'LPC': 0.33, 'CPC': 0.34, 'NDP': 0.18, 'GRN': 0.06, 'BLOC': 0.07, 'PPC': 0.02},
+    {'LPC': 0.5, 'CPC': 0.5},
+    {'NDP': 1.0},
+    {},
+]
+
+
+def _lighten_color(color, factor):
+    rgb = tuple(int(color.lstrip('#')[i:i + 2], 16) for i in (0, 2, 4))
+    return '#{:02x}{:02x}{:02x}'.format(*(int((1 - factor) * component + factor * 255) for component in rgb))
+
+
+def _riding_projections(riding_results, year_index, ratios):
+    # One riding at a time, the way update_svg_fill drew the maps before
+    parties = RESULT_PARTIES
+    start, end = year_index * len(parties), (year_index + 1) * len(parties)
+    party_totals = {party: 0.0 for party in parties}
+    party_counts = {party: 0 for party in parties}
+    for percentages in riding_results.values():
+        for party, share in zip(parties, percentages[start:end]):
+            if share != 0:
+                party_totals[party] += share
+                party_counts[party] += 1
+    averages = {party: party_totals[party] / party_counts[party] if party_counts[party] else 0 for party in parties}
+
+    projections = []
+    for results in riding_results.values():
+        total_votes = 0
+        party_votes = {}
+        for party, share in zip(parties, results[start:end]):
+            if averages[party] > 0:
+                party_votes[party] = share * (ratios.get(party, 0) / averages[party])
+                total_votes += party_votes[party]
+            else:
+                party_votes[party] = 0
+        if total_votes > 0:
+            party_votes = {party: votes / total_votes * 100 for party, votes in party_votes.items()}
+        sorted_votes = sorted(party_votes.items(), key=lambda x: x[1], reverse=True)
+        margin = sorted_votes[0][1] - sorted_votes[1][1]
+        color = PARTY_COLORS.get(sorted_votes[0][0], '#d3d3d3')
+        if margin < 5:
+            color = _lighten_color(color, 0.5)
+        elif margin < 20:
+            color = _lighten_color(color, 0.3)
+        projections.append(([party_votes[party] for party in parties], sorted_votes[0][0], margin, color))
+    return projections
+
+
+@pytest.mark.parametrize('region', sorted(name for name in os.listdir(IRLRIDING) if name.endswith('.txt')))
+@pytest.mark.parametrize('ratios', RATIOS)
+def test_projection_matches_riding_by_riding(region, ratios):
+    results = parse_results_text(os.path.join(IRLRIDING, region))
+    riding_results = {name: results.matrix[i].reshape(-1).tolist() for i, name in enumerate(results.names)}
+    projection = project_swing(results.matrix, ratios)
+
+    for year_index in range(NUM_YEARS):
+        expected = _riding_projections(riding_results, year_index, ratios)
+        for row, (shares, winner, margin, color) in enumerate(expected):
+            np.testing.assert_allclose(projection.shares[row, year_index], shares, atol=1e-9)
+            assert RESULT_PARTIES[projection.winners[row, year_index]] == winner
+            assert projection.margins[row, year_index] == pytest.approx(margin, abs=1e-9)
+            assert projection.fills[row, year_index] == color
+
+    np.testing.assert_allclose(projection.shares[:, NUM_YEARS],
+                               np.tensordot(projection.shares[:, :NUM_YEARS], YEAR_WEIGHTS, axes=([1], [0])))
+
+
+def test_empty_region():
+    projection = project_swing(np.zeros((0, NUM_YEARS, len(RESULT_PARTIES))), RATIOS[0])
+    assert projection.shares.shape == (0, NUM_YEARS + 1, len(RESULT_PARTIES))
+    assert projection.fills.shape == (0, NUM_YEARS + 1)
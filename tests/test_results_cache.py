@@ -0,0 +1,78 @@
+"""
+The memory-mapped results sidecars against parsing the text.
+"""
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from data.results_cache import CACHE_DIR, load_results, parse_results_text
+
+RESULTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'irlriding', 'Atlantic Canada.txt')
+
+
+@pytest.fixture
+def results_path(tmp_path):
+    path = tmp_path / 'atlantic.txt'
+    shutil.copyfile(RESULTS, path)
+    return str(path)
+
+
+def _assert_same_results(results, expected):
+    assert results.names == expected.names
+    assert results.index == expected.index
+    np.testing.assert_array_equal(results.matrix, expected.matrix)
+
+
+def test_sidecar_matches_the_text(tmp_path, results_path):
+    cache_dir = str(tmp_path / 'cache')
+    expected = parse_results_text(results_path)
+    assert expected.names
+
+    _assert_same_results(load_results(results_path, cache_dir), expected)
+    assert os.path.exists(os.path.join(cache_dir, 'atlantic.npy'))
+    cached = load_results(results_path, cache_dir)
+    assert isinstance(cached.matrix, np.memmap)
+    _assert_same_results(cached, expected)
+
+
+def test_sidecar_next_to_the_file_by_default(tmp_path, results_path):
+    load_results(results_path)
+    assert os.path.exists(tmp_path / CACHE_DIR / 'atlantic.npy')
+    assert isinstance(load_results(results_path).matrix, np.memmap)
+
+
+def test_touched_file_keeps_its_sidecar(tmp_path, results_path):
+    cache_dir = str(tmp_path / 'cache')
+    load_results(results_path, cache_dir)
+    sidecar = os.path.join(cache_dir, 'atlantic.npy')
+    built = os.stat(sidecar).st_mtime_ns
+
+    stat = os.stat(results_path)
+    os.utime(results_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    results = load_results(results_path, cache_dir)
+    assert isinstance(results.matrix, np.memmap)
+    assert os.stat(sidecar).st_mtime_ns == built
+    _assert_same_results(results, parse_results_text(results_path))
+
+
+def test_edited_file_rebuilds_its_sidecar(tmp_path, results_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = load_results(results_path, cache_dir)
+    with open(results_path) as results_file:
+        lines = results_file.readlines()
+    # Swapping two parties' shares keeps the size, so only the contents tell the files apart
+    name, first_share, second_share, rest = lines[0].split(',', 3)
+    assert first_share != second_share
+    lines[0] = ','.join([name, second_share, first_share, rest])
+    with open(results_path, 'w') as results_file:
+        results_file.writelines(lines)
+    stat = os.stat(results_path)
+    os.utime(results_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    results = load_results(results_path, cache_dir)
+    expected = parse_results_text(results_path)
+    assert not np.array_equal(expected.matrix, first.matrix)
+    _assert_same_results(results, expected)
+    _assert_same_results(load_results(results_path, cache_dir), expected)
@@ -0,0 +1,72 @@
+"""
+RidingFrame, which builds a riding's figure once and blits each step onto a cached static layer.
+"""
+import io
+import os
+
+import matplotlib
+import numpy as np
+import pytest
+from PIL import Image
+
+from ElectionGraphicMachine import RidingFrame
+from data.asset_cache import asset_cache
+from data.timeline import ElectionTimeline
+from data.vote_calculations import generate_vote_progressions
+from regression.election import make_election
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NUM_STEPS = 8
+STEPS = (0, 3, NUM_STEPS - 1)
+
+
+@pytest.fixture
+def timeline(monkeypatch):
+    # Photos and the background are found relative to the repository root; a low resolution keeps it quick
+    monkeypatch.chdir(REPO_ROOT)
+    with matplotlib.rc_context({'figure.dpi': 30}):
+        election = make_election()
+        progressions = generate_vote_progressions([riding['final_results'] for riding in election.ridings], NUM_STEPS,
+                                                  np.random.default_rng(1))
+        vote_totals = [progressions[r, :, :len(riding['final_results'])] for r, riding in enumerate(election.ridings)]
+        yield election, ElectionTimeline(election.ridings, election.all_parties, vote_totals, 2 * len(election.ridings))
+
+
+def _riding_frame(election, timeline, r):
+    riding = election.ridings[r]
+    return RidingFrame({key: riding[key] for key in ('name', 'candidate_names', 'party_names', 'short_name')},
+                       timeline.parties, NUM_STEPS, asset_cache.image('Required_Images/background.jpg'))
+
+
+def _savefig(riding_frame):
+    buffer = io.BytesIO()
+    riding_frame.fig.savefig(buffer, format='png', bbox_inches='tight')
+    buffer.seek(0)
+    return np.asarray(Image.open(buffer).convert('RGBA'))
+
+
+@pytest.mark.parametrize('r', [0, 1])
+def test_reused_frame_matches_a_fresh_one(timeline, r):
+    election, timeline = timeline
+    reused = _riding_frame(election, timeline, r)
+    for step in STEPS:
+        reused.update(timeline.frame(r, step))
+        fresh = _riding_frame(election, timeline, r)
+        fresh.update(timeline.frame(r, step))
+        np.testing.assert_array_equal(reused.snapshot(), fresh.snapshot(), err_msg=f"step {step}")
+        fresh.close()
+    reused.close()
+
+
+@pytest.mark.parametrize('r', [0, 1])
+def test_blitted_snapshot_matches_savefig(timeline, r):
+    election, timeline = timeline
+    riding_frame = _riding_frame(election, timeline, r)
+    for step in STEPS:
+        riding_frame.update(timeline.frame(r, step))
+        snapshot = riding_frame.snapshot().astype(int)
+        full_draw = _savefig(riding_frame).astype(int)
+        assert snapshot.shape == full_draw.shape
+        changed = np.abs(snapshot - full_draw).max(axis=2) > 8
+        assert changed.mean() <= 0.001, f"step {step}: {changed.mean():.2%} of pixels differ"
+    riding_frame.close()
@@ -0,0 +1,117 @@
+"""
+The D'Hondt and MMP allocators against the round-by-round allocation MMP_calculation used to run.
+"""
+import numpy as np
+import pytest
+
+from ElectionGraphicMachine import MMP_calculation
+from data.seat_allocation import DHondtAllocator, MMPSeatAllocator, highest_averages_seats
+
+
+def _round_by_round_dhondt(votes, num_seats):
+    # One seat per round to the largest votes / (seats won + 1); max() takes the first of equals
+    original_party_votes = dict(enumerate(votes))
+    party_votes = original_party_votes.copy()
+    seats_allocated = {party: 0 for party in original_party_votes}
+    for _ in range(num_seats):
+        leading_party = max(party_votes, key=party_votes.get)
+        seats_allocated[leading_party] += 1
+        party_votes[leading_party] = original_party_votes[leading_party] / (seats_allocated[leading_party] + 1)
+    return np.array([seats_allocated[party] for party in range(len(votes))], dtype=int)
+
+
+def _round_by_round_mmp(all_parties, seats_to_process):
+    # MMP_calculation before the incremental allocator, without its prints
+    eligible = [party for party in all_parties if party['name'] != 'Independent']
+    independent_seats = sum(party['seats'] for party in all_parties if party['name'] == 'Independent')
+    seats = _round_by_round_dhondt([party['temp_vote'] for party in eligible], seats_to_process - independent_seats)
+    return {party['name']: int(won) - party['seats'] for party, won in zip(eligible, seats)}
+
+
+def _parties(temp_votes, seats):
+    names = ['Liberal Party of Canada', 'Conservative Party of Canada', 'New Democratic Party', 'Independent']
+    return [{'name': name, 'temp_vote': float(votes), 'seats': int(won)} for name, votes, won in zip(names, temp_votes, seats)]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_highest_averages_seats_matches_round_by_round(seed):
+    rng = np.random.default_rng(seed)
+    votes = rng.integers(0, 100000, size=rng.integers(1, 9)).astype(float)
+    num_seats = int(rng.integers(0, 60))
+    np.testing.assert_array_equal(highest_averages_seats(votes, num_seats), _round_by_round_dhondt(votes, num_seats))
+
+
+@pytest.mark.parametrize('votes, num_seats', [
+    ([100, 100, 100], 2),  # Equal votes: the parties listed first win
+    ([100, 50, 50], 3),  # The first party's second quotient ties the others' first
+    ([300, 200, 100], 5),
+    ([0, 0, 0], 2),  # Nobody has votes yet
+])
+def test_ties_go_to_the_party_listed_first(votes, num_seats):
+    expected = _round_by_round_dhondt(votes, num_seats)
+    np.testing.assert_array_equal(highest_averages_seats(votes, num_seats), expected)
+    np.testing.assert_array_equal(DHondtAllocator(votes, num_seats).allocation(), expected)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_allocator_follows_changing_votes(seed):
+    rng = np.random.default_rng(seed)
+    num_parties = 6
+    votes = rng.integers(0, 50000, size=num_parties).astype(float)
+    num_seats = 30
+    allocator = DHondtAllocator(votes, num_seats)
+    for _ in range(200):
+        change = rng.integers(3)
+        if change == 0:
+            party = int(rng.integers(num_parties))
+            votes[party] = float(rng.integers(0, 50000))
+            allocator.update(party, votes[party])
+        elif change == 1:
+            # A step of the count: every party gains votes, some tie on purpose
+            votes = votes + rng.integers(0, 2000, size=num_parties)
+            votes[rng.integers(num_parties)] = votes[rng.integers(num_parties)]
+            allocator.set_votes(votes)
+        else:
+            num_seats = int(rng.integers(0, 60))
+            allocator.set_num_seats(num_seats)
+        np.testing.assert_array_equal(allocator.allocation(), _round_by_round_dhondt(votes, num_seats))
+
+
+def test_stale_heap_entries_are_compacted():
+    num_parties = 4
+    allocator = DHondtAllocator([1000.0] * num_parties, 20)
+    for i in range(5000):
+        allocator.update(i % num_parties, 1000.0 + i)
+        # Each party has one live entry per heap; stale ones are dropped before they pile up
+        assert len(allocator._next_seat) <= 3 * num_parties
+        assert len(allocator._last_seat) <= 3 * num_parties
+    np.testing.assert_array_equal(allocator.allocation(), _round_by_round_dhondt(allocator.votes, 20))
+
+
+@pytest.mark.parametrize('temp_votes, seats', [
+    ([40000, 35000, 20000, 5000], [3, 2, 0, 0]),
+    ([40000, 35000, 20000, 5000], [3, 2, 0, 2]),  # Independents' riding seats leave the pool
+    ([30000, 30000, 30000, 0], [1, 1, 1, 0]),  # Ties
+    ([1000, 0, 0, 9000], [0, 0, 0, 1]),
+])
+def test_mmp_matches_round_by_round(temp_votes, seats):
+    all_parties = _parties(temp_votes, seats)
+    expected = _round_by_round_mmp(all_parties, 12)
+
+    allocator = MMPSeatAllocator([party['name'] for party in all_parties], 12)
+    list_seats = allocator.update(np.array(temp_votes, dtype=float), np.array(seats))
+    assert list_seats[3] == 0  # Independents get no list seats
+    assert dict(zip([party['name'] for party in all_parties[:3]], list_seats[:3].tolist())) == expected
+
+    assert MMP_calculation(all_parties, 12, 0) == expected
+
+
+def test_mmp_calculation_reuses_its_allocator_across_calls():
+    rng = np.random.default_rng(7)
+    temp_votes = np.zeros(4)
+    seats = np.zeros(4, dtype=int)
+    for _ in range(50):
+        temp_votes = temp_votes + rng.integers(0, 5000, size=4)
+        seats[rng.integers(4)] += rng.integers(2)
+        all_parties = _parties(temp_votes, seats)
+        assert MMP_calculation(all_parties, 40, 0) == _round_by_round_mmp(all_parties, 40)
@@ -0,0 +1,62 @@
+"""
+The cached SVG templates against parsing the template afresh for every map.
+"""
+import os
+import shutil
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from data.MapMaker import SvgTemplate, load_svg_template
+from data.results_cache import normalize_riding_name
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'svg', 'Atlantic Canada.svg')
+
+
+def _parsed_map(input_svg, output_svg, fills):
+    # How every map used to be written: a fresh parse, then the fill of each coloured riding
+    tree = ET.parse(input_svg)
+    for elem in tree.getroot().findall(".//*[@data-riding]"):
+        name = normalize_riding_name(elem.attrib.get('data-riding'))
+        if name in fills:
+            elem.set('fill', fills[name])
+    tree.write(output_svg)
+
+
+@pytest.fixture
+def template_path(tmp_path):
+    path = tmp_path / 'region.svg'
+    shutil.copyfile(TEMPLATE, path)
+    return str(path)
+
+
+def _read(path):
+    with open(path, 'rb') as svg_file:
+        return svg_file.read()
+
+
+def test_maps_match_a_fresh_parse(tmp_path, template_path):
+    template = SvgTemplate(template_path)
+    names = sorted(template.index)
+    assert names
+    all_red = {name: '#ff0000' for name in names}
+    every_other = {name: '#0000ff' for name in names[::2]}
+
+    # Each map is the same as one from a fresh parse, whatever the template drew before it
+    for i, fills in enumerate([all_red, every_other, {}, all_red]):
+        template.write(str(tmp_path / f'map_{i}.svg'), fills)
+        _parsed_map(template_path, str(tmp_path / f'expected_{i}.svg'), fills)
+        assert _read(tmp_path / f'map_{i}.svg') == _read(tmp_path / f'expected_{i}.svg'), f"map {i}"
+
+
+def test_templates_are_parsed_once_per_version(template_path):
+    template = load_svg_template(template_path)
+    assert load_svg_template(template_path) is template
+
+    tree = ET.parse(template_path)
+    first = tree.getroot().find(".//*[@data-riding]")
+    first.set('data-riding', 'Renamed Riding')
+    tree.write(template_path)
+    reparsed = load_svg_template(template_path)
+    assert reparsed is not template
+    assert 'Renamed Riding' in reparsed.index
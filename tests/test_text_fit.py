@@ -0,0 +1,50 @@
+"""
+The memoized font fitting against the shrink-one-point-at-a-time loops it replaced.
+"""
+import pytest
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+
+from data.text_fit import fit_font_size, text_width
+
+TEXTS = ['Phonexia2', 'PhlebotinumEddie', 'Northern and Eastern Ontario', 'W', 'Liberal Party of Canada (LPC)']
+
+
+def _get_text_width(text, font_size, scale_factor=0.001):
+    # The TextPath measurement the riding cards used before
+    text_path = TextPath((0, 0), text, size=font_size)
+    return text_path.get_extents(Affine2D()).width * scale_factor
+
+
+def _shrink(text, max_width, max_size, min_size):
+    font_size = max_size
+    while _get_text_width(text, font_size) > max_width and font_size > min_size:
+        font_size -= 1
+    return font_size
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_text_width_matches_textpath(text):
+    for font_size in (1, 7, 12, 22, 40):
+        assert text_width(text, font_size) == pytest.approx(_get_text_width(text, font_size), rel=1e-9)
+
+
+@pytest.mark.parametrize('text', TEXTS)
+@pytest.mark.parametrize('max_width', [0.02, 0.1, 1.0])
+def test_fit_font_size_matches_shrinking_loop(text, max_width):
+    expected = _shrink(text, max_width, 24, 1)
+    assert fit_font_size(text, max_width, 24, min_size=1) == expected
+    # A repeated request is answered from the memo with the same size
+    assert fit_font_size(text, max_width, 24, min_size=1) == expected
+    assert fit_font_size(text, max_width, 22, min_size=8) == _shrink(text, max_width, 22, 8)
+
+
+def test_fonts_are_measured_separately():
+    bold = FontProperties(weight='bold', size=10)
+    assert text_width('PhlebotinumEddie', 10, prop=bold) > text_width('PhlebotinumEddie', 10)
+
+
+def test_blank_text_has_no_width():
+    assert text_width('', 12) == 0.0
+    assert fit_font_size('   ', 0.01, 20) == 20
@@ -0,0 +1,107 @@
+"""
+ElectionTimeline against a step-by-step replay of the count with the party dictionaries.
+"""
+import numpy as np
+import pytest
+
+from data.seat_allocation import highest_averages_seats
+from data.timeline import ElectionTimeline
+from data.vote_calculations import (determine_winner, finalize_riding_votes, generate_vote_progressions,
+                                    update_running_tally)
+
+SEATS = 12
+
+PARTIES = [
+    {'name': 'Liberal Party of Canada', 'short_pname': 'LPC', 'color': 'red', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+    {'name': 'Conservative Party of Canada', 'short_pname': 'CPC', 'color': 'blue', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+    {'name': 'New Democratic Party', 'short_pname': 'NDP', 'color': 'orange', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+    {'name': 'Independent', 'short_pname': 'IND', 'color': 'gray', 'seats': 0, 'seats_list': 0, 'pop_vote': 0, 'temp_vote': 0},
+]
+
+RIDINGS = [
+    {'name': 'A', 'final_results': [5000, 4000, 1000],
+     'party_names': ['Liberal Party of Canada', 'Conservative Party of Canada', 'New Democratic Party']},
+    {'name': 'B', 'final_results': [3000, 7000],
+     'party_names': ['New Democratic Party', 'Independent']},
+    # A candidate of a party that is not registered only counts in their riding
+    {'name': 'C', 'final_results': [6000, 6500, 2000],
+     'party_names': ['Conservative Party of Canada', 'Green Party of Canada', 'Liberal Party of Canada']},
+    {'name': 'D', 'final_results': [8000],
+     'party_names': ['Liberal Party of Canada']},
+]
+
+
+@pytest.fixture
+def count():
+    progressions = generate_vote_progressions([riding['final_results'] for riding in RIDINGS], 12,
+                                              np.random.default_rng(3))
+    return [np.floor(progressions[r, :, :len(riding['final_results'])]) for r, riding in enumerate(RIDINGS)]
+
+
+def _replay(count):
+    # The count as it was run before the timeline: the party dictionaries updated step by step
+    parties = [dict(party) for party in PARTIES]
+    names = [party['name'] for party in parties]
+    eligible = [name != 'Independent' for name in names]
+    frames = {}
+    for r, (riding, votes) in enumerate(zip(RIDINGS, count)):
+        for step, step_votes in enumerate(votes):
+            update_running_tally(step_votes, riding['party_names'], parties)
+            temp_votes = np.array([party['temp_vote'] for party in parties], dtype=float)
+            fptp_seats = np.array([party['seats'] for party in parties])
+            if step_votes.any():
+                leading_party = riding['party_names'][int(np.argmax(step_votes))]
+                if leading_party in names:
+                    fptp_seats[names.index(leading_party)] += 1
+            list_seats = np.zeros(len(parties), dtype=int)
+            if np.floor(temp_votes.sum()) > 0:
+                independent_seats = fptp_seats[names.index('Independent')]
+                dhondt = highest_averages_seats(temp_votes[eligible], SEATS - independent_seats)
+                list_seats[eligible] = dhondt - fptp_seats[eligible]
+            frames[r, step] = temp_votes, fptp_seats, list_seats
+        finalize_riding_votes(votes[-1], riding['party_names'], parties)
+        winner = riding['party_names'][int(np.argmax(votes[-1]))]
+        if winner in names:
+            parties[names.index(winner)]['seats'] += 1
+    return frames
+
+
+def test_frames_match_replayed_count(count):
+    timeline = ElectionTimeline(RIDINGS, [dict(party) for party in PARTIES], count, SEATS)
+    for (r, step), (temp_votes, fptp_seats, list_seats) in _replay(count).items():
+        frame = timeline.frame(r, step)
+        np.testing.assert_allclose(frame.temp_votes, temp_votes, err_msg=f"riding {r} step {step}")
+        np.testing.assert_array_equal(frame.fptp_seats, fptp_seats, err_msg=f"riding {r} step {step}")
+        np.testing.assert_array_equal(frame.list_seats, list_seats, err_msg=f"riding {r} step {step}")
+
+
+def test_calls_match_determine_winner(count):
+    timeline = ElectionTimeline(RIDINGS, [dict(party) for party in PARTIES], count, SEATS)
+    for r, votes in enumerate(count):
+        final_total = votes[-1].sum()
+        called = [determine_winner(list(step_votes), final_total - step_votes.sum()) for step_votes in votes]
+        call_step = called.index(True)
+        for step in range(len(votes)):
+            frame = timeline.frame(r, step)
+            assert frame.called == (step >= call_step)
+            assert frame.winner_index == (int(np.argmax(votes[call_step])) if step >= call_step else -1)
+
+
+def test_frames_are_read_only(count):
+    timeline = ElectionTimeline(RIDINGS, [dict(party) for party in PARTIES], count, SEATS)
+    frame = timeline.frame(1, 5)
+    with pytest.raises(ValueError):
+        frame.temp_votes[0] = 0
+    with pytest.raises(ValueError):
+        frame.votes[0] = 0
+
+
+def test_apply_final_state_writes_the_last_frame(count):
+    all_parties = [dict(party) for party in PARTIES]
+    timeline = ElectionTimeline(RIDINGS, all_parties, count, SEATS)
+    assert all(party['pop_vote'] == 0 for party in all_parties)
+    timeline.apply_final_state(all_parties)
+    temp_votes, fptp_seats, list_seats = _replay(count)[len(RIDINGS) - 1, len(count[-1]) - 1]
+    assert [party['pop_vote'] for party in all_parties] == pytest.approx(list(temp_votes))
+    assert [party['seats'] for party in all_parties] == list(fptp_seats)
+    assert [party['seats_list'] for party in all_parties] == list(list_seats)
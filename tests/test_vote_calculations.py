@@ -0,0 +1,120 @@
+"""
+The vectorized count curves, call detection and step selection.
+"""
+import numpy as np
+import pytest
+
+from data.vote_calculations import (determine_winner, determine_winners, generate_vote_progressions, lead_change_steps,
+                                    select_steps, select_story_steps)
+
+FINAL_RESULTS = [[467355, 437582, 168439], [608352, 544579], [1200], [0, 5000]]
+
+
+def test_progressions_run_from_zero_to_the_final_results():
+    progressions = generate_vote_progressions(FINAL_RESULTS, 40, np.random.default_rng(0))
+    assert progressions.shape == (len(FINAL_RESULTS), 40, 3)
+    assert not progressions[:, 0].any()
+    for r, results in enumerate(FINAL_RESULTS):
+        np.testing.assert_array_equal(progressions[r, -1, :len(results)], results)
+        # Ridings with fewer candidates are padded with zeros
+        assert not progressions[r, :, len(results):].any()
+    assert (np.diff(progressions, axis=1) >= 0).all()
+
+
+def test_progressions_are_reproducible_from_a_seed():
+    first = generate_vote_progressions(FINAL_RESULTS, 20, np.random.default_rng(42))
+    again = generate_vote_progressions(FINAL_RESULTS, 20, np.random.default_rng(42))
+    other = generate_vote_progressions(FINAL_RESULTS, 20, np.random.default_rng(43))
+    np.testing.assert_array_equal(first, again)
+    assert not np.array_equal(first, other)
+
+
+def test_progressions_follow_a_normalised_cumulative_sum():
+    # Between the fixed first and last steps each curve is final * cumsum(draws) / sum(draws), as in calculate_vote_totals
+    rng = np.random.default_rng(5)
+    draws = np.random.default_rng(5).random((1, 2, 10))
+    progressions = generate_vote_progressions([[1000, 500]], 10, rng)
+    expected = np.cumsum(draws, axis=2) / draws.sum(axis=2, keepdims=True) * np.array([1000, 500])[None, :, None]
+    np.testing.assert_allclose(progressions[0, 1:-1], expected[0].T[1:-1])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_select_steps_keeps_the_first_and_last(seed):
+    steps = select_steps(40, 6, np.random.default_rng(seed))
+    assert len(steps) == len(set(steps)) == 6
+    assert steps == sorted(steps)
+    assert steps[0] == 0 and steps[-1] == 39
+    assert steps == select_steps(40, 6, np.random.default_rng(seed))
+
+
+def _scalar_calls(progressions, num_candidates, threshold):
+    # determine_winner at every step of every riding, the way the count used to be called
+    call_steps, winners = [], []
+    for votes, n in zip(progressions, num_candidates):
+        votes = votes[:, :n]
+        final_total = votes[-1].sum()
+        called = [determine_winner(list(step_votes), final_total - step_votes.sum(), threshold) for step_votes in votes]
+        call_step = called.index(True) if True in called else -1
+        call_steps.append(call_step)
+        winners.append(int(np.argmax(votes[call_step])) if call_step >= 0 else -1)
+    return call_steps, winners
+
+
+@pytest.mark.parametrize('threshold', [0.0, 0.2, 0.4, 0.9])
+@pytest.mark.parametrize('seed', range(5))
+def test_determine_winners_matches_determine_winner(seed, threshold):
+    rng = np.random.default_rng(seed)
+    final_results = [list(rng.integers(0, 100000, size=rng.integers(1, 6))) for _ in range(30)]
+    # Dead heats and runaway wins
+    final_results += [[50000, 50000], [50000, 50000, 10], [100000, 10], [7]]
+    progressions = np.floor(generate_vote_progressions(final_results, 30, rng))
+    num_candidates = [len(results) for results in final_results]
+
+    call_steps, winners = determine_winners(progressions, num_candidates, threshold)
+    expected_steps, expected_winners = _scalar_calls(progressions, num_candidates, threshold)
+    assert call_steps.tolist() == expected_steps
+    assert winners.tolist() == expected_winners
+
+
+def test_single_candidate_ridings_are_called_at_once():
+    progressions = generate_vote_progressions([[500], [300, 200]], 10, np.random.default_rng(0))
+    call_steps, winners = determine_winners(progressions, [1, 2])
+    assert call_steps[0] == 0 and winners[0] == 0
+
+
+def test_lead_changes_ignore_the_steps_before_any_votes():
+    assert lead_change_steps([-1, -1, 0, 0, 1, 1, 0, 2]) == [4, 6, 7]
+    assert lead_change_steps([-1, 1, 1, 1]) == []
+    assert lead_change_steps([0]) == []
+
+
+def _spread_steps(must_have, num_steps, num_selected_steps):
+    # One step at a time, the earliest of the steps furthest from those already picked
+    selected = set(must_have)
+    while len(selected) < min(num_selected_steps, num_steps):
+        distances = [min(abs(step - picked) for picked in selected) for step in range(num_steps)]
+        selected.add(distances.index(max(distances)))
+    return sorted(selected)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_story_steps_keep_the_events_and_spread_the_rest(seed):
+    rng = np.random.default_rng(seed)
+    num_steps = int(rng.integers(2, 60))
+    leaders = np.where(rng.random(num_steps) < 0.2, rng.integers(0, 3, num_steps), 0)
+    leaders = np.maximum.accumulate(leaders)  # A few lead changes
+    leaders[:rng.integers(0, 3)] = -1
+    call_step = int(rng.integers(-1, num_steps))
+    num_selected_steps = int(rng.integers(1, 15))
+
+    steps = select_story_steps(leaders, call_step, num_steps, num_selected_steps)
+    must_have = {0, num_steps - 1, *lead_change_steps(leaders)} | ({call_step} if call_step >= 0 else set())
+    assert must_have <= set(steps)
+    assert len(steps) == max(len(must_have), min(num_selected_steps, num_steps))
+    assert steps == _spread_steps(must_have, num_steps, num_selected_steps)
+
+
+def test_story_steps_follow_the_count():
+    leaders = [-1, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+    assert select_story_steps(leaders, 12, 20, 3) == [0, 3, 12, 19]
+    assert select_story_steps(leaders, -1, 20, 6) == [0, 3, 7, 11, 15, 19]